@@ -1,14 +1,15 @@
 # dashboard_commodities.py
+import time
+SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import time
-import random
+import atexit
+import os
+import threading
+import uuid
 import warnings
+# pandas, numpy, plotly et le moteur sont importés à la demande : l'en-tête s'affiche avant leur chargement
 warnings.filterwarnings('ignore')
 
 # Configuration de la page
@@ -40,6 +41,10 @@ st.markdown("""
         margin: 0.5rem 0;
         box-shadow: 0 4px 15px rgba(0,0,0,0.1);
     }
+    .commodity-grid {
+        display: grid;
+        gap: 1rem;
+    }
     .commodity-value {
         font-size: 2rem;
         font-weight: bold;
@@ -92,250 +97,27 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 class CommodityDashboard:
-    def __init__(self):
-        self.commodities = self.define_commodities()
-        self.historical_data = self.initialize_historical_data()
-        self.current_data = self.initialize_current_data()
-        self.market_data = self.initialize_market_data()
-        
-    def define_commodities(self):
-        """Définit les commodités avec leurs caractéristiques"""
-        return {
-            'BRENT': {
-                'nom': 'Pétrole Brent',
-                'symbole': 'BRENT',
-                'icone': '🛢️',
-                'categorie': 'Énergie',
-                'unite': 'USD/baril',
-                'prix_base': 85.0,
-                'volatilite': 2.5,
-                'production_mondiale': 82.0,  # millions barils/jour
-                'reserves': 1500.0,  # milliards barils
-                'pays_producteurs': ['Arabie Saoudite', 'Russie', 'USA', 'Irak'],
-                'description': 'Référence mondiale du pétrole brut'
-            },
-            'WTI': {
-                'nom': 'Pétrole WTI',
-                'symbole': 'WTI',
-                'icone': '⛽',
-                'categorie': 'Énergie',
-                'unite': 'USD/baril',
-                'prix_base': 82.5,
-                'volatilite': 2.8,
-                'production_mondiale': 78.0,
-                'reserves': 500.0,
-                'pays_producteurs': ['USA', 'Canada', 'Mexique'],
-                'description': 'Pétrole américain de référence'
-            },
-            'GOLD': {
-                'nom': 'Or',
-                'symbole': 'GOLD',
-                'icone': '🥇',
-                'categorie': 'Métaux Précieux',
-                'unite': 'USD/once',
-                'prix_base': 1950.0,
-                'volatilite': 1.2,
-                'production_mondiale': 3500.0,  # tonnes/an
-                'reserves': 54000.0,
-                'pays_producteurs': ['Chine', 'Australie', 'Russie', 'USA'],
-                'description': 'Valeur refuge traditionnelle'
-            },
-            'SILVER': {
-                'nom': 'Argent',
-                'symbole': 'SILVER',
-                'icone': '🥈',
-                'categorie': 'Métaux Précieux',
-                'unite': 'USD/once',
-                'prix_base': 23.5,
-                'volatilite': 2.1,
-                'production_mondiale': 25000.0,
-                'reserves': 530000.0,
-                'pays_producteurs': ['Mexique', 'Pérou', 'Chine'],
-                'description': 'Métal précieux industriel'
-            },
-            'COPPER': {
-                'nom': 'Cuivre',
-                'symbole': 'COPPER',
-                'icone': '🔴',
-                'categorie': 'Métaux Industriels',
-                'unite': 'USD/livre',
-                'prix_base': 3.85,
-                'volatilite': 1.8,
-                'production_mondiale': 22.0,  # millions tonnes/an
-                'reserves': 870.0,
-                'pays_producteurs': ['Chili', 'Pérou', 'Chine'],
-                'description': 'Baromètre économique mondial'
-            },
-            'WHEAT': {
-                'nom': 'Blé',
-                'symbole': 'WHEAT',
-                'icone': '🌾',
-                'categorie': 'Agriculture',
-                'unite': 'USD/boisseau',
-                'prix_base': 6.25,
-                'volatilite': 3.2,
-                'production_mondiale': 780.0,  # millions tonnes/an
-                'reserves': 280.0,
-                'pays_producteurs': ['Chine', 'Inde', 'Russie', 'USA'],
-                'description': 'Céréale alimentaire majeure'
-            },
-            'CORN': {
-                'nom': 'Maïs',
-                'symbole': 'CORN',
-                'icone': '🌽',
-                'categorie': 'Agriculture',
-                'unite': 'USD/boisseau',
-                'prix_base': 4.80,
-                'volatilite': 2.9,
-                'production_mondiale': 1200.0,
-                'reserves': 320.0,
-                'pays_producteurs': ['USA', 'Chine', 'Brésil'],
-                'description': 'Céréale pour alimentation animale et humaine'
-            },
-            'SOYBEANS': {
-                'nom': 'Soja',
-                'symbole': 'SOYBEANS',
-                'icone': '🫘',
-                'categorie': 'Agriculture',
-                'unite': 'USD/boisseau',
-                'prix_base': 12.80,
-                'volatilite': 2.7,
-                'production_mondiale': 350.0,
-                'reserves': 90.0,
-                'pays_producteurs': ['USA', 'Brésil', 'Argentine'],
-                'description': 'Protéine végétale principale'
-            },
-            'COFFEE': {
-                'nom': 'Café',
-                'symbole': 'COFFEE',
-                'icone': '☕',
-                'categorie': 'Softs',
-                'unite': 'USD/livre',
-                'prix_base': 1.85,
-                'volatilite': 4.1,
-                'production_mondiale': 10.5,  # millions tonnes/an
-                'reserves': 25.0,
-                'pays_producteurs': ['Brésil', 'Vietnam', 'Colombie'],
-                'description': 'Boisson la plus échangée après le pétrole'
-            }
-        }
-    
-    def initialize_historical_data(self):
-        """Initialise les données historiques des commodités"""
-        dates = pd.date_range('2020-01-01', datetime.now(), freq='D')
-        data = []
-        
-        for date in dates:
-            for symbole, info in self.commodities.items():
-                # Prix de base
-                base_price = info['prix_base']
-                
-                # Impact des événements mondiaux
-                global_impact = 1.0
-                
-                # Crise COVID (2020)
-                if date.year == 2020 and date.month <= 6:
-                    if info['categorie'] == 'Énergie':
-                        global_impact *= random.uniform(0.5, 0.8)  # Effondrement pétrole
-                    else:
-                        global_impact *= random.uniform(0.9, 1.1)
-                # Reprise post-COVID (2021)
-                elif date.year == 2021:
-                    global_impact *= random.uniform(1.05, 1.25)
-                # Guerre Ukraine (2022)
-                elif date.year == 2022 and date.month >= 2:
-                    if info['symbole'] in ['WHEAT', 'CORN']:
-                        global_impact *= random.uniform(1.2, 1.6)  # Hausse céréales
-                    elif info['categorie'] == 'Énergie':
-                        global_impact *= random.uniform(1.1, 1.4)
-                # Tensions récentes
-                elif date.year >= 2023:
-                    global_impact *= random.uniform(0.95, 1.15)
-                
-                # Volatilité quotidienne basée sur le profil de volatilité
-                daily_volatility = random.normalvariate(1, info['volatilite']/100)
-                
-                # Tendance saisonnière
-                seasonal = 1 + 0.005 * np.sin(2 * np.pi * date.dayofyear / 365)
-                
-                prix_actuel = base_price * global_impact * daily_volatility * seasonal
-                
-                data.append({
-                    'date': date,
-                    'symbole': symbole,
-                    'nom': info['nom'],
-                    'categorie': info['categorie'],
-                    'prix': prix_actuel,
-                    'volume': random.uniform(100000, 5000000),
-                    'volatilite_jour': abs(daily_volatility - 1) * 100
-                })
-        
-        return pd.DataFrame(data)
-    
-    def initialize_current_data(self):
-        """Initialise les données courantes"""
-        current_data = []
-        for symbole, info in self.commodities.items():
-            # Dernières données historiques
-            last_data = self.historical_data[self.historical_data['symbole'] == symbole].iloc[-1]
-            
-            # Variations simulées
-            change_pct = random.uniform(-3.0, 3.0)
-            
-            current_data.append({
-                'symbole': symbole,
-                'nom': info['nom'],
-                'icone': info['icone'],
-                'categorie': info['categorie'],
-                'unite': info['unite'],
-                'prix': last_data['prix'] * (1 + change_pct/100),
-                'change_pct': change_pct,
-                'volatilite': info['volatilite'],
-                'production_mondiale': info['production_mondiale'],
-                'reserves': info['reserves'],
-                'pays_producteurs': info['pays_producteurs'],
-                'volume_jour': random.uniform(500000, 5000000),
-                'spread': random.uniform(0.1, 0.5)
-            })
-        
-        return pd.DataFrame(current_data)
-    
-    def initialize_market_data(self):
-        """Initialise les données des marchés mondiaux"""
-        indices = {
-            'S&P 500': {'valeur': 4500, 'change': 0.0, 'secteur': 'USA'},
-            'NASDAQ': {'valeur': 14000, 'change': 0.0, 'secteur': 'USA Tech'},
-            'DAX': {'valeur': 16000, 'change': 0.0, 'secteur': 'Allemagne'},
-            'CAC 40': {'valeur': 7200, 'change': 0.0, 'secteur': 'France'},
-            'FTSE 100': {'valeur': 7500, 'change': 0.0, 'secteur': 'UK'},
-            'Nikkei 225': {'valeur': 33000, 'change': 0.0, 'secteur': 'Japon'}
-        }
-        
-        devises = {
-            'EUR/USD': {'valeur': 1.0850, 'change': 0.0},
-            'USD/JPY': {'valeur': 148.50, 'change': 0.0},
-            'GBP/USD': {'valeur': 1.2650, 'change': 0.0},
-            'USD/CHF': {'valeur': 0.8850, 'change': 0.0}
-        }
-        
-        return {'indices': indices, 'devises': devises}
+    def __init__(self, source=None, history_store=None, engine=None):
+        # Les données et analyses sont portées par le moteur, le dashboard n'en est que l'interface
+        if engine is None:
+            from commodities.engine import MarketEngine
+            engine = MarketEngine(source, history_store)
+        self.engine = engine
+        self.source = self.engine.source
+        self.commodities = self.engine.commodities
+        self.metadata = self.engine.metadata
+        self.memory_stats = self.engine.memory_stats
+        self.current_data = self.engine.current_data
+        self.market_data = self.engine.market_data
     
     def update_live_data(self):
         """Met à jour les données en temps réel"""
-        for idx in self.current_data.index:
-            symbole = self.current_data.loc[idx, 'symbole']
-            
-            # Mise à jour des prix
-            if random.random() < 0.6:  # 60% de chance de changement
-                variation = random.uniform(-1.5, 1.5)
-                
-                self.current_data.loc[idx, 'prix'] *= (1 + variation/100)
-                self.current_data.loc[idx, 'change_pct'] = variation
-                
-                # Mise à jour du volume
-                self.current_data.loc[idx, 'volume_jour'] *= random.uniform(0.7, 1.4)
+        self.engine.update_live_data()
+        # Le moteur remplace ses tables à chaque tick : la session garde un état figé jusqu'à la mise à jour suivante
+        self.current_data = self.engine.current_data
     
-    def display_header(self):
+    @staticmethod
+    def display_header():
         """Affiche l'en-tête du dashboard"""
         st.markdown(
             '<h1 class="main-header">🛢️ DASHBOARD COMMODITIES - MARCHÉS DES MATIÈRES PREMIÈRES</h1>', 
@@ -351,50 +133,81 @@ class CommodityDashboard:
                 '</div>', 
                 unsafe_allow_html=True
             )
+    
+    @staticmethod
+    def format_commodity_cards(data):
+        """Formate le HTML des cartes en une passe vectorisée"""
+        import numpy as np
+        import pandas as pd
         
-        current_time = datetime.now().strftime('%H:%M:%S')
-        st.sidebar.markdown(f"**🕐 Dernière mise à jour: {current_time}**")
+        change_class = pd.Series(
+            np.select([data['change_pct'] > 0, data['change_pct'] < 0], ['positive', 'negative'], 'neutral'),
+            index=data.index
+        )
+        card_class = 'commodity-card category-' + (
+            data['categorie'].astype(str).str.lower().str.replace(' ', '').str.replace('é', 'e')
+        )
+        prix = data['prix'].map('{:.2f}'.format)
+        change = data['change_pct'].map('{:+.2f}%'.format)
+        volume = data['volume_jour'].map('{:,.0f}'.format)
+        volatilite = data['volatilite'].map('{:.1f}%'.format)
+        
+        html = (
+            '<div class="' + card_class + '">'
+            '<div style="display: flex; align-items: center; margin-bottom: 1rem;">'
+            '<span class="commodity-icon">' + data['icone'].astype(str) + '</span>'
+            '<div><h3 style="margin: 0; font-size: 1.2rem;">' + data['symbole'].astype(str) + '</h3>'
+            '<p style="margin: 0; opacity: 0.9; font-size: 0.9rem;">' + data['nom'].astype(str) + '</p></div>'
+            '</div>'
+            '<div class="commodity-value">' + prix + '</div>'
+            '<div style="font-size: 0.9rem; opacity: 0.8;">' + data['unite'].astype(str) + '</div>'
+            '<div class="commodity-change ' + change_class + '">' + change + '</div>'
+            '<div style="margin-top: 1rem; font-size: 0.8rem;">'
+            '📊 Vol: ' + volume + '<br>📈 Volatilité: ' + volatilite +
+            '</div></div>'
+        )
+        html.index = data['symbole'].values
+        return html
+    
+    @staticmethod
+    def render_commodity_cards(current_data, metadata, cache=None):
+        """Construit la grille de cartes, en ne reformatant que les cartes modifiées"""
+        from commodities.schema import with_metadata
+        
+        cache = {} if cache is None else cache
+        data = with_metadata(current_data, metadata, ['icone', 'nom', 'unite'])
+        cached_prix = data['symbole'].astype(str).map(lambda s: cache.get(s, (None, None, None))[0])
+        cached_change = data['symbole'].astype(str).map(lambda s: cache.get(s, (None, None, None))[1])
+        changed = (data['prix'] != cached_prix) | (data['change_pct'] != cached_change)
+        
+        if changed.any():
+            changed_data = data[changed]
+            for symbole, prix, change_pct, html in zip(changed_data['symbole'], changed_data['prix'],
+                                                        changed_data['change_pct'],
+                                                        CommodityDashboard.format_commodity_cards(changed_data)):
+                cache[symbole] = (prix, change_pct, html)
+        
+        blocks = []
+        for categorie, cat_data in data.groupby('categorie', sort=False, observed=True):
+            cards = ''.join(cache[symbole][2] for symbole in cat_data['symbole'])
+            blocks.append(
+                f'<h4 style="color: #0055A4; margin-top: 1rem;">{categorie}</h4>'
+                f'<div class="commodity-grid" style="grid-template-columns: repeat({len(cat_data)}, 1fr);">'
+                f'{cards}</div>'
+            )
+        
+        return ''.join(blocks), list(data.loc[changed, 'symbole'])
     
     def display_commodity_cards(self):
         """Affiche les cartes de commodités principales"""
         st.markdown('<h3 class="section-header">💰 PRIX DES COMMODITÉS EN TEMPS RÉEL</h3>', 
                    unsafe_allow_html=True)
         
-        # Grouper par catégorie
-        categories = self.current_data['categorie'].unique()
-        
-        for categorie in categories:
-            st.markdown(f'<h4 style="color: #0055A4; margin-top: 1rem;">{categorie}</h4>', 
-                       unsafe_allow_html=True)
-            
-            cat_data = self.current_data[self.current_data['categorie'] == categorie]
-            cols = st.columns(len(cat_data))
-            
-            for idx, (_, commodity) in enumerate(cat_data.iterrows()):
-                with cols[idx]:
-                    change_class = "positive" if commodity['change_pct'] > 0 else "negative" if commodity['change_pct'] < 0 else "neutral"
-                    card_class = f"commodity-card category-{categorie.lower().replace(' ', '').replace('é', 'e')}"
-                    
-                    st.markdown(f"""
-                    <div class="{card_class}">
-                        <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-                            <span class="commodity-icon">{commodity['icone']}</span>
-                            <div>
-                                <h3 style="margin: 0; font-size: 1.2rem;">{commodity['symbole']}</h3>
-                                <p style="margin: 0; opacity: 0.9; font-size: 0.9rem;">{commodity['nom']}</p>
-                            </div>
-                        </div>
-                        <div class="commodity-value">{commodity['prix']:.2f}</div>
-                        <div style="font-size: 0.9rem; opacity: 0.8;">{commodity['unite']}</div>
-                        <div class="commodity-change {change_class}">
-                            {commodity['change_pct']:+.2f}%
-                        </div>
-                        <div style="margin-top: 1rem; font-size: 0.8rem;">
-                            📊 Vol: {commodity['volume_jour']:,.0f}<br>
-                            📈 Volatilité: {commodity['volatilite']:.1f}%
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+        # Une seule requête HTML pour toute la grille, cache des cartes par session
+        cache = st.session_state.setdefault('commodity_cards_cache', {})
+        html, _ = self.render_commodity_cards(self.current_data, self.metadata, cache)
+        st.session_state['commodity_cards_html'] = html
+        st.markdown(html, unsafe_allow_html=True)
     
     def display_key_metrics(self):
         """Affiche les métriques clés"""
@@ -421,7 +234,7 @@ class CommodityDashboard:
             st.metric(
                 "Volume Total Journalier",
                 f"${total_volume:,.0f}",
-                f"{random.randint(-8, 12)}% vs hier"
+                f"{self.source.rng('metriques', self.source.current_tick()).integers(-8, 13)}% vs hier"
             )
         
         with col3:
@@ -440,18 +253,32 @@ class CommodityDashboard:
     
     def create_price_overview(self):
         """Crée la vue d'ensemble des prix"""
+        import numpy as np
+        import pandas as pd
+        import plotly.express as px
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        from commodities.anomalies import KINDS
+        from commodities.currency import CURRENCIES
+        from commodities.events import STUDY_FIELDS
+        from commodities.volatility import ESTIMATORS, column
+        
         st.markdown('<h3 class="section-header">📈 ANALYSE DES PRIX HISTORIQUES</h3>', 
                    unsafe_allow_html=True)
         
-        tab1, tab2, tab3, tab4 = st.tabs([
+        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
             "Évolution Historique", 
             "Analyse par Catégorie", 
             "Volatilité", 
-            "Performances Relatives"
+            "Performances Relatives",
+            "Spreads & Ratios",
+            "Saisonnalité",
+            "Événements",
+            "Courbes à Terme"
         ])
         
         with tab1:
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns([2, 1, 1])
             
             with col1:
                 # Sélection des commodités à afficher
@@ -469,15 +296,16 @@ class CommodityDashboard:
                     index=0
                 )
             
-            # Filtrage des données
-            filtered_data = self.historical_data[
-                self.historical_data['symbole'].isin(selected_commodities)
-            ]
+            with col3:
+                # Devise d'affichage
+                devise = st.selectbox("Devise:", list(CURRENCIES), index=0)
             
+            # Filtrage des données
+            cutoff_date = None
             if period != 'Toute la période':
                 years = int(period.split()[0])
                 cutoff_date = datetime.now() - timedelta(days=365 * years)
-                filtered_data = filtered_data[filtered_data['date'] >= cutoff_date]
+            filtered_data = self.engine.converted_history(selected_commodities, devise, start=cutoff_date)
             
             fig = px.line(filtered_data, 
                          x='date', 
@@ -485,12 +313,25 @@ class CommodityDashboard:
                          color='symbole',
                          title=f'Évolution des Prix des Commodités ({period})',
                          color_discrete_sequence=px.colors.qualitative.Bold)
-            fig.update_layout(yaxis_title="Prix (USD)")
+            
+            # Anomalies détectées sur les ticks (prix relevés en USD)
+            with self.engine.lock:
+                anomalies = self.engine.anomalies.recent(selected_commodities)
+            if devise == 'USD' and not anomalies.empty:
+                fig.add_trace(go.Scatter(x=anomalies['horodatage'], 
+                                         y=anomalies['prix'],
+                                         mode='markers',
+                                         marker=dict(symbol='x', size=10, color='red'),
+                                         name='Anomalies',
+                                         text=anomalies['symbole'] + ' · ' + anomalies['type'].map(KINDS)))
+            fig.update_layout(yaxis_title=f"Prix ({devise})")
             st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
             # Analyse par catégorie
-            fig = px.box(self.historical_data, 
+            distribution = self.engine.price_matrix().melt(value_name='prix')
+            distribution['categorie'] = distribution['symbole'].map(lambda s: self.commodities[s]['categorie'])
+            fig = px.box(distribution, 
                         x='categorie', 
                         y='prix',
                         title='Distribution des Prix par Catégorie',
@@ -498,43 +339,48 @@ class CommodityDashboard:
             st.plotly_chart(fig, use_container_width=True)
         
         with tab3:
+            # Volatilité réalisée sur barres OHLC, barre en cours incluse
+            moteur_vol = self.engine.volatility()
+            col1, col2 = st.columns(2)
+            with col1:
+                horizon = st.selectbox("Horizon (jours):", moteur_vol.horizons, index=1)
+            with col2:
+                estimateur = st.selectbox("Estimateur:", list(ESTIMATORS), format_func=ESTIMATORS.get)
+            
             col1, col2 = st.columns(2)
             
             with col1:
-                # Volatilité historique
-                volatilite_data = self.historical_data.groupby('symbole')['volatilite_jour'].mean().reset_index()
-                fig = px.bar(volatilite_data, 
+                courantes = self.engine.live_volatility()
+                comparaison = pd.DataFrame({
+                    ESTIMATORS[nom]: courantes[column(nom, horizon)] for nom in ESTIMATORS
+                }).reset_index().melt(id_vars='symbole', var_name='Estimateur', value_name='Volatilité (%)')
+                fig = px.bar(comparaison, 
                             x='symbole', 
-                            y='volatilite_jour',
-                            title='Volatilité Historique Moyenne (%)',
-                            color='symbole',
+                            y='Volatilité (%)',
+                            color='Estimateur',
+                            barmode='group',
+                            title=f'Volatilité Annualisée par Estimateur ({horizon} jours)',
                             color_discrete_sequence=px.colors.qualitative.Bold)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                # Volatilité récente (30 derniers jours)
-                recent_data = self.historical_data[
-                    self.historical_data['date'] > (datetime.now() - timedelta(days=30))
-                ]
-                recent_vol = recent_data.groupby('symbole')['volatilite_jour'].std().reset_index()
-                
-                fig = px.scatter(recent_vol, 
-                               x='symbole', 
-                               y='volatilite_jour',
-                               size='volatilite_jour',
-                               title='Volatilité Récente (30 jours)',
-                               color='symbole',
-                               size_max=40)
+                historique_vol = moteur_vol.history(estimateur, horizon)
+                historique_vol = historique_vol[historique_vol.index > (datetime.now() - timedelta(days=365))]
+                fig = px.line(historique_vol, 
+                             title=f'{ESTIMATORS[estimateur]} - Dernière Année (%)',
+                             labels={'value': 'Volatilité (%)', 'variable': 'Symbole'},
+                             color_discrete_sequence=px.colors.qualitative.Bold)
                 st.plotly_chart(fig, use_container_width=True)
         
         with tab4:
             # Performance relative
             performance_data = []
+            prix = self.engine.price_matrix()
             for symbole in self.commodities.keys():
-                commodity_data = self.historical_data[self.historical_data['symbole'] == symbole]
+                commodity_data = prix[symbole].dropna()
                 if len(commodity_data) > 0:
-                    start_price = commodity_data.iloc[0]['prix']
-                    end_price = commodity_data.iloc[-1]['prix']
+                    start_price = commodity_data.iloc[0]
+                    end_price = commodity_data.iloc[-1]
                     performance = ((end_price - start_price) / start_price) * 100
                     performance_data.append({
                         'symbole': symbole,
@@ -550,9 +396,169 @@ class CommodityDashboard:
                         title='Performance Totale depuis 2020 (%)',
                         color_discrete_sequence=px.colors.qualitative.Bold)
             st.plotly_chart(fig, use_container_width=True)
+        
+        with tab5:
+            # Instruments dérivés inter-commodités (unités normalisées)
+            engine = self.engine.derived_engine()
+            instruments = list(engine.definitions)
+            instrument = st.selectbox(
+                "Instrument dérivé:",
+                instruments,
+                format_func=lambda name: engine.definitions[name]['description']
+            )
+            
+            # L'évaluation lit les séries de base que les ticks des autres sessions modifient
+            with self.engine.lock:
+                serie = engine.evaluate(instrument)
+            fig = px.line(serie.reset_index(), 
+                         x='date', 
+                         y=instrument,
+                         title=f"{engine.definitions[instrument]['description']} = {engine.definitions[instrument]['expression']}")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with tab6:
+            # Profils saisonniers et décomposition tendance/saison/résidu
+            saisonnalite = self.engine.seasonality()
+            categories = sorted({info['categorie'] for info in self.commodities.values()})
+            col1, col2 = st.columns(2)
+            with col1:
+                categorie = st.selectbox(
+                    "Catégorie:", categories,
+                    index=categories.index('Agriculture') if 'Agriculture' in categories else 0
+                )
+            symboles = [s for s, info in self.commodities.items() if info['categorie'] == categorie]
+            with col2:
+                symbole = st.selectbox("Commodité à décomposer:", symboles)
+            
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                profil = saisonnalite.month_profile()[symboles].T
+                fig = px.imshow(profil, 
+                               text_auto='.1f',
+                               color_continuous_scale='RdYlGn',
+                               color_continuous_midpoint=0,
+                               aspect='auto',
+                               title='Rendement Mensuel Moyen (%)')
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                force = saisonnalite.strength()[symboles].sort_values()
+                fig = px.bar(force.reset_index(), 
+                            x='force_saisonniere', 
+                            y='index',
+                            orientation='h',
+                            title='Force Saisonnière (0-1)',
+                            labels={'force_saisonniere': 'Force', 'index': ''})
+                st.plotly_chart(fig, use_container_width=True)
+            
+            composantes = saisonnalite.components(symbole)
+            fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06,
+                                subplot_titles=('Tendance', 'Saison (%)', 'Résidu (%)'))
+            for i, colonne in enumerate(composantes.columns, start=1):
+                fig.add_trace(go.Scatter(x=composantes.index, y=composantes[colonne], name=colonne), row=i, col=1)
+            fig.update_layout(height=650, showlegend=False, title_text=f"Décomposition de {symbole}")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            profil_jour = saisonnalite.day_of_year_profile()[symboles]
+            fig = px.line(profil_jour, 
+                         title="Rendement Journalier Moyen par Jour de l'Année (%, lissé 15 jours)",
+                         labels={'jour': "Jour de l'année", 'value': 'Rendement (%)', 'variable': 'Symbole'})
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with tab7:
+            # Impact des événements du catalogue, fenêtres avant/après autour de leur début
+            col1, col2 = st.columns(2)
+            with col1:
+                mesure = st.selectbox("Mesure:", list(STUDY_FIELDS), index=6,
+                                      format_func=STUDY_FIELDS.get)
+            with col2:
+                fenetre = st.slider("Fenêtre avant/après (jours):", 10, 90, 30, step=5)
+            etude = self.engine.event_study(fenetre)
+            
+            impact = etude.pivot(index='evenement', columns='symbole', values=mesure)
+            impact = impact.reindex(index=self.engine.event_catalog.labels)
+            fig = px.imshow(impact, 
+                           text_auto='.1f',
+                           color_continuous_scale='RdYlGn',
+                           color_continuous_midpoint=0,
+                           aspect='auto',
+                           title=STUDY_FIELDS[mesure])
+            st.plotly_chart(fig, use_container_width=True)
+            
+            symbole = st.selectbox("Commodité:", list(self.commodities), key='evenement_symbole')
+            prix = self.engine.price_matrix()[symbole]
+            fig = go.Figure(go.Scatter(x=prix.index, y=prix, name=symbole))
+            catalogue = self.engine.event_catalog
+            for label, debut, fin in zip(catalogue.labels, catalogue.starts, catalogue.ends):
+                fig.add_vrect(x0=debut, x1=prix.index[-1] if pd.isna(fin) else fin,
+                              fillcolor='orange', opacity=0.15, line_width=0,
+                              annotation_text=label, annotation_position='top left')
+            fig.update_layout(title=f"{symbole} et périodes d'événements", height=450)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.dataframe(
+                etude[etude['symbole'] == symbole].drop(columns='symbole')
+                .rename(columns=STUDY_FIELDS).set_index('evenement').round(2),
+                use_container_width=True
+            )
+        
+        with tab8:
+            # Courbes à terme par contrat : formes, spreads calendaires et série continue ajustée
+            courbes = self.engine.term_structure()
+            st.dataframe(
+                courbes.summary().rename(columns={
+                    'pente_12m_pct': 'Pente 12 mois (%)',
+                    'rendement_roulement_pct': 'Rendement de roulement (%/an)',
+                    'structure': 'Structure'
+                }).round(2),
+                use_container_width=True
+            )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                symbole = st.selectbox("Commodité:", list(self.commodities), key='courbe_symbole')
+            with col2:
+                recul = st.multiselect("Comparer avec (il y a):", ['1 mois', '6 mois', '1 an', '2 ans'],
+                                       default=['6 mois', '1 an'])
+            
+            fig = go.Figure()
+            for libelle in ['Aujourd\'hui'] + recul:
+                if libelle == 'Aujourd\'hui':
+                    date_courbe = None
+                else:
+                    nombre, unite = libelle.split()
+                    date_courbe = datetime.now() - timedelta(days=int(nombre) * (30 if unite == 'mois' else 365))
+                courbe = courbes.curve(symbole, date_courbe)
+                mois = np.arange(1, len(courbe) + 1)
+                fig.add_trace(go.Scatter(x=mois, y=courbe.to_numpy(), mode='lines+markers', name=libelle,
+                                         text=[d.strftime('%b %Y') for d in courbe.index]))
+            fig.update_layout(title=f"Courbe à terme de {symbole}", xaxis_title="Rang du contrat (mois)",
+                              yaxis_title="Prix", height=450)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                lointain = st.slider("Spread calendaire M1 contre M:", 2, 24, 12)
+                spread = courbes.calendar_spread(symbole, 1, lointain)
+                fig = px.line(spread, title=f"Spread calendaire {spread.name}",
+                              labels={'index': 'Date', 'value': 'Spread'})
+                fig.update_layout(showlegend=False)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                methode = st.radio("Ajustement des roulements:", ['ratio', 'difference'], horizontal=True,
+                                   format_func={'ratio': 'Ratio', 'difference': 'Différence'}.get)
+                continu = courbes.continuous(symbole, method=methode)[['brut', 'ajuste']]
+                fig = px.line(continu.rename(columns={'brut': 'Contrat proche', 'ajuste': 'Continu ajusté'}),
+                              title="Série continue ajustée des roulements",
+                              labels={'date': 'Date', 'value': 'Prix', 'variable': ''})
+                st.plotly_chart(fig, use_container_width=True)
     
     def create_supply_demand_analysis(self):
         """Analyse offre/demande"""
+        import pandas as pd
+        import plotly.express as px
+        
         st.markdown('<h3 class="section-header">⚖️ ANALYSE OFFRE/DEMANDE</h3>', 
                    unsafe_allow_html=True)
         
@@ -644,6 +650,10 @@ class CommodityDashboard:
     
     def create_technical_analysis(self):
         """Analyse technique avancée"""
+        import pandas as pd
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
         st.markdown('<h3 class="section-header">🔬 ANALYSE TECHNIQUE AVANCÉE</h3>', 
                    unsafe_allow_html=True)
         
@@ -654,9 +664,7 @@ class CommodityDashboard:
                                                 list(self.commodities.keys()))
             
             if commodite_selectionnee:
-                commodite_data = self.historical_data[
-                    self.historical_data['symbole'] == commodite_selectionnee
-                ].copy()
+                commodite_data = self.engine.history_frame([commodite_selectionnee]).copy()
                 
                 # Calcul des indicateurs techniques
                 commodite_data['MA20'] = commodite_data['prix'].rolling(window=20).mean()
@@ -745,11 +753,12 @@ class CommodityDashboard:
             st.subheader("Signaux de Trading")
             
             # Génération de signaux simulés
+            rng = self.source.rng('signaux')
             signaux = []
             for symbole in self.commodities.keys():
-                signal_type = random.choice(['ACHAT', 'VENTE', 'NEUTRE'])
-                force = random.randint(60, 95)
-                horizon = random.choice(['Court terme', 'Moyen terme', 'Long terme'])
+                signal_type = rng.choice(['ACHAT', 'VENTE', 'NEUTRE'])
+                force = rng.integers(60, 96)
+                horizon = rng.choice(['Court terme', 'Moyen terme', 'Long terme'])
                 
                 signaux.append({
                     'Commodité': symbole,
@@ -757,7 +766,7 @@ class CommodityDashboard:
                     'Force': f"{force}%",
                     'Horizon': horizon,
                     'Prix Cible': self.current_data[self.current_data['symbole'] == symbole]['prix'].iloc[0] * 
-                                 random.uniform(0.90, 1.10)
+                                 rng.uniform(0.90, 1.10)
                 })
             
             signaux_df = pd.DataFrame(signaux)
@@ -765,23 +774,37 @@ class CommodityDashboard:
     
     def calculate_rsi(self, prices, window=14):
         """Calcule le RSI"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        from commodities.indicators import calculate_rsi
+        return calculate_rsi(prices, window)
     
     def calculate_bollinger_bands(self, prices, window=20, num_std=2):
         """Calcule les bandes de Bollinger"""
-        rolling_mean = prices.rolling(window=window).mean()
-        rolling_std = prices.rolling(window=window).std()
-        upper_band = rolling_mean + (rolling_std * num_std)
-        lower_band = rolling_mean - (rolling_std * num_std)
-        return upper_band, lower_band
+        from commodities.indicators import calculate_bollinger_bands
+        return calculate_bollinger_bands(prices, window, num_std)
+    
+    @staticmethod
+    def session_id():
+        """Identifiant de la session Streamlit (aléatoire hors serveur)"""
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else uuid.uuid4().hex
+    
+    @staticmethod
+    def evict_session_baskets(engine, categories, is_active=None):
+        """Retire du moteur d'indices partagé les paniers des sessions terminées"""
+        if is_active is None:
+            from streamlit import runtime
+            if not runtime.exists():
+                return
+            is_active = runtime.get_instance().is_active_session
+        for cle in list(engine.weights):
+            if cle not in categories and not is_active(cle.partition('/')[0]):
+                engine.remove(cle)
     
     def create_market_analysis(self):
         """Analyse des marchés mondiaux"""
+        from commodities.indices import category_baskets, parse_weights
+        
         st.markdown('<h3 class="section-header">🌍 ANALYSE DES MARCHÉS MONDAUX</h3>', 
                    unsafe_allow_html=True)
         
@@ -790,28 +813,75 @@ class CommodityDashboard:
         with tab1:
             st.subheader("Performances des Indices Mondiaux")
             
+            rng = self.source.rng('indices', self.source.current_tick())
             cols = st.columns(3)
             indices_list = list(self.market_data['indices'].items())
             
             for i, (indice, data) in enumerate(indices_list):
                 with cols[i % 3]:
-                    data['change'] = random.uniform(-2, 2)  # Mise à jour simulée
+                    data['change'] = rng.uniform(-2, 2)  # Mise à jour simulée
                     st.metric(
                         indice,
                         f"{data['valeur']:,.0f}",
                         f"{data['change']:+.2f}%",
                         delta_color="normal"
                     )
+            
+            # Indices de paniers de commodités (base 100 au début de l'historique)
+            st.subheader("Indices Commodités")
+            engine = self.engine.index_engine()
+            
+            # Le moteur est partagé entre les sessions : les paniers sont préfixés par l'identifiant de la session
+            session = st.session_state.setdefault('session_id', self.session_id())
+            paniers = st.session_state.setdefault('paniers', {})
+            with self.engine.lock:
+                self.evict_session_baskets(engine, category_baskets(self.commodities))
+            with st.expander("➕ Panier personnalisé"):
+                nom_panier = st.text_input("Nom du panier:", value="Mon panier")
+                ponderations = st.text_input("Pondérations (SYMBOLE:poids):", value="GOLD:2, COPPER:1, BRENT:1")
+                if st.button("Ajouter le panier"):
+                    try:
+                        paniers[nom_panier] = parse_weights(ponderations)
+                    except ValueError:
+                        st.error("Pondérations invalides")
+                for nom, poids in list(paniers.items()):
+                    cle = f"{session}/{nom}"
+                    with self.engine.lock:
+                        if engine.weights.get(cle) == poids:
+                            continue
+                        try:
+                            engine.define(cle, poids, label=nom)
+                        except ValueError as e:
+                            # Un panier invalide n'est pas conservé : il ne bloque pas les exécutions suivantes
+                            paniers.pop(nom)
+                            st.error(str(e))
+            
+            # Indices de catégories, puis paniers de la session (affichés sans préfixe)
+            affichage = [(nom, nom) for nom in category_baskets(self.commodities)]
+            affichage += [(nom, f"{session}/{nom}") for nom in paniers]
+            with self.engine.lock:
+                niveaux = engine.latest()
+                cloture = engine.previous_close()
+            cols = st.columns(3)
+            for i, (nom, cle) in enumerate(affichage):
+                with cols[i % 3]:
+                    st.metric(
+                        nom,
+                        f"{niveaux[cle]:,.2f}",
+                        f"{(niveaux[cle] / cloture[cle] - 1) * 100:+.2f}%",
+                        delta_color="normal"
+                    )
         
         with tab2:
             st.subheader("Taux de Change")
             
+            rng = self.source.rng('devises', self.source.current_tick())
             cols = st.columns(2)
             devises_list = list(self.market_data['devises'].items())
             
             for i, (devise, data) in enumerate(devises_list):
                 with cols[i % 2]:
-                    data['change'] = random.uniform(-0.8, 0.8)
+                    data['change'] = rng.uniform(-0.8, 0.8)
                     st.metric(
                         devise,
                         f"{data['valeur']:.4f}",
@@ -863,6 +933,8 @@ class CommodityDashboard:
     
     def create_risk_analysis(self):
         """Analyse des risques"""
+        import pandas as pd
+        
         st.markdown('<h3 class="section-header">⚠️ ANALYSE DES RISQUES</h3>', 
                    unsafe_allow_html=True)
         
@@ -871,9 +943,10 @@ class CommodityDashboard:
         with tab1:
             st.subheader("Évaluation des Risques par Commodité")
             
+            rng = self.source.rng('risques')
             risk_data = []
             for symbole, info in self.commodities.items():
-                risk_score = random.randint(25, 85)
+                risk_score = rng.integers(25, 86)
                 risk_level = "FAIBLE" if risk_score < 40 else "MOYEN" if risk_score < 70 else "ÉLEVÉ"
                 
                 risk_data.append({
@@ -881,9 +954,9 @@ class CommodityDashboard:
                     'Symbole': symbole,
                     'Score Risque': risk_score,
                     'Niveau': risk_level,
-                    'Risque Géopolitique': random.randint(20, 90),
-                    'Risque Climatique': random.randint(15, 80),
-                    'Risque de Demande': random.randint(25, 75)
+                    'Risque Géopolitique': rng.integers(20, 91),
+                    'Risque Climatique': rng.integers(15, 81),
+                    'Risque de Demande': rng.integers(25, 76)
                 })
             
             risk_df = pd.DataFrame(risk_data)
@@ -935,6 +1008,8 @@ class CommodityDashboard:
         with tab3:
             st.subheader("Stratégies de Couverture")
             
+            self.display_portfolio()
+            
             st.markdown("""
             ### 🛡️ Instruments de Couverture
             
@@ -961,8 +1036,76 @@ class CommodityDashboard:
             - Arbitrage géographique
             """)
     
+    def display_portfolio(self):
+        """Portefeuille de la session : valorisation, PnL par catégorie, VaR et couvertures proposées"""
+        import pandas as pd
+        import plotly.express as px
+        from commodities.portfolio import CONTRACT_MULTIPLIERS, Portfolio
+        
+        st.markdown("### 💼 Portefeuille et couvertures")
+        
+        # Positions par défaut : prix d'entrée à la dernière clôture
+        if 'positions' not in st.session_state:
+            last_close = self.engine.price_matrix().iloc[-1]
+            st.session_state['positions'] = pd.DataFrame({
+                'Symbole': ['BRENT', 'GOLD', 'COPPER', 'CORN'],
+                'Contrats': [10.0, 5.0, -4.0, 20.0],
+                "Prix d'entrée": [float(last_close[s]) for s in ['BRENT', 'GOLD', 'COPPER', 'CORN']]
+            })
+        
+        positions = st.data_editor(
+            st.session_state['positions'],
+            num_rows='dynamic',
+            use_container_width=True,
+            column_config={
+                'Symbole': st.column_config.SelectboxColumn(options=list(self.commodities), required=True),
+                'Contrats': st.column_config.NumberColumn(help="Contrats futures (négatif: vente)"),
+            },
+            key='editeur_positions'
+        ).dropna()
+        
+        book = Portfolio(self.commodities, CONTRACT_MULTIPLIERS)
+        book.add_many(list(positions['Symbole']), positions['Contrats'], positions["Prix d'entrée"])
+        
+        # Valorisation du livre sur le dernier tick
+        prices = self.current_data.set_index('symbole')['prix'].reindex(book.symbols).to_numpy(dtype=float)
+        pnl = book.mark(prices)
+        covariance = self.engine.covariance()
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Valeur nette", f"{book.value:,.0f} USD")
+        col2.metric("PnL latent", f"{pnl:,.0f} USD")
+        col3.metric("VaR 99% 1 jour", f"{book.var(covariance):,.0f} USD")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            par_categorie = pd.DataFrame({
+                'PnL': book.pnl_by_category(),
+                'Contribution VaR': book.var_by_category(covariance)
+            }).rename_axis('Catégorie').reset_index()
+            fig = px.bar(par_categorie, x='Catégorie', y=['PnL', 'Contribution VaR'], barmode='group',
+                         title="PnL et VaR par catégorie (USD)")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            couvertures = book.hedges(covariance).head(5)
+            st.markdown("**Couverture à variance minimale (un instrument)**")
+            st.dataframe(
+                couvertures.rename(columns={
+                    'notionnel_a_vendre': 'Notionnel à vendre (USD)',
+                    'contrats_a_vendre': 'Contrats à vendre',
+                    'var_residuelle': 'VaR résiduelle 99%'
+                }).style.format('{:,.1f}'),
+                use_container_width=True
+            )
+    
     def create_sidebar(self):
         """Crée la sidebar avec les contrôles"""
+        import numpy as np
+        from commodities.anomalies import KINDS
+        from commodities.schema import memory_report, with_metadata
+        from commodities.volatility import ANNUALIZATION
+        
         st.sidebar.markdown("## 🎛️ CONTRÔLES D'ANALYSE")
         
         # Catégories à afficher
@@ -986,6 +1129,10 @@ class CommodityDashboard:
         auto_refresh = st.sidebar.checkbox("Rafraîchissement automatique", value=True)
         show_advanced = st.sidebar.checkbox("Indicateurs avancés", value=True)
         alert_threshold = st.sidebar.slider("Seuil d'alerte (%)", 1.0, 10.0, 3.0)
+        alert_in_sigma = st.sidebar.checkbox(
+            "Seuil en écarts-types (volatilité EWMA)", value=False,
+            help="Compare la variation du jour à la volatilité journalière EWMA de chaque commodité"
+        )
         
         # Bouton de rafraîchissement
         if st.sidebar.button("🔄 Rafraîchir les données"):
@@ -996,27 +1143,52 @@ class CommodityDashboard:
         st.sidebar.markdown("---")
         st.sidebar.markdown("### 🔔 ALERTES EN TEMPS RÉEL")
         
-        for _, commodity in self.current_data.iterrows():
-            if abs(commodity['change_pct']) > alert_threshold:
+        # Variation du jour rapportée à la volatilité journalière EWMA (barre en cours incluse)
+        vol_jour = self.engine.live_volatility()['ewma'] / np.sqrt(ANNUALIZATION)
+        for _, commodity in with_metadata(self.current_data, self.metadata, ['icone']).iterrows():
+            sigmas = abs(commodity['change_pct']) / vol_jour[str(commodity['symbole'])]
+            if (sigmas if alert_in_sigma else abs(commodity['change_pct'])) > alert_threshold:
                 alert_type = "warning" if commodity['change_pct'] > 0 else "error"
                 if alert_type == "warning":
                     st.sidebar.warning(
                         f"{commodity['icone']} {commodity['symbole']}: "
-                        f"{commodity['change_pct']:+.2f}%"
+                        f"{commodity['change_pct']:+.2f}% ({sigmas:.1f}σ)"
                     )
                 else:
                     st.sidebar.error(
                         f"{commodity['icone']} {commodity['symbole']}: "
-                        f"{commodity['change_pct']:+.2f}%"
+                        f"{commodity['change_pct']:+.2f}% ({sigmas:.1f}σ)"
                     )
         
+        # Anomalies détectées sur les ticks (z-score, volume, CUSUM)
+        with self.engine.lock:
+            anomalies = self.engine.anomalies.recent()
+            total_anomalies = self.engine.anomalies.total_events
+        if not anomalies.empty:
+            st.sidebar.markdown(f"**Anomalies détectées:** {total_anomalies}")
+            for _, anomalie in anomalies.tail(5).iloc[::-1].iterrows():
+                st.sidebar.info(
+                    f"{anomalie['horodatage']:%H:%M:%S} {anomalie['symbole']}: "
+                    f"{KINDS[anomalie['type']]} ({anomalie['score']:+.1f})"
+                )
+        
+        # Empreinte mémoire des données
+        with st.sidebar.expander("💾 Mémoire des données"):
+            report = memory_report(self.memory_stats)
+            for table, row in report.iterrows():
+                st.markdown(
+                    f"**{table}:** {row['avant'] / 1e6:.2f} Mo → {row['apres'] / 1e6:.2f} Mo "
+                    f"(÷{row['reduction']:.1f})"
+                )
+        
         return {
             'categories_selectionnees': categories_selectionnees,
             'date_debut': date_debut,
             'date_fin': date_fin,
             'auto_refresh': auto_refresh,
             'show_advanced': show_advanced,
-            'alert_threshold': alert_threshold
+            'alert_threshold': alert_threshold,
+            'alert_in_sigma': alert_in_sigma
         }
 
     def run_dashboard(self):
@@ -1029,14 +1201,20 @@ class CommodityDashboard:
         
         # Header
         self.display_header()
+        current_time = datetime.now().strftime('%H:%M:%S')
+        st.sidebar.markdown(f"**🕐 Dernière mise à jour: {current_time}**")
         
         # Cartes de commodités
         self.display_commodity_cards()
         
+        # Temps jusqu'au premier affichage utile (en-tête et cartes), mesuré une fois par session
+        premier_affichage = st.session_state.setdefault('premier_affichage', time.perf_counter() - SCRIPT_STARTED)
+        st.sidebar.caption(f"⏱️ Premier affichage: {premier_affichage:.2f} s")
+        
         # Métriques clés
         self.display_key_metrics()
         
-        # Navigation par onglets
+        # Navigation par onglets : seul l'onglet ouvert est calculé (et importe plotly à sa première ouverture)
         tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
             "📈 Vue d'Ensemble", 
             "⚖️ Offre/Demande", 
@@ -1044,22 +1222,27 @@ class CommodityDashboard:
             "🌍 Marchés", 
             "⚠️ Risques", 
             "💡 Insights"
-        ])
+        ], key='onglet', on_change='rerun')
         
-        with tab1:
-            self.create_price_overview()
+        if tab1.open:
+            with tab1:
+                self.create_price_overview()
         
-        with tab2:
-            self.create_supply_demand_analysis()
+        if tab2.open:
+            with tab2:
+                self.create_supply_demand_analysis()
         
-        with tab3:
-            self.create_technical_analysis()
+        if tab3.open:
+            with tab3:
+                self.create_technical_analysis()
         
-        with tab4:
-            self.create_market_analysis()
+        if tab4.open:
+            with tab4:
+                self.create_market_analysis()
         
-        with tab5:
-            self.create_risk_analysis()
+        if tab5.open:
+            with tab5:
+                self.create_risk_analysis()
         
         with tab6:
             st.markdown("## 💡 INSIGHTS STRATÉGIQUES")
@@ -1128,12 +1311,147 @@ class CommodityDashboard:
             6. **Horizon:** Adapter la stratégie à l'horizon de placement (court/moyen/long terme)
             """)
         
-        # Rafraîchissement automatique
-        if controls['auto_refresh']:
-            time.sleep(10)  # Rafraîchissement toutes les 10 secondes
+        # Rafraîchissement automatique (COMMODITIES_REFRESH=0 le désactive, ex. pilotage par un test de charge)
+        intervalle = float(os.environ.get('COMMODITIES_REFRESH', 10))
+        if controls['auto_refresh'] and intervalle > 0:
+            time.sleep(intervalle)  # Rafraîchissement toutes les 10 secondes par défaut
             st.rerun()
 
+class EngineLoader:
+    """Construit le moteur dans un thread pour afficher l'en-tête avant la fin du chargement"""
+    
+    def __init__(self, feed_address=None, history_dir=None, snapshot_dir=None, shared_address=None,
+                 anomaly_log=None):
+        self.feed_address = feed_address
+        self.anomaly_log = anomaly_log
+        self.shared_address = shared_address
+        self.history_dir = history_dir
+        self.snapshot_dir = snapshot_dir
+        self.snapshotter = None
+        self.notice = None
+        self.fraction = 0.0
+        self.label = "Import des modules"
+        self.engine = None
+        self.error = None
+        self.duration = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._build, name='engine-loader', daemon=True)
+        self.thread.start()
+    
+    def _progress(self, fraction, label):
+        self.fraction, self.label = fraction, label
+    
+    def _build(self):
+        started = time.perf_counter()
+        try:
+            source = None
+            # COMMODITIES_FEED=127.0.0.1:8765 remplace la simulation par le flux de ticks local
+            if self.feed_address:
+                from commodities.tick_feed import TickFeedSource
+                host, port = self.feed_address.rsplit(':', 1)
+                source = TickFeedSource(host, int(port))
+            if self.shared_address:
+                self._build_shared()
+            elif self.snapshot_dir:
+                self._build_from_snapshot(source)
+            else:
+                self._build_engine(source)
+            # COMMODITIES_ANOMALY_LOG=/chemin.csv : journal des anomalies détectées sur les ticks
+            if self.anomaly_log:
+                self.engine.anomalies.open_log(self.anomaly_log)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.duration = time.perf_counter() - started
+            self.ready.set()
+    
+    def _build_engine(self, source):
+        from commodities.engine import MarketEngine
+        from commodities.history_store import HistoryStore
+        
+        # COMMODITIES_HISTORY_DIR=/chemin lit l'historique depuis des fichiers .npy mappés en mémoire
+        history_store = None
+        if self.history_dir:
+            if not os.path.exists(self.history_dir):
+                self._progress(0.05, "Construction de l'historique sur disque")
+                HistoryStore.write(self.history_dir, MarketEngine(source).historical_data)
+            history_store = HistoryStore(self.history_dir)
+        self.engine = MarketEngine(source, history_store, progress=self._progress)
+    
+    def _build_shared(self):
+        # COMMODITIES_SHARED=127.0.0.1:8766 : historique et état lus dans la mémoire partagée du processus moteur
+        from commodities.shared_state import shared_engine
+        
+        if self.history_dir or self.snapshot_dir:
+            self.notice = ("COMMODITIES_HISTORY_DIR et COMMODITIES_SNAPSHOT_DIR sont ignorés : l'historique "
+                           "est publié par le processus moteur (COMMODITIES_SHARED)")
+        host, port = self.shared_address.rsplit(':', 1)
+        self.engine = shared_engine(host, int(port), progress=self._progress)
+    
+    def _build_from_snapshot(self, source):
+        # COMMODITIES_SNAPSHOT_DIR=/chemin : redémarrage à chaud puis instantanés périodiques
+        from commodities.engine import MarketEngine
+        from commodities.snapshot import Snapshotter, has_snapshot, load_snapshot
+        
+        if self.history_dir:
+            # L'historique de l'instantané (HISTORY_DIR sous le répertoire d'instantané) est le seul lu
+            self.notice = ("COMMODITIES_HISTORY_DIR est ignoré : l'historique est lu dans l'instantané "
+                           f"({os.path.join(self.snapshot_dir, 'history')})")
+        history_version = None
+        if has_snapshot(self.snapshot_dir):
+            self._progress(0.3, "Restauration de l'instantané")
+            self.engine = load_snapshot(self.snapshot_dir, source)
+            history_version = self.engine.history_version
+        else:
+            self.engine = MarketEngine(source, progress=self._progress)
+        self.snapshotter = Snapshotter(self.engine, self.snapshot_dir, history_version=history_version).start()
+        atexit.register(self.snapshotter.stop)
+    
+    def wait(self, on_progress=None, interval=0.1):
+        """Attend la fin du chargement en signalant l'avancement"""
+        while not self.ready.wait(interval):
+            if on_progress is not None:
+                on_progress(self.fraction, self.label)
+
+@st.cache_resource
+def get_engine_loader(feed_address, history_dir, snapshot_dir, shared_address, anomaly_log):
+    """Moteur unique par processus, partagé entre les sessions et conservé entre les réexécutions"""
+    return EngineLoader(feed_address, history_dir, snapshot_dir, shared_address, anomaly_log)
+
+def snapshot_cards(snapshot_dir):
+    """Cartes du dernier instantané sur disque : la première session d'un processus les voit pendant le chargement"""
+    from commodities.catalog import COMMODITIES
+    from commodities.schema import metadata_table
+    from commodities.snapshot import has_snapshot, read_current
+    
+    if not snapshot_dir or not has_snapshot(snapshot_dir):
+        return None
+    html, _ = CommodityDashboard.render_commodity_cards(read_current(snapshot_dir), metadata_table(COMMODITIES))
+    return html
+
+def show_loading_screen(loader):
+    """En-tête, dernières cartes connues (session, sinon instantané sur disque) et progression du chargement"""
+    screen = st.empty()
+    with screen.container():
+        CommodityDashboard.display_header()
+        cards = st.session_state.get('commodity_cards_html') or snapshot_cards(loader.snapshot_dir)
+        if cards:
+            st.markdown(cards, unsafe_allow_html=True)
+        bar = st.progress(loader.fraction, text=loader.label)
+    loader.wait(lambda fraction, label: bar.progress(fraction, text=label))
+    screen.empty()
+
 # Lancement du dashboard
 if __name__ == "__main__":
-    dashboard = CommodityDashboard()
-    dashboard.run_dashboard()
\ No newline at end of file
+    loader = get_engine_loader(os.environ.get('COMMODITIES_FEED'), os.environ.get('COMMODITIES_HISTORY_DIR'),
+                               os.environ.get('COMMODITIES_SNAPSHOT_DIR'), os.environ.get('COMMODITIES_SHARED'),
+                               os.environ.get('COMMODITIES_ANOMALY_LOG'))
+    if not loader.ready.is_set():
+        show_loading_screen(loader)
+    if loader.error is not None:
+        get_engine_loader.clear()  # nouvel essai à la prochaine exécution
+        raise loader.error
+    if loader.notice:
+        st.sidebar.warning(loader.notice)
+    dashboard = CommodityDashboard(engine=loader.engine)
+    dashboard.run_dashboard()
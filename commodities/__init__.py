@@ -0,0 +1,5 @@
+"""Moteur de données du Dashboard Commodities (sources, stockage, analyses)"""
+from .catalog import COMMODITIES
+from .data_sources import DataSource, SimulatedMarketSource, YahooFinanceSource
+
+__all__ = ['COMMODITIES', 'DataSource', 'SimulatedMarketSource', 'YahooFinanceSource']
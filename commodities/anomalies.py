@@ -0,0 +1,214 @@
+# commodities/anomalies.py
+"""Détection d'anomalies sur les ticks : z-score glissant, pic de volume et rupture CUSUM, en O(1) par tick
+
+    python -m commodities.anomalies --ticks 200000
+"""
+import argparse
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ZSCORE_WINDOW = 100
+ZSCORE_THRESHOLD = 4.0
+VOLUME_THRESHOLD = 4.0
+MIN_TICKS = 20
+CUSUM_DRIFT = 0.5
+CUSUM_THRESHOLD = 8.0
+MAX_EVENTS = 1000
+KINDS = {
+    'zscore': 'Rendement extrême',
+    'volume': 'Pic de volume',
+    'cusum': 'Rupture (CUSUM)',
+}
+LOG_COLUMNS = ('horodatage', 'symbole', 'type', 'prix', 'volume_jour', 'score')
+
+
+class AnomalyDetector:
+    """État par symbole en tableaux : fenêtre circulaire des variations de prix et de volume, sommes CUSUM"""
+
+    def __init__(self, symbols, window=ZSCORE_WINDOW, threshold=ZSCORE_THRESHOLD, volume_threshold=VOLUME_THRESHOLD,
+                 drift=CUSUM_DRIFT, cusum_threshold=CUSUM_THRESHOLD, min_ticks=MIN_TICKS, max_events=MAX_EVENTS):
+        self.symbols = list(symbols)
+        k = len(self.symbols)
+        self.window = window
+        self.threshold = threshold
+        self.volume_threshold = volume_threshold
+        self.drift = drift
+        self.cusum_threshold = cusum_threshold
+        self.min_ticks = min_ticks
+
+        # Fenêtre glissante des log-variations (prix, volume_jour) : la valeur sortante est retranchée des sommes.
+        # Chaque symbole avance à son rythme : seuls les symboles cotés entrent dans la fenêtre
+        self._changes = np.zeros((window * k, 2))
+        self._position = np.zeros(k, dtype=int)
+        self._columns = np.arange(k)
+        self.count = np.zeros(k, dtype=int)
+        self.sum = np.zeros((2, k))
+        self.sum_squares = np.zeros((2, k))
+        self.last = np.full((2, k), np.nan)
+        self.cusum_high = np.zeros(k)
+        self.cusum_low = np.zeros(k)
+        self.scores = np.zeros((len(KINDS), k))
+
+        self.events = deque(maxlen=max_events)
+        self.total_events = 0
+        self._log = None
+
+    def __getstate__(self):
+        # Le journal ouvert n'est pas persisté avec l'état (instantanés)
+        state = self.__dict__.copy()
+        state['_log'] = None
+        return state
+
+    def open_log(self, path):
+        """Journal des anomalies en ajout seul (CSV), en-tête écrit à la création"""
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._log = open(path, 'a', encoding='utf-8', buffering=1)
+        if new:
+            self._log.write(','.join(LOG_COLUMNS) + '\n')
+        return self
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def update(self, prices, volumes, ticks=1, quoted=None):
+        """Traite une cotation pour tous les symboles ; retourne les drapeaux (types × symboles)
+
+        `ticks` (commun ou par symbole) compte les ticks écoulés depuis la cotation précédente : les variations
+        sont ramenées à un tick en divisant par √ticks. Les symboles hors de `quoted` gardent leur état.
+        """
+        current = np.log(np.array((prices, volumes), dtype=float))
+        change = current - self.last
+        if not np.isscalar(ticks) or ticks != 1:
+            change /= np.sqrt(ticks)
+        if quoted is None:
+            self.last = current
+            self.count += 1
+        else:
+            quoted = np.asarray(quoted, dtype=bool)
+            self.last = np.where(quoted, current, self.last)
+            self.count += quoted
+        # Symboles cotés ayant déjà une cotation de référence ; les autres gardent leur état
+        active = self.count > 1 if quoted is None else quoted & (self.count > 1)
+        partial = not active.all()
+        if partial:
+            if not active.any():
+                return np.zeros(self.scores.shape, dtype=bool)
+            change = np.where(active, change, 0.0)
+
+        # Z-scores des variations de prix et de volume contre la fenêtre précédente du symbole
+        n = np.maximum(np.minimum(self.count - 2, self.window), 1)
+        mean = self.sum / n
+        std = np.sqrt(np.maximum(self.sum_squares / n - mean * mean, 0.0))
+        # Une série restée constante sur la fenêtre n'a pas de dispersion de référence : pas de score
+        z = np.divide(change - mean, std, out=np.zeros_like(std), where=std > 1e-12)
+
+        # Fenêtre circulaire par symbole (ligne position × symboles + symbole) : la valeur sortante est retranchée
+        rows = self._position * len(self.symbols) + self._columns
+        old = self._changes[rows].T
+        if partial:
+            self.scores[:2, active] = z[:, active]
+            change = np.where(active, change, old)
+        else:
+            self.scores[:2] = z
+        self.sum += change - old
+        self.sum_squares += change * change - old * old
+        self._changes[rows] = change.T
+        self._position += active
+        self._position %= self.window
+
+        # Pas de détection tant que la fenêtre ne suffit pas à estimer la dispersion
+        ready = active & (self.count - 2 >= self.min_ticks)
+        if not ready.any():
+            return np.zeros(self.scores.shape, dtype=bool)
+
+        # CUSUM bilatéral sur les rendements standardisés (symboles prêts seulement)
+        high = np.maximum(self.cusum_high + z[0] - self.drift, 0.0)
+        low = np.maximum(self.cusum_low - z[0] - self.drift, 0.0)
+        if ready.all():
+            z = z[0]
+            self.cusum_high, self.cusum_low = high, low
+            self.scores[2] = high - low
+        else:
+            z = np.where(ready, z[0], 0.0)
+            self.cusum_high = np.where(ready, high, self.cusum_high)
+            self.cusum_low = np.where(ready, low, self.cusum_low)
+            self.scores[2, ready] = (high - low)[ready]
+
+        flags = np.empty(self.scores.shape, dtype=bool)
+        np.greater(np.abs(z), self.threshold, out=flags[0])
+        np.greater(self.scores[1], self.volume_threshold, out=flags[1])
+        np.greater(np.maximum(self.cusum_high, self.cusum_low), self.cusum_threshold, out=flags[2])
+        flags &= ready
+        if flags.any():
+            # Une rupture signalée repart de zéro
+            self.cusum_high[flags[2]] = 0.0
+            self.cusum_low[flags[2]] = 0.0
+            self._record(flags, prices, volumes)
+        return flags
+
+    def _record(self, flags, prices, volumes):
+        horodatage = datetime.now()
+        kinds = list(KINDS)
+        for i, j in zip(*np.nonzero(flags)):
+            event = (horodatage, self.symbols[j], kinds[i], float(prices[j]), float(volumes[j]),
+                     float(self.scores[i, j]))
+            self.events.append(event)
+            if self._log is not None:
+                self._log.write(f"{horodatage.isoformat()},{event[1]},{event[2]},{event[3]:.6g},"
+                                f"{event[4]:.6g},{event[5]:.4g}\n")
+        self.total_events += int(flags.sum())
+
+    def recent(self, symbols=None):
+        """Anomalies récentes en mémoire, les plus récentes en dernier"""
+        events = pd.DataFrame(list(self.events), columns=list(LOG_COLUMNS))
+        if symbols is not None:
+            events = events[events['symbole'].isin(symbols)]
+        return events
+
+
+def read_log(path):
+    """Relit un journal d'anomalies"""
+    return pd.read_csv(path, parse_dates=['horodatage'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Débit du détecteur d'anomalies sur des ticks simulés")
+    parser.add_argument('--ticks', type=int, default=200_000)
+    parser.add_argument('--log', default=None, help="Journal des anomalies (aucun par défaut)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from .catalog import COMMODITIES
+    from .data_sources import SimulatedMarketSource
+
+    source = SimulatedMarketSource(seed=args.seed)
+    symbols = list(COMMODITIES)
+    infos = [COMMODITIES[s] for s in symbols]
+    log_returns, volume_changes = source.ticks(0, args.ticks, [info['volatilite'] for info in infos],
+                                               [info['categorie'] for info in infos])
+    prices = np.array([info['prix_base'] for info in infos]) * np.exp(np.cumsum(log_returns, axis=0))
+    volumes = 1e6 * np.exp(np.cumsum(volume_changes, axis=0))
+
+    detector = AnomalyDetector(symbols)
+    if args.log:
+        detector.open_log(args.log)
+    started = time.perf_counter()
+    for price, volume in zip(prices, volumes):
+        detector.update(price, volume)
+    elapsed = time.perf_counter() - started
+    detector.close()
+    counts = detector.recent()['type'].value_counts().to_dict() if detector.events else {}
+    print(f"{args.ticks} pas × {len(symbols)} symboles en {elapsed:.2f}s : "
+          f"{args.ticks * len(symbols) / elapsed:,.0f} ticks/s ({args.ticks / elapsed:,.0f} pas/s), "
+          f"{detector.total_events} anomalies (dernières: {counts})")
+
+
+if __name__ == '__main__':
+    main()
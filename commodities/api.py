@@ -0,0 +1,330 @@
+# commodities/api.py
+"""API HTTP de requêtes sur le moteur de données (JSON, NDJSON, CSV ou Arrow)
+
+    python -m commodities.api --port 8000
+    curl 'http://127.0.0.1:8000/history?symbols=BRENT,GOLD&start=2024-01-01&format=arrow'
+    curl -X POST http://127.0.0.1:8000/query -d '{"queries": [{"type": "risk", "symbols": ["GOLD"]}]}'
+"""
+import argparse
+import io
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .engine import INDICATORS, MarketEngine
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_MAX_ENTRY = 8 * 1024 * 1024
+AGGREGATIONS = ('mean', 'median', 'min', 'max', 'sum', 'std', 'first', 'last', 'count')
+GROUPINGS = ('categorie', 'symbole')
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def _list(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    return list(value)
+
+
+def _check(values, allowed, label):
+    unknown = [v for v in values if v not in allowed]
+    if unknown:
+        raise ValueError(f"{label} inconnu(e)s: {', '.join(map(str, unknown))}")
+
+
+def _date(value, label):
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Date de {label} invalide: {value}") from None
+
+
+def validate(engine, kind, params):
+    """Contrôle tous les paramètres avant le premier octet de réponse : une erreur reste un 400"""
+    if kind not in QUERIES:
+        raise ValueError(f"Requête inconnue: {kind}")
+    _check(_list(params.get('symbols')) or [], engine.commodities, 'Symboles')
+    _date(params.get('start'), 'début')
+    _date(params.get('end'), 'fin')
+    fields = engine.history_fields()
+    if kind == 'history':
+        _check(_list(params.get('fields')) or [], [*fields, 'nom', 'categorie'], 'Champs')
+    elif kind == 'indicators':
+        _check(_list(params.get('names')) or [], INDICATORS, 'Indicateurs')
+    elif kind == 'aggregate':
+        _check([params.get('by', 'categorie')], GROUPINGS, 'Regroupements')
+        _check([params.get('field', 'prix')], fields, 'Champs')
+        _check([params.get('how', 'mean')], AGGREGATIONS, 'Agrégations')
+        try:
+            pd.tseries.frequencies.to_offset(params.get('freq', 'ME'))
+        except (ValueError, TypeError):
+            raise ValueError(f"Fréquence invalide: {params.get('freq')}") from None
+
+
+def run_query(engine, kind, params):
+    """Valide une requête puis retourne ses résultats par morceaux (un par symbole si possible)"""
+    validate(engine, kind, params)
+    symbols = _list(params.get('symbols')) or list(engine.commodities)
+    return _locked(engine, QUERIES[kind](engine, symbols, params.get('start'), params.get('end'), params))
+
+
+def _locked(engine, chunks):
+    """Calcule chaque morceau sous le verrou du moteur, l'envoi au client se fait hors verrou"""
+    while True:
+        with engine.lock:
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def parse_batch(body):
+    """Requêtes d'un POST /query : {"queries": [{"type": ..., ...}, ...]}"""
+    request = json.loads(body or b'{}')
+    if not isinstance(request, dict):
+        raise ValueError("Le corps doit être un objet JSON")
+    queries = request.get('queries', [])
+    if not isinstance(queries, list) or not all(isinstance(query, dict) for query in queries):
+        raise ValueError("'queries' doit être une liste d'objets")
+    return queries
+
+
+def _history(engine, symbols, start, end, params):
+    fields = tuple(_list(params.get('fields')) or ['prix'])
+    for symbole in symbols:
+        yield engine.history([symbole], start, end, fields)
+
+
+def _indicators(engine, symbols, start, end, params):
+    names = tuple(_list(params.get('names')) or INDICATORS)
+    for symbole in symbols:
+        yield engine.indicators([symbole], start, end, names)
+
+
+def _risk(engine, symbols, start, end, params):
+    yield engine.risk(symbols, start, end)
+
+
+def _aggregate(engine, symbols, start, end, params):
+    yield engine.aggregate(symbols, start, end, by=params.get('by', 'categorie'),
+                           freq=params.get('freq', 'ME'), field=params.get('field', 'prix'),
+                           how=params.get('how', 'mean'))
+
+
+def _live(engine, symbols, start, end, params):
+    engine.update_live_data()
+    live = engine.live()
+    yield live[live['symbole'].isin(symbols)]
+
+
+def _symbols(engine, symbols, start, end, params):
+    yield engine.symbols().reset_index()
+
+
+QUERIES = {
+    'history': _history,
+    'indicators': _indicators,
+    'risk': _risk,
+    'aggregate': _aggregate,
+    'live': _live,
+    'symbols': _symbols,
+}
+
+
+def encode_chunks(chunks, fmt):
+    """Sérialise un flux de DataFrames sans attendre la fin du calcul"""
+    if fmt == 'arrow':
+        import pyarrow as pa
+
+        writer, sink = None, io.BytesIO()
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, table.schema)
+            writer.write_table(table)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+        if writer is not None:
+            writer.close()
+            yield sink.getvalue()
+    elif fmt == 'csv':
+        header = True
+        for chunk in chunks:
+            yield chunk.to_csv(index=False, header=header).encode()
+            header = False
+    elif fmt == 'ndjson':
+        for chunk in chunks:
+            yield chunk.to_json(orient='records', lines=True, date_format='iso', force_ascii=False).encode()
+    else:
+        # Le crochet ouvrant part avec le premier morceau calculé : une requête qui échoue n'a encore rien envoyé
+        first = True
+        for chunk in chunks:
+            records = chunk.to_json(orient='records', date_format='iso', force_ascii=False)[1:-1]
+            if records:
+                yield ('[' if first else ',').encode() + records.encode()
+                first = False
+        yield b'[]' if first else b']'
+
+
+class ResponseCache:
+    """Cache LRU des réponses sérialisées, borné en octets, partagé par les threads du serveur"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_entry=CACHE_MAX_ENTRY):
+        self.max_bytes = max_bytes
+        self.max_entry = max_entry
+        self.size = 0
+        self.hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            if len(body) > self.max_entry or key in self._entries:
+                return
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.size -= len(old)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    engine = None
+    cache = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_error(self, status, message):
+        body = json.dumps({'erreur': message}, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond(self, kind, params):
+        fmt = params.get('format', 'json')
+        if fmt not in CONTENT_TYPES:
+            return self._send_error(400, f"Format inconnu: {fmt}")
+        key = None
+        if kind != 'live':
+            key = (kind, fmt, json.dumps(params, sort_keys=True), self.engine.history_version)
+            body = self.cache.get(key)
+            if body is not None:
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPES[fmt])
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-Cache', 'HIT')
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+        try:
+            parts = encode_chunks(run_query(self.engine, kind, params), fmt)
+            first = next(parts)
+        except (ValueError, KeyError) as e:
+            return self._send_error(400, str(e))
+
+        # Réponse en transfert fragmenté : les gros résultats partent au fil du calcul
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[fmt])
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('X-Cache', 'MISS')
+        self.end_headers()
+        collected, size = [], 0
+        try:
+            for part in itertools.chain([first], parts):
+                if not part:
+                    continue
+                self.wfile.write(f'{len(part):X}\r\n'.encode() + part + b'\r\n')
+                if key is not None and size <= self.cache.max_entry:
+                    collected.append(part)
+                    size += len(part)
+        except Exception:
+            # Statut déjà envoyé : la connexion est coupée sans fragment final, le client voit une réponse tronquée
+            self.close_connection = True
+            return
+        self.wfile.write(b'0\r\n\r\n')
+        if key is not None and size <= self.cache.max_entry:
+            self.cache.put(key, b''.join(collected))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self._respond(url.path.strip('/') or 'symbols', params)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.strip('/') != 'query':
+            return self._send_error(404, "Seule la route /query accepte POST")
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            queries = parse_batch(self.rfile.read(length))
+            results = []
+            for query in queries:
+                params = {k: v for k, v in query.items() if k != 'type'}
+                frames = list(run_query(self.engine, query.get('type', 'history'), params))
+                frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                results.append(json.loads(frame.to_json(orient='records', date_format='iso')))
+        except (ValueError, KeyError) as e:
+            return self._send_error(400, str(e))
+        body = json.dumps({'resultats': results}, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(engine=None, host=DEFAULT_HOST, port=DEFAULT_PORT, cache=None):
+    """Serveur HTTP multithread adossé à un moteur partagé"""
+    handler = type('Handler', (QueryHandler,), {
+        'engine': engine or MarketEngine(),
+        'cache': cache or ResponseCache(),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API de requêtes du Dashboard Commodities")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = create_server(host=args.host, port=args.port)
+    print(f"API disponible sur http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
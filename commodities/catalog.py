@@ -0,0 +1,122 @@
+# commodities/catalog.py
+"""Catalogue des commodités suivies par le dashboard"""
+
+COMMODITIES = {
+    'BRENT': {
+        'nom': 'Pétrole Brent',
+        'symbole': 'BRENT',
+        'icone': '🛢️',
+        'categorie': 'Énergie',
+        'unite': 'USD/baril',
+        'prix_base': 85.0,
+        'volatilite': 2.5,
+        'production_mondiale': 82.0,  # millions barils/jour
+        'reserves': 1500.0,  # milliards barils
+        'pays_producteurs': ['Arabie Saoudite', 'Russie', 'USA', 'Irak'],
+        'description': 'Référence mondiale du pétrole brut'
+    },
+    'WTI': {
+        'nom': 'Pétrole WTI',
+        'symbole': 'WTI',
+        'icone': '⛽',
+        'categorie': 'Énergie',
+        'unite': 'USD/baril',
+        'prix_base': 82.5,
+        'volatilite': 2.8,
+        'production_mondiale': 78.0,
+        'reserves': 500.0,
+        'pays_producteurs': ['USA', 'Canada', 'Mexique'],
+        'description': 'Pétrole américain de référence'
+    },
+    'GOLD': {
+        'nom': 'Or',
+        'symbole': 'GOLD',
+        'icone': '🥇',
+        'categorie': 'Métaux Précieux',
+        'unite': 'USD/once',
+        'prix_base': 1950.0,
+        'volatilite': 1.2,
+        'production_mondiale': 3500.0,  # tonnes/an
+        'reserves': 54000.0,
+        'pays_producteurs': ['Chine', 'Australie', 'Russie', 'USA'],
+        'description': 'Valeur refuge traditionnelle'
+    },
+    'SILVER': {
+        'nom': 'Argent',
+        'symbole': 'SILVER',
+        'icone': '🥈',
+        'categorie': 'Métaux Précieux',
+        'unite': 'USD/once',
+        'prix_base': 23.5,
+        'volatilite': 2.1,
+        'production_mondiale': 25000.0,
+        'reserves': 530000.0,
+        'pays_producteurs': ['Mexique', 'Pérou', 'Chine'],
+        'description': 'Métal précieux industriel'
+    },
+    'COPPER': {
+        'nom': 'Cuivre',
+        'symbole': 'COPPER',
+        'icone': '🔴',
+        'categorie': 'Métaux Industriels',
+        'unite': 'USD/livre',
+        'prix_base': 3.85,
+        'volatilite': 1.8,
+        'production_mondiale': 22.0,  # millions tonnes/an
+        'reserves': 870.0,
+        'pays_producteurs': ['Chili', 'Pérou', 'Chine'],
+        'description': 'Baromètre économique mondial'
+    },
+    'WHEAT': {
+        'nom': 'Blé',
+        'symbole': 'WHEAT',
+        'icone': '🌾',
+        'categorie': 'Agriculture',
+        'unite': 'USD/boisseau',
+        'prix_base': 6.25,
+        'volatilite': 3.2,
+        'production_mondiale': 780.0,  # millions tonnes/an
+        'reserves': 280.0,
+        'pays_producteurs': ['Chine', 'Inde', 'Russie', 'USA'],
+        'description': 'Céréale alimentaire majeure'
+    },
+    'CORN': {
+        'nom': 'Maïs',
+        'symbole': 'CORN',
+        'icone': '🌽',
+        'categorie': 'Agriculture',
+        'unite': 'USD/boisseau',
+        'prix_base': 4.80,
+        'volatilite': 2.9,
+        'production_mondiale': 1200.0,
+        'reserves': 320.0,
+        'pays_producteurs': ['USA', 'Chine', 'Brésil'],
+        'description': 'Céréale pour alimentation animale et humaine'
+    },
+    'SOYBEANS': {
+        'nom': 'Soja',
+        'symbole': 'SOYBEANS',
+        'icone': '🫘',
+        'categorie': 'Agriculture',
+        'unite': 'USD/boisseau',
+        'prix_base': 12.80,
+        'volatilite': 2.7,
+        'production_mondiale': 350.0,
+        'reserves': 90.0,
+        'pays_producteurs': ['USA', 'Brésil', 'Argentine'],
+        'description': 'Protéine végétale principale'
+    },
+    'COFFEE': {
+        'nom': 'Café',
+        'symbole': 'COFFEE',
+        'icone': '☕',
+        'categorie': 'Softs',
+        'unite': 'USD/livre',
+        'prix_base': 1.85,
+        'volatilite': 4.1,
+        'production_mondiale': 10.5,  # millions tonnes/an
+        'reserves': 25.0,
+        'pays_producteurs': ['Brésil', 'Vietnam', 'Colombie'],
+        'description': 'Boisson la plus échangée après le pétrole'
+    }
+}
@@ -0,0 +1,53 @@
+# commodities/currency.py
+"""Conversion des prix USD vers d'autres devises à partir des paires du marché des changes"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Devise -> (paire, True si la paire est cotée XXX/USD et doit diviser le prix USD)
+CURRENCIES = {
+    'USD': None,
+    'EUR': ('EUR/USD', True),
+    'JPY': ('USD/JPY', False),
+    'GBP': ('GBP/USD', True),
+    'CHF': ('USD/CHF', False),
+}
+
+
+class CurrencyConverter:
+    """Convertit la matrice (dates × symboles) en une opération diffusée, avec cache par devise et version"""
+
+    def __init__(self, fx_history, max_cached=8):
+        self.fx_history = fx_history.sort_index()
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+
+    def factors(self, currency, dates):
+        """Facteurs USD -> devise alignés sur les dates demandées"""
+        if CURRENCIES[currency] is None:
+            return np.ones(len(dates))
+        paire, inverse = CURRENCIES[currency]
+        rates = self.fx_history[paire].reindex(pd.DatetimeIndex(dates), method='ffill').bfill().to_numpy()
+        return 1.0 / rates if inverse else rates
+
+    def convert(self, prices, currency, version=None):
+        """Matrice de prix convertie ; mise en cache si une version de données est fournie"""
+        key = (currency, version)
+        if version is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        factors = self.factors(currency, prices.index)
+        converted = pd.DataFrame(prices.to_numpy() * factors[:, None], index=prices.index, columns=prices.columns)
+        if version is not None:
+            self._cache[key] = converted
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return converted
+
+    def convert_latest(self, prices, currency):
+        """Conversion de prix courants au dernier cours disponible"""
+        if CURRENCIES[currency] is None:
+            return prices
+        return prices * self.factors(currency, self.fx_history.index[-1:])[0]
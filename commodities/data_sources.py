@@ -0,0 +1,352 @@
+# commodities/data_sources.py
+"""Sources de données interchangeables : simulateur déterministe et flux réel"""
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .events import EventCatalog, load_events
+
+# Régimes de marché historiques (multiplicateurs de niveau par symbole, catégorie ou '*'), lus dans events.json
+HISTORICAL_REGIMES = load_events()
+
+# Le profil 'volatilite' des commodités est converti en volatilité annualisée (%)
+VOLATILITY_SCALE = 10.0
+DAYS_PER_YEAR = 365
+TICK_BLOCK = 1024
+FX_ANNUAL_VOLATILITY = 0.08
+# Part de la variance journalière réalisée entre la clôture et l'ouverture suivante
+GAP_FRACTION = 0.1
+# Amplitude du cycle saisonnier annuel du prix, par symbole, catégorie ou '*'
+SEASONAL_AMPLITUDE = {'Agriculture': 0.03, 'Softs': 0.02, '*': 0.005}
+
+# Portage annualisé moyen des courbes à terme (pente log) et volatilité de ses variations, par catégorie ou '*'
+CURVE_CARRY = {'Énergie': -0.02, 'Métaux Précieux': 0.045, 'Agriculture': 0.05, '*': 0.03}
+CURVE_SLOPE_VOLATILITY = {'Métaux Précieux': 0.01, 'Énergie': 0.12, '*': 0.06}
+# Mémoire (en jours) des variations de pente
+CURVE_SLOPE_MEMORY = 90
+
+# Correspondance avec les contrats continus Yahoo Finance (et facteur cents -> USD)
+YAHOO_TICKERS = {
+    'BRENT': ('BZ=F', 1.0),
+    'WTI': ('CL=F', 1.0),
+    'GOLD': ('GC=F', 1.0),
+    'SILVER': ('SI=F', 1.0),
+    'COPPER': ('HG=F', 1.0),
+    'WHEAT': ('ZW=F', 0.01),
+    'CORN': ('ZC=F', 0.01),
+    'SOYBEANS': ('ZS=F', 0.01),
+    'COFFEE': ('KC=F', 0.01),
+}
+
+YAHOO_FX_TICKERS = {
+    'EUR/USD': 'EURUSD=X',
+    'USD/JPY': 'JPY=X',
+    'GBP/USD': 'GBPUSD=X',
+    'USD/CHF': 'CHF=X',
+}
+
+
+def regime_levels(dates, symbols, categories, regimes=HISTORICAL_REGIMES):
+    """Matrice (dates × symboles) des multiplicateurs de niveau des régimes"""
+    return EventCatalog(regimes).levels(dates, symbols, categories)
+
+
+def seasonal_factors(dates, symbols, categories, amplitude=SEASONAL_AMPLITUDE):
+    """Matrice (dates × symboles) du cycle saisonnier 1 + a·sin(2π·jour/365)"""
+    a = np.array([
+        amplitude.get(symbole, amplitude.get(categorie, amplitude.get('*', 0.0)))
+        for symbole, categorie in zip(symbols, categories)
+    ])
+    phase = 2 * np.pi * pd.DatetimeIndex(dates).dayofyear.to_numpy() / DAYS_PER_YEAR
+    return 1 + np.sin(phase)[:, None] * a[None, :]
+
+
+def correlation_matrix(categories, intra=0.6, inter=0.2):
+    """Matrice de corrélation par blocs de catégories"""
+    categories = np.asarray(categories)
+    same = categories[:, None] == categories[None, :]
+    corr = np.where(same, intra, inter)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+class DataSource(ABC):
+    """Interface commune des sources de données du dashboard"""
+
+    def __init__(self, seed=42, tick_rate=1.0, clock=time.time):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.clock = clock
+
+    def rng(self, *key):
+        """Générateur aléatoire déterministe pour une clé donnée"""
+        if self.seed is None:
+            return np.random.default_rng()
+        return np.random.default_rng([self.seed] + [zlib.crc32(str(k).encode()) for k in key])
+
+    def current_tick(self):
+        """Numéro du tick courant selon l'horloge et la fréquence"""
+        return int(self.clock() * self.tick_rate)
+
+    def checkpoint(self):
+        """Dernier tick déjà appliqué aux données courantes (None si aucun)"""
+        return None
+
+    def resume(self, tick):
+        """Reprend après un instantané : seuls les ticks postérieurs seront rejoués"""
+
+    @abstractmethod
+    def historical_data(self, commodities, start='2020-01-01', end=None):
+        """Retourne l'historique journalier au format long"""
+
+    @abstractmethod
+    def poll(self, current_data):
+        """Retourne les nouvelles cotations (symbole, prix, volume_jour, ticks écoulés facultatifs) ou None"""
+
+    def fx_history(self, devises, start='2020-01-01', end=None):
+        """Historique journalier des paires de devises (dates × paires), constant par défaut"""
+        dates = pd.date_range(start, end or datetime.now(), freq='D')
+        return pd.DataFrame({paire: data['valeur'] for paire, data in devises.items()}, index=dates)
+
+    def futures_curve(self, symbole, info, spot, months):
+        """Échéances et prix (dates × échéances) des contrats cotés, courbe plate au comptant par défaut"""
+        from .term_structure import monthly_expiries, time_to_expiry
+
+        expiries = monthly_expiries(spot.index[0], spot.index[-1], months)
+        tau = time_to_expiry(spot.index, expiries, months)
+        return expiries, np.where(np.isnan(tau), np.nan, spot.to_numpy(dtype=float)[:, None])
+
+
+class SimulatedMarketSource(DataSource):
+    """Simulateur reproductible : GBM multi-actifs corrélé avec changements de régime"""
+
+    def __init__(self, seed=42, tick_rate=1.0, tick_days=1.0, regimes=HISTORICAL_REGIMES,
+                 intra_correlation=0.6, inter_correlation=0.2,
+                 stress_probability=0.02, calm_probability=0.1, stress_multiplier=1.8,
+                 seasonal_amplitude=SEASONAL_AMPLITUDE, max_catchup_ticks=100_000, clock=time.time):
+        super().__init__(seed=seed, tick_rate=tick_rate, clock=clock)
+        self.tick_days = tick_days
+        self.regimes = regimes
+        self.intra_correlation = intra_correlation
+        self.inter_correlation = inter_correlation
+        self.stress_probability = stress_probability
+        self.calm_probability = calm_probability
+        self.stress_multiplier = stress_multiplier
+        self.seasonal_amplitude = seasonal_amplitude
+        self.max_catchup_ticks = max_catchup_ticks
+        self._last_tick = None
+
+    def checkpoint(self):
+        return self._last_tick
+
+    def resume(self, tick):
+        self._last_tick = tick
+
+    def daily_sigma(self, volatilite):
+        """Volatilité journalière du GBM à partir du profil de volatilité"""
+        return np.asarray(volatilite, dtype=float) * VOLATILITY_SCALE / 100 / np.sqrt(DAYS_PER_YEAR)
+
+    def stress_regimes(self, rng, n):
+        """Chaîne de Markov calme/tendu, un état par pas de temps"""
+        draws = rng.random(n)
+        stress = np.empty(n, dtype=bool)
+        state = False
+        for i, u in enumerate(draws):
+            state = u >= self.calm_probability if state else u < self.stress_probability
+            stress[i] = state
+        return stress
+
+    def correlated_normals(self, rng, shape, categories):
+        """Tirages gaussiens corrélés entre symboles"""
+        chol = np.linalg.cholesky(
+            correlation_matrix(categories, self.intra_correlation, self.inter_correlation)
+        )
+        return rng.standard_normal(shape) @ chol.T
+
+    def ohlc(self, rng, close, sigma):
+        """Ouverture, plus haut et plus bas cohérents avec les clôtures (extrêmes d'un pont brownien)"""
+        log_close = np.log(close)
+        r = np.diff(log_close, axis=0, prepend=log_close[:1])
+        # Écart de nuit tiré conditionnellement au rendement de la journée
+        gap = GAP_FRACTION * r + np.sqrt(GAP_FRACTION * (1 - GAP_FRACTION)) * sigma * rng.standard_normal(close.shape)
+        x = r - gap
+        s2 = (1 - GAP_FRACTION) * sigma ** 2
+        u = 1 - rng.random((2,) + close.shape)
+        log_open = log_close - x
+        high = log_open + (x + np.sqrt(x ** 2 - 2 * s2 * np.log(u[0]))) / 2
+        low = log_open + (x - np.sqrt(x ** 2 - 2 * s2 * np.log(u[1]))) / 2
+        return np.exp(log_open), np.exp(high), np.exp(low)
+
+    def historical_data(self, commodities, start='2020-01-01', end=None):
+        """Génère l'historique journalier en un seul lot NumPy"""
+        dates = pd.date_range(start, end or datetime.now(), freq='D')
+        symbols = list(commodities)
+        infos = [commodities[s] for s in symbols]
+        categories = [info['categorie'] for info in infos]
+        n, k = len(dates), len(symbols)
+
+        # Flux indépendants : un historique plus long prolonge le précédent sans le modifier
+        stress = self.stress_regimes(self.rng('regimes', start), n)
+        z = self.correlated_normals(self.rng('historique', start), (n, k), categories)
+        volume = self.rng('volume', start).uniform(100000, 5000000, (n, k))
+
+        sigma = self.daily_sigma([info['volatilite'] for info in infos])[None, :]
+        sigma = sigma * np.where(stress, self.stress_multiplier, 1.0)[:, None]
+        log_returns = -0.5 * sigma ** 2 + sigma * z
+        log_returns[0] = 0.0
+
+        prix_base = np.array([info['prix_base'] for info in infos])
+        levels = regime_levels(dates, symbols, categories, self.regimes)
+        seasonal = seasonal_factors(dates, symbols, categories, self.seasonal_amplitude)
+        prix = prix_base * np.exp(np.cumsum(log_returns, axis=0)) * levels * seasonal
+        ouverture, haut, bas = self.ohlc(self.rng('ohlc', start), prix, sigma)
+
+        return pd.DataFrame({
+            'date': np.repeat(dates.values, k),
+            'symbole': np.tile(symbols, n),
+            'nom': np.tile([info['nom'] for info in infos], n),
+            'categorie': np.tile(categories, n),
+            'ouverture': ouverture.ravel(),
+            'haut': haut.ravel(),
+            'bas': bas.ravel(),
+            'prix': prix.ravel(),
+            'volume': volume.ravel(),
+            'volatilite_jour': np.abs(np.expm1(log_returns)).ravel() * 100
+        })
+
+    def fx_history(self, devises, start='2020-01-01', end=None):
+        """Trajectoires GBM des paires de devises aboutissant aux valeurs courantes"""
+        dates = pd.date_range(start, end or datetime.now(), freq='D')
+        pairs = list(devises)
+        sigma = FX_ANNUAL_VOLATILITY / np.sqrt(DAYS_PER_YEAR)
+        z = self.rng('devises_historique', start).standard_normal((len(dates), len(pairs)))
+        log_path = np.cumsum(-0.5 * sigma ** 2 + sigma * z, axis=0)
+        valeurs = np.array([devises[p]['valeur'] for p in pairs])
+        return pd.DataFrame(valeurs * np.exp(log_path - log_path[-1]), index=dates, columns=pairs)
+
+    def futures_curve(self, symbole, info, spot, months):
+        """Courbe à portage variable : F(t, T) = S(t)·exp(pente(t)·(T - t)), pente autour du portage moyen"""
+        from .term_structure import monthly_expiries, time_to_expiry
+
+        expiries = monthly_expiries(spot.index[0], spot.index[-1], months)
+        tau = time_to_expiry(spot.index, expiries, months)
+        categorie = info['categorie']
+        carry = CURVE_CARRY.get(symbole, CURVE_CARRY.get(categorie, CURVE_CARRY['*']))
+        volatility = CURVE_SLOPE_VOLATILITY.get(symbole, CURVE_SLOPE_VOLATILITY.get(categorie,
+                                                                                   CURVE_SLOPE_VOLATILITY['*']))
+        # Bruit lissé exponentiellement puis renormalisé : pente persistante qui peut changer de signe
+        alpha = 1 / CURVE_SLOPE_MEMORY
+        noise = pd.Series(self.rng('courbe', symbole).standard_normal(len(spot))).ewm(alpha=alpha).mean()
+        slope = carry + volatility * noise.to_numpy() / np.sqrt(alpha / (2 - alpha))
+        return expiries, spot.to_numpy(dtype=float)[:, None] * np.exp(slope[:, None] * tau)
+
+    def ticks(self, start_tick, count, volatilite, categories):
+        """Log-rendements et variations de volume de `count` ticks à partir de `start_tick`"""
+        k = len(categories)
+        first_block = start_tick // TICK_BLOCK
+        last_block = (start_tick + count - 1) // TICK_BLOCK
+        z_blocks, v_blocks = [], []
+        for block in range(first_block, last_block + 1):
+            rng = self.rng('ticks', k, block)
+            z_blocks.append(self.correlated_normals(rng, (TICK_BLOCK, k), categories))
+            v_blocks.append(rng.standard_normal((TICK_BLOCK, k)))
+        offset = start_tick - first_block * TICK_BLOCK
+        z = np.concatenate(z_blocks)[offset:offset + count]
+        v = np.concatenate(v_blocks)[offset:offset + count]
+
+        sigma = self.daily_sigma(volatilite) * np.sqrt(self.tick_days)
+        log_returns = -0.5 * sigma ** 2 + sigma * z
+        volume_changes = 0.1 * v - 0.005
+        return log_returns, volume_changes
+
+    def poll(self, current_data):
+        """Applique les ticks écoulés depuis le dernier appel"""
+        now = self.current_tick()
+        start = now if self._last_tick is None else self._last_tick + 1
+        if start > now:
+            return None
+        start = max(start, now - self.max_catchup_ticks + 1)
+        self._last_tick = now
+
+        log_returns, volume_changes = self.ticks(
+            start, now - start + 1, current_data['volatilite'].values, current_data['categorie'].values
+        )
+        return pd.DataFrame({
+            'symbole': current_data['symbole'].values,
+            'prix': current_data['prix'].values * np.exp(log_returns.sum(axis=0)),
+            'volume_jour': current_data['volume_jour'].values * np.exp(volume_changes.sum(axis=0)),
+            'ticks': len(log_returns)
+        })
+
+
+class YahooFinanceSource(DataSource):
+    """Flux réel via yfinance (contrats futures continus)"""
+
+    def __init__(self, seed=42, tick_rate=1 / 60, tickers=YAHOO_TICKERS, clock=time.time):
+        super().__init__(seed=seed, tick_rate=tick_rate, clock=clock)
+        self.tickers = tickers
+        self._last_tick = None
+
+    def _download(self, symbols, fields=('Close', 'Volume'), **kwargs):
+        import yfinance as yf
+
+        symbols = [s for s in symbols if s in self.tickers]
+        raw = yf.download([self.tickers[s][0] for s in symbols], progress=False,
+                          auto_adjust=False, group_by='column', **kwargs)
+        rename = {self.tickers[s][0]: s for s in symbols}
+        scale = pd.Series({s: self.tickers[s][1] for s in symbols})
+        return [
+            raw[field].rename(columns=rename) * (1 if field == 'Volume' else scale)
+            for field in fields
+        ]
+
+    def historical_data(self, commodities, start='2020-01-01', end=None):
+        """Télécharge l'historique journalier des contrats continus (barres OHLC)"""
+        ouverture, haut, bas, close, volume = self._download(
+            list(commodities), fields=('Open', 'High', 'Low', 'Close', 'Volume'), start=start, end=end, interval='1d'
+        )
+        close = close.ffill()
+        frame = pd.DataFrame({
+            'ouverture': ouverture.stack(),
+            'haut': haut.stack(),
+            'bas': bas.stack(),
+            'prix': close.stack(),
+            'volume': volume.stack(),
+            'volatilite_jour': close.pct_change().abs().stack() * 100
+        }).reset_index()
+        frame.columns = ['date', 'symbole', 'ouverture', 'haut', 'bas', 'prix', 'volume', 'volatilite_jour']
+        frame['nom'] = frame['symbole'].map(lambda s: commodities[s]['nom'])
+        frame['categorie'] = frame['symbole'].map(lambda s: commodities[s]['categorie'])
+        frame = frame.sort_values(['date', 'symbole'], kind='stable').reset_index(drop=True)
+        return frame[['date', 'symbole', 'nom', 'categorie', 'ouverture', 'haut', 'bas', 'prix', 'volume',
+                      'volatilite_jour']]
+
+    def fx_history(self, devises, start='2020-01-01', end=None):
+        """Cours de clôture journaliers des paires de devises"""
+        import yfinance as yf
+
+        pairs = [p for p in devises if p in YAHOO_FX_TICKERS]
+        raw = yf.download([YAHOO_FX_TICKERS[p] for p in pairs], start=start, end=end, interval='1d',
+                          progress=False, auto_adjust=False, group_by='column')
+        close = raw['Close'].rename(columns={YAHOO_FX_TICKERS[p]: p for p in pairs})
+        dates = pd.date_range(start, end or datetime.now(), freq='D')
+        return close.reindex(dates).ffill().bfill()
+
+    def poll(self, current_data):
+        """Dernières cotations intrajournalières, au plus une fois par tick"""
+        now = self.current_tick()
+        if self._last_tick == now:
+            return None
+        self._last_tick = now
+
+        close, volume = self._download(list(current_data['symbole']), period='1d', interval='1m')
+        last = close.ffill().iloc[-1].dropna()
+        return pd.DataFrame({
+            'symbole': last.index,
+            'prix': last.values,
+            'volume_jour': volume.sum().reindex(last.index).values
+        })
@@ -0,0 +1,149 @@
+# commodities/derived.py
+"""Instruments dérivés (ratios, spreads, paniers) définis par expressions sur les séries de base"""
+import ast
+import operator
+
+import numpy as np
+import pandas as pd
+
+# Nombre d'unités de cotation par tonne métrique
+UNITS_PER_TONNE = {
+    'USD/baril': 7.33,
+    'USD/once': 32150.7466,
+    'USD/livre': 2204.62262,
+    'USD/boisseau': 36.7437,
+}
+BUSHELS_PER_TONNE = {
+    'CORN': 39.3679,
+}
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+def units_per_tonne(symbole, info):
+    """Facteur de conversion du prix coté vers un prix en USD/tonne"""
+    if info['unite'] == 'USD/boisseau':
+        return BUSHELS_PER_TONNE.get(symbole, UNITS_PER_TONNE['USD/boisseau'])
+    return UNITS_PER_TONNE[info['unite']]
+
+
+def production_basket(symbols, commodities):
+    """Expression d'un panier de séries rebasées, pondéré par la production mondiale"""
+    weights = pd.Series({s: commodities[s]['production_mondiale'] for s in symbols})
+    weights = weights / weights.sum()
+    return ' + '.join(f'{w:.6f} * rebase({s})' for s, w in weights.items())
+
+
+def default_definitions(commodities):
+    """Instruments dérivés proposés par défaut"""
+    agri = [s for s, info in commodities.items() if info['categorie'] == 'Agriculture']
+    return {
+        'GOLD_SILVER': ('GOLD / SILVER', "Ratio or/argent"),
+        'BRENT_WTI': ('BRENT - WTI', "Spread Brent–WTI (USD/baril)"),
+        'SOY_CORN': ('SOYBEANS / CORN', "Ratio soja/maïs (arbitrage de semis)"),
+        'WHEAT_CORN_T': ('tonne(WHEAT) - tonne(CORN)', "Spread blé–maïs (USD/tonne)"),
+        'COPPER_GOLD': ('tonne(COPPER) / tonne(GOLD) * 1000', "Ratio cuivre/or (‰, USD/tonne)"),
+        'AGRI_BASKET': (production_basket(agri, commodities), "Panier agricole pondéré par la production (base 100)"),
+    }
+
+
+class DerivedEngine:
+    """Évaluation paresseuse et mémoïsée : un tick ne recalcule que les séries qui en dépendent"""
+
+    def __init__(self, base, commodities, definitions=None):
+        self.base = base.astype(float)
+        # Les ticks alimentent une ligne de séance après la dernière clôture, comme la barre validée ensuite
+        self.session_date = self.base.index[-1] + pd.Timedelta(days=1)
+        self.commodities = commodities
+        self.versions = {symbole: 0 for symbole in self.base.columns}
+        self.definitions = {}
+        self._cache = {}
+        self.recomputed = 0
+        for name, (expression, description) in (definitions or default_definitions(commodities)).items():
+            self.define(name, expression, description)
+
+    def define(self, name, expression, description=''):
+        """Ajoute ou remplace un instrument dérivé"""
+        tree = ast.parse(expression, mode='eval').body
+        self.definitions[name] = {
+            'expression': expression,
+            'description': description,
+            'tree': tree,
+            'references': {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)},
+        }
+        self._cache.clear()
+
+    def dependencies(self, name, seen=None):
+        """Séries de base dont dépend un instrument (transitivement)"""
+        seen = set() if seen is None else seen
+        if name in self.versions:
+            return {name}
+        if name in seen:
+            raise ValueError(f"Dépendance circulaire sur {name}")
+        seen = seen | {name}
+        deps = set()
+        for ref in self.definitions[name]['references']:
+            if ref in self.versions or ref in self.definitions:
+                deps |= self.dependencies(ref, seen)
+        return deps
+
+    def _evaluate_node(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            if node.id in self.versions:
+                return self.base[node.id]
+            if node.id in self.definitions:
+                return self.evaluate(node.id)
+            raise KeyError(f"Série inconnue: {node.id}")
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](self._evaluate_node(node.left), self._evaluate_node(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self._evaluate_node(node.operand)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and len(node.args) == 1:
+            series = self._evaluate_node(node.args[0])
+            if node.func.id == 'rebase':
+                return series / series.dropna().iloc[0] * 100
+            if node.func.id == 'log':
+                return np.log(series)
+            if node.func.id == 'tonne' and isinstance(node.args[0], ast.Name):
+                symbole = node.args[0].id
+                return series * units_per_tonne(symbole, self.commodities[symbole])
+        raise ValueError(f"Expression non supportée: {ast.dump(node)}")
+
+    def evaluate(self, name):
+        """Série dérivée complète, recalculée seulement si une dépendance a changé"""
+        stamp = tuple(sorted((s, self.versions[s]) for s in self.dependencies(name)))
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        series = self._evaluate_node(self.definitions[name]['tree'])
+        if not isinstance(series, pd.Series):
+            series = pd.Series(series, index=self.base.index)
+        series = series.rename(name)
+        self._cache[name] = (stamp, series)
+        self.recomputed += 1
+        return series
+
+    def update_base(self, prices, date=None):
+        """Applique un tick {symbole: prix} sur la date donnée (ligne de la séance en cours par défaut)"""
+        date = self.session_date if date is None else pd.Timestamp(date).normalize()
+        changed = [s for s in prices if s in self.versions]
+        if date not in self.base.index:
+            self.base.loc[date] = self.base.iloc[-1]
+            changed = list(self.versions)
+        for symbole in changed:
+            if symbole in prices:
+                self.base.loc[date, symbole] = float(prices[symbole])
+            self.versions[symbole] += 1
+        return changed
+
+    def affected(self, symbols):
+        """Instruments dérivés impactés par une mise à jour des symboles donnés"""
+        symbols = set(symbols)
+        return [name for name in self.definitions if self.dependencies(name) & symbols]
@@ -0,0 +1,486 @@
+# commodities/engine.py
+"""Moteur de données et d'analyse du dashboard, utilisable sans interface"""
+import atexit
+import copy
+import shutil
+import tempfile
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .anomalies import AnomalyDetector
+from .catalog import COMMODITIES
+from .currency import CurrencyConverter
+from .data_sources import SimulatedMarketSource
+from .derived import DerivedEngine
+from .events import EVENT_WINDOW, EventCatalog, EventStudy
+from .indicators import risk_metrics, technical_indicators
+from .indices import BasketIndexEngine, category_baskets
+from .seasonality import SeasonalityEngine
+from .term_structure import TermStructureStore, source_curves
+from .volatility import OHLC_FIELDS, VolatilityEngine
+from .schema import (compact_current, compact_historical, frame_memory, metadata_table, wide_matrix,
+                     with_metadata)
+
+COVARIANCE_WINDOW = 252
+INDICATORS = ('prix', 'MA20', 'MA50', 'RSI', 'Bollinger_High', 'Bollinger_Low')
+
+
+class MarketEngine:
+    """Historique, données courantes, marchés et analyses dérivées"""
+
+    def __init__(self, source=None, history_store=None, progress=None, state=None):
+        progress = progress or (lambda fraction, label: None)
+        self.source = source or SimulatedMarketSource()
+        self.history_store = history_store
+        self.commodities = self.define_commodities()
+        self.metadata = metadata_table(self.commodities)
+        self.memory_stats = {}
+        self.history_version = 0 if state is None else state['history_version']
+        self._price_matrix = None
+        progress(0.1, "Chargement de l'historique")
+        self._historical_data = self.initialize_historical_data()
+        # Barres de séance validées depuis le chargement, ajoutées à l'historique (format long)
+        self._history_tail = None
+        self._store_version = getattr(history_store, 'version', None)
+        self._derived_engine = None
+        self._index_engine = None
+        self._seasonality = None
+        self._volatility = None
+        self._covariance = {}
+        self._event_study = {}
+        self._term_structure = None
+        self.event_catalog = EventCatalog.load()
+        if state is None:
+            progress(0.6, "Données courantes")
+            self.current_data = self.initialize_current_data()
+            self.market_data = self.initialize_market_data()
+            self.session_bar = self.initialize_session_bar()
+            self.anomalies = AnomalyDetector(self.current_data['symbole'].astype(str))
+            progress(0.8, "Taux de change")
+            self.currency_converter = CurrencyConverter(
+                self.source.fx_history(self.market_data['devises'], start='2020-01-01')
+            )
+        else:
+            progress(0.6, "Restauration de l'état")
+            self.restore_state(state)
+        self.lock = threading.RLock()
+        self._indicator_cache = {}
+        progress(1.0, "Prêt")
+
+    def analytics_state(self):
+        """État vivant et analyses déjà calculées, à persister avec l'historique (sous le verrou)"""
+        with self.lock:
+            return {
+                'history_version': self.history_version,
+                'current_data': self.current_data,
+                'market_data': copy.deepcopy(self.market_data),
+                'session_bar': self.session_bar,
+                'session_day': self._session_day,
+                'anomalies': self.anomalies,
+                'fx_history': self.currency_converter.fx_history,
+                'seasonality': self._seasonality,
+                'volatility': self._volatility,
+                'covariance': self._covariance,
+                'event_study': self._event_study,
+            }
+
+    def restore_state(self, state):
+        """Reprend un état persisté : les analyses de la même version d'historique ne sont pas recalculées"""
+        self.current_data = state['current_data']
+        self.market_data = state['market_data']
+        self.session_bar = state['session_bar']
+        self._session_day = state['session_day']
+        self.anomalies = state['anomalies']
+        self.currency_converter = CurrencyConverter(state['fx_history'])
+        self._seasonality = state['seasonality']
+        self._volatility = state['volatility']
+        self._covariance = state['covariance']
+        self._event_study = state['event_study']
+
+    def define_commodities(self):
+        """Définit les commodités avec leurs caractéristiques"""
+        return copy.deepcopy(COMMODITIES)
+
+    def initialize_historical_data(self):
+        """Initialise les données historiques des commodités (rien n'est chargé avec un stockage disque)"""
+        if self.history_store is not None:
+            # Les colonnes mappées sont lues à la demande, par champ, symbole et période
+            return None
+        data = self.source.historical_data(self.commodities, start='2020-01-01')
+        compact = compact_historical(data)
+        self.memory_stats['historical_data'] = (frame_memory(data), frame_memory(compact))
+        return compact
+
+    @property
+    def historical_data(self):
+        """Historique complet au format long ; avec un stockage disque, copie construite à chaque appel"""
+        if self._historical_data is None:
+            data = compact_historical(self.history_store.frame())
+        else:
+            data = self._historical_data
+        if self._history_tail is None:
+            return data
+        return compact_historical(pd.concat([data, self._history_tail], ignore_index=True))
+
+    def history_fields(self):
+        """Champs disponibles dans l'historique"""
+        if self.history_store is not None:
+            return self.history_store.fields
+        return [c for c in self._historical_data.columns if c not in ('date', 'symbole', 'nom', 'categorie')]
+
+    def history_matrix(self, field='prix'):
+        """Matrice (dates × symboles) d'un champ, lue directement dans les colonnes du stockage disque"""
+        field = field if field in self.history_fields() else 'prix'
+        if self.history_store is not None:
+            matrix = self.history_store.matrix(field)
+        else:
+            matrix = wide_matrix(self._historical_data, field)
+        if self._history_tail is None:
+            return matrix
+        return pd.concat([matrix, wide_matrix(self._history_tail, field).reindex(columns=matrix.columns)])
+
+    def history_frame(self, symbols, start=None):
+        """Extrait l'historique de quelques symboles, depuis le stockage disque si disponible"""
+        if self.history_store is not None:
+            data = compact_historical(self.history_store.frame(symbols, start=start))
+        else:
+            data = self._historical_data[self._historical_data['symbole'].isin(symbols)]
+        if self._history_tail is not None:
+            tail = self._history_tail[self._history_tail['symbole'].isin(symbols)]
+            data = compact_historical(pd.concat([data, tail], ignore_index=True))
+        if start is not None:
+            data = data[data['date'] >= start]
+        return data
+
+    def price_matrix(self):
+        """Matrice (dates × symboles) des prix historiques, construite une fois par version"""
+        if self._price_matrix is None or self._price_matrix[0] != self.history_version:
+            self._price_matrix = (self.history_version, self.history_matrix('prix'))
+        return self._price_matrix[1]
+
+    def live_prices(self):
+        """Prix courants par symbole"""
+        return dict(zip(self.current_data['symbole'].astype(str), self.current_data['prix']))
+
+    def derived_engine(self):
+        """Moteur des spreads et ratios, construit à la première utilisation"""
+        with self.lock:
+            if self._derived_engine is None:
+                self._derived_engine = DerivedEngine(self.price_matrix(), self.commodities)
+                self._derived_engine.update_base(self.live_prices())
+            return self._derived_engine
+
+    def seasonality(self):
+        """Saisonnalité par version de l'historique : les nouvelles dates sont ajoutées sans tout recalculer"""
+        with self.lock:
+            if self._seasonality is None or self._seasonality[0] != self.history_version:
+                prices = self.price_matrix()
+                engine = self._seasonality[1] if self._seasonality is not None else None
+                if engine is None or not prices.index[:len(engine.dates)].equals(engine.dates):
+                    engine = SeasonalityEngine(prices)
+                else:
+                    engine.append(prices)
+                self._seasonality = (self.history_version, engine)
+            return self._seasonality[1]
+
+    def ohlc_matrices(self):
+        """Matrices (dates × symboles) ouverture/haut/bas/clôture ; la clôture remplace un champ absent"""
+        return {field: self.history_matrix(field) for field in OHLC_FIELDS}
+
+    def volatility(self):
+        """Estimateurs de volatilité par version de l'historique, prolongés barre par barre ensuite"""
+        with self.lock:
+            if self._volatility is None or self._volatility[0] != self.history_version:
+                self._volatility = (self.history_version, VolatilityEngine(self.ohlc_matrices()))
+            return self._volatility[1]
+
+    def covariance(self, window=COVARIANCE_WINDOW):
+        """Covariance des rendements logarithmiques journaliers sur la fenêtre récente, par version"""
+        with self.lock:
+            key = (self.history_version, window)
+            if key not in self._covariance:
+                returns = np.log(self.price_matrix().astype(float)).diff().iloc[-window:]
+                self._covariance = {key: returns.cov()}
+            return self._covariance[key]
+
+    def event_study(self, window=EVENT_WINDOW):
+        """Étude d'événements du catalogue (événement × symbole), par version de l'historique"""
+        with self.lock:
+            key = (self.history_version, window)
+            if key not in self._event_study:
+                self._event_study = {key: EventStudy(self.price_matrix(), self.event_catalog, window).run()}
+            return self._event_study[key]
+
+    def term_structure(self):
+        """Courbes à terme de la source, écrites sur disque à la première utilisation puis lues à la demande"""
+        with self.lock:
+            if self._term_structure is None or self._term_structure[0] != self.history_version:
+                # Un seul répertoire par moteur : chaque version remplace la précédente sur place
+                if self._term_structure is None:
+                    root = tempfile.mkdtemp(prefix='commodities-courbes-')
+                    atexit.register(shutil.rmtree, root, True)
+                else:
+                    root = self._term_structure[1].root
+                    self._term_structure[1].close()
+                store = TermStructureStore.write(
+                    root, source_curves(self.source, self.price_matrix(), self.commodities)
+                )
+                self._term_structure = (self.history_version, store)
+            return self._term_structure[1]
+
+    def initialize_session_bar(self):
+        """Barre en cours depuis la dernière clôture historique (ouverture, haut, bas, dernier prix)"""
+        last_close = self.price_matrix().iloc[-1]
+        bar = self.current_data[['symbole', 'prix']].copy()
+        bar['symbole'] = bar['symbole'].astype(str)
+        bar = bar.set_index('symbole')
+        bar['ouverture'] = last_close.reindex(bar.index).astype(float)
+        bar['haut'] = bar[['ouverture', 'prix']].max(axis=1)
+        bar['bas'] = bar[['ouverture', 'prix']].min(axis=1)
+        self._session_day = date.today()
+        return bar[list(OHLC_FIELDS)]
+
+    def live_volatility(self):
+        """Estimations annualisées (%) incluant la barre en cours, sans la valider"""
+        with self.lock:
+            engine = self.volatility()
+            bar = self.session_bar.reindex(engine.symbols)
+            return engine.latest({field: bar[field].to_numpy() for field in OHLC_FIELDS})
+
+    def commit_session_bar(self):
+        """Valide la barre en cours : ajoutée à l'historique (nouvelle version), puis nouvelle barre au dernier prix
+
+        Les estimateurs de volatilité et la saisonnalité déjà construits sont prolongés d'une barre ; les autres
+        analyses sont recalculées à la demande pour la nouvelle version.
+        """
+        with self.lock:
+            engine = self.volatility()
+            bar = self.session_bar.reindex(engine.symbols)
+            day = engine.dates[-1] + pd.Timedelta(days=1)
+            engine.update(day, {field: bar[field].to_numpy() for field in OHLC_FIELDS})
+            self._append_history(day, bar)
+            self.history_version += 1
+            self._volatility = (self.history_version, engine)
+            # Construits sur l'ancien historique (dernière clôture de référence) : reconstruits à la demande
+            self._derived_engine = None
+            self._index_engine = None
+            self.session_bar = self.session_bar.assign(
+                ouverture=self.session_bar['prix'], haut=self.session_bar['prix'], bas=self.session_bar['prix']
+            )
+            self._session_day = date.today()
+
+    def adopt_history_store(self, store, version):
+        """Lit désormais l'historique dans un stockage réécrit à la version `version` (barres validées incluses)"""
+        with self.lock:
+            if version == self.history_version:
+                self.history_store = store
+                self._store_version = store.version
+                self._historical_data = None
+                self._history_tail = None
+
+    def reload_history(self):
+        """Relit un historique republié par le stockage (mémoire partagée) : analyses recalculées à la demande"""
+        with self.lock:
+            self._store_version = self.history_store.version
+            # Les barres validées localement sont incluses dans l'historique republié
+            self._history_tail = None
+            self.history_version += 1
+            self._derived_engine = None
+            self._index_engine = None
+
+    def _append_history(self, day, bar):
+        """Ajoute une barre journalière (symboles en index, champs OHLC) à la fin de l'historique"""
+        previous = self.price_matrix().iloc[-1].reindex(bar.index).astype(float)
+        volumes = self.current_data.set_index(self.current_data['symbole'].astype(str))['volume_jour']
+        row = bar.reset_index().rename(columns={'index': 'symbole'})
+        row.insert(0, 'date', day)
+        row.insert(2, 'nom', [self.commodities[s]['nom'] for s in row['symbole']])
+        row.insert(3, 'categorie', [self.commodities[s]['categorie'] for s in row['symbole']])
+        row['volume'] = volumes.reindex(bar.index).to_numpy()
+        row['volatilite_jour'] = (bar['prix'] / previous - 1).abs().to_numpy() * 100
+        row = compact_historical(row[['date', 'symbole', 'nom', 'categorie', *OHLC_FIELDS, 'volume',
+                                      'volatilite_jour']])
+        tail = row if self._history_tail is None else pd.concat([self._history_tail, row], ignore_index=True)
+        self._history_tail = compact_historical(tail)
+
+    def index_engine(self):
+        """Indices de catégories et paniers personnalisés, construits à la première utilisation"""
+        with self.lock:
+            if self._index_engine is None:
+                self._index_engine = BasketIndexEngine(self.price_matrix(), category_baskets(self.commodities))
+                self._index_engine.update(self.live_prices())
+            return self._index_engine
+
+    def converted_history(self, symbols, devise, start=None):
+        """Historique au format long converti dans la devise demandée"""
+        if devise == 'USD':
+            return self.history_frame(symbols, start=start)
+        prices = self.currency_converter.convert(self.price_matrix(), devise, self.history_version)
+        prices = prices[[s for s in prices.columns if s in symbols]]
+        if start is not None:
+            prices = prices[prices.index >= start]
+        return prices.reset_index().melt(id_vars='date', var_name='symbole', value_name='prix')
+
+    def initialize_current_data(self):
+        """Initialise les données courantes"""
+        rng = self.source.rng('donnees_courantes')
+        last_close = self.price_matrix().ffill().iloc[-1]
+        current_data = []
+        for symbole, info in self.commodities.items():
+
+            # Variations simulées
+            change_pct = rng.uniform(-3.0, 3.0)
+
+            current_data.append({
+                'symbole': symbole,
+                'nom': info['nom'],
+                'icone': info['icone'],
+                'categorie': info['categorie'],
+                'unite': info['unite'],
+                'prix': float(last_close[symbole]) * (1 + change_pct/100),
+                'change_pct': change_pct,
+                'volatilite': info['volatilite'],
+                'production_mondiale': info['production_mondiale'],
+                'reserves': info['reserves'],
+                'pays_producteurs': info['pays_producteurs'],
+                'volume_jour': rng.uniform(500000, 5000000),
+                'spread': rng.uniform(0.1, 0.5)
+            })
+
+        data = pd.DataFrame(current_data)
+        compact = compact_current(data)
+        self.memory_stats['current_data'] = (frame_memory(data), frame_memory(compact))
+        return compact
+
+    def initialize_market_data(self):
+        """Initialise les données des marchés mondiaux"""
+        indices = {
+            'S&P 500': {'valeur': 4500, 'change': 0.0, 'secteur': 'USA'},
+            'NASDAQ': {'valeur': 14000, 'change': 0.0, 'secteur': 'USA Tech'},
+            'DAX': {'valeur': 16000, 'change': 0.0, 'secteur': 'Allemagne'},
+            'CAC 40': {'valeur': 7200, 'change': 0.0, 'secteur': 'France'},
+            'FTSE 100': {'valeur': 7500, 'change': 0.0, 'secteur': 'UK'},
+            'Nikkei 225': {'valeur': 33000, 'change': 0.0, 'secteur': 'Japon'}
+        }
+
+        devises = {
+            'EUR/USD': {'valeur': 1.0850, 'change': 0.0},
+            'USD/JPY': {'valeur': 148.50, 'change': 0.0},
+            'GBP/USD': {'valeur': 1.2650, 'change': 0.0},
+            'USD/CHF': {'valeur': 0.8850, 'change': 0.0}
+        }
+
+        return {'indices': indices, 'devises': devises}
+
+    def update_live_data(self):
+        """Met à jour les données en temps réel"""
+        with self.lock:
+            if self.history_store is not None and self.history_store.version != self._store_version:
+                self.reload_history()
+            if date.today() != self._session_day:
+                self.commit_session_bar()
+            self._apply_quotes(self.source.poll(self.current_data))
+
+    def _apply_quotes(self, quotes):
+        """Applique des cotations (symbole, prix, volume_jour) aux données courantes
+
+        Une source qui publie aussi la variation du jour et la barre en cours (change_pct, ouverture, haut, bas)
+        les impose telles quelles au lieu de les déduire des cotations successives.
+
+        Les tables courantes sont remplacées, jamais modifiées en place : une session qui lit l'ancienne
+        référence pendant la mise à jour garde un état cohérent.
+        """
+        if quotes is None or quotes.empty:
+            return
+
+        quotes = quotes.set_index('symbole')
+        current = self.current_data.copy()
+        nouveaux_prix = current['symbole'].astype(str).map(quotes['prix'])
+        mask = nouveaux_prix.notna()
+
+        # Mise à jour des prix et des variations
+        if 'change_pct' in quotes:
+            current.loc[mask, 'change_pct'] = current['symbole'].astype(str).map(quotes['change_pct'])[mask]
+        else:
+            current.loc[mask, 'change_pct'] = (nouveaux_prix[mask] / current.loc[mask, 'prix'] - 1) * 100
+        current.loc[mask, 'prix'] = nouveaux_prix[mask]
+
+        # Propagation aux instruments dérivés déjà construits
+        if self._derived_engine is not None:
+            self._derived_engine.update_base(quotes['prix'].to_dict())
+        if self._index_engine is not None:
+            self._index_engine.update(quotes['prix'].to_dict())
+
+        # Extrêmes de la barre en cours
+        prix = quotes['prix'].reindex(self.session_bar.index).dropna()
+        bar = self.session_bar.copy()
+        bar.loc[prix.index, 'prix'] = prix
+        if {'ouverture', 'haut', 'bas'} <= set(quotes.columns):
+            bar.loc[prix.index, ['ouverture', 'haut', 'bas']] = quotes.loc[prix.index, ['ouverture', 'haut', 'bas']]
+        else:
+            bar.loc[prix.index, 'haut'] = np.maximum(bar.loc[prix.index, 'haut'], prix)
+            bar.loc[prix.index, 'bas'] = np.minimum(bar.loc[prix.index, 'bas'], prix)
+
+        # Mise à jour du volume
+        nouveaux_volumes = current['symbole'].astype(str).map(quotes['volume_jour'])
+        current.loc[mask, 'volume_jour'] = nouveaux_volumes[mask]
+        self.current_data, self.session_bar = current, bar
+
+        # Détection d'anomalies sur les symboles cotés, variations ramenées au tick (fusion de plusieurs ticks)
+        ticks = 1
+        if 'ticks' in quotes:
+            ticks = current['symbole'].astype(str).map(quotes['ticks']).fillna(1).to_numpy(dtype=float)
+        self.anomalies.update(current['prix'].to_numpy(dtype=float), current['volume_jour'].to_numpy(dtype=float),
+                              ticks=ticks, quoted=mask.to_numpy())
+
+    # Requêtes programmatiques
+
+    def symbols(self):
+        """Symboles disponibles avec leur catégorie"""
+        return self.metadata.assign(categorie=[self.commodities[s]['categorie'] for s in self.metadata.index])
+
+    def history(self, symbols=None, start=None, end=None, fields=('prix',)):
+        """Historique au format long pour plusieurs symboles et une période"""
+        symbols = symbols or list(self.commodities)
+        data = self.history_frame(symbols, start=pd.Timestamp(start) if start else None)
+        if end is not None:
+            data = data[data['date'] <= pd.Timestamp(end)]
+        return data[['date', 'symbole', *fields]].reset_index(drop=True)
+
+    def symbol_indicators(self, symbole):
+        """Indicateurs techniques d'un symbole sur tout l'historique, mémoïsés par version"""
+        with self.lock:
+            # Une entrée par symbole, celle de la version courante : le cache reste borné au nombre de symboles
+            cached = self._indicator_cache.get(symbole)
+            if cached is None or cached[0] != self.history_version:
+                cached = (self.history_version, technical_indicators(self.price_matrix()[symbole]))
+                self._indicator_cache[symbole] = cached
+            return cached[1]
+
+    def indicators(self, symbols=None, start=None, end=None, names=INDICATORS):
+        """Indicateurs techniques (calculés sur tout l'historique, puis tronqués à la période)"""
+        frames = []
+        for symbole in symbols or list(self.commodities):
+            data = self.symbol_indicators(symbole).loc[start:end, list(names)]
+            frames.append(data.reset_index().assign(symbole=symbole))
+        return pd.concat(frames, ignore_index=True)[['date', 'symbole', *names]]
+
+    def risk(self, symbols=None, start=None, end=None):
+        """Volatilité, VaR, drawdown et performance par symbole"""
+        prices = self.price_matrix()[symbols or list(self.commodities)].loc[start:end]
+        return risk_metrics(prices).reset_index()
+
+    def aggregate(self, symbols=None, start=None, end=None, by='categorie', freq='ME', field='prix', how='mean'):
+        """Agrégation par catégorie ou symbole et par période calendaire"""
+        data = self.history(symbols, start, end, fields=(field,))
+        data['categorie'] = data['symbole'].astype(str).map(lambda s: self.commodities[s]['categorie'])
+        grouped = data.groupby([by, pd.Grouper(key='date', freq=freq)], observed=True)[field]
+        return grouped.agg(how).reset_index()
+
+    def live(self):
+        """Données courantes avec nom et unité"""
+        with self.lock:
+            return with_metadata(self.current_data, self.metadata, ['nom', 'unite']).copy()
@@ -0,0 +1,151 @@
+# commodities/events.py
+"""Catalogue d'événements de marché (fichier JSON ou CSV) et étude d'événements vectorisée"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .indicators import ANNUALIZATION
+
+EVENTS_FILE = os.path.join(os.path.dirname(__file__), 'events.json')
+EVENT_WINDOW = 30
+STUDY_FIELDS = {
+    'rendement_avant': 'Rendement moyen avant (%/jour)',
+    'rendement_apres': 'Rendement moyen après (%/jour)',
+    'vol_avant': 'Volatilité avant (%)',
+    'vol_apres': 'Volatilité après (%)',
+    'variation_vol': 'Variation de volatilité (%)',
+    'drawdown_max': 'Drawdown max après (%)',
+    'rendement_evenement': "Rendement sur l'événement (%)",
+}
+
+
+def load_events(path=EVENTS_FILE):
+    """Lit un catalogue : liste JSON, ou CSV label,debut,fin[,impact JSON]"""
+    if path.endswith('.csv'):
+        table = pd.read_csv(path, dtype=str, keep_default_na=False)
+        return [{'label': row['label'], 'debut': row['debut'], 'fin': row.get('fin') or None,
+                 'impact': json.loads(row['impact']) if row.get('impact') else {}}
+                for row in table.to_dict('records')]
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _nan_moments(values, axis):
+    """Moyenne et écart-type en ignorant les NaN (NaN si moins de deux valeurs)"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=axis)
+    total = np.where(valid, values, 0.0).sum(axis=axis)
+    squares = np.where(valid, values ** 2, 0.0).sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        variance = (squares - count * mean ** 2) / (count - 1)
+    return np.where(count > 0, mean, np.nan), np.where(count > 1, np.sqrt(np.maximum(variance, 0)), np.nan)
+
+
+class EventCatalog:
+    """Événements datés compilés en intervalles [début, fin] sur un calendrier"""
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.labels = [event['label'] for event in self.events]
+        self.starts = pd.DatetimeIndex([event['debut'] for event in self.events]).as_unit('ns')
+        self.ends = pd.DatetimeIndex([event.get('fin') for event in self.events]).as_unit('ns')
+        self._compiled = None
+
+    @classmethod
+    def load(cls, path=EVENTS_FILE):
+        return cls(load_events(path))
+
+    def __len__(self):
+        return len(self.events)
+
+    def bounds(self, dates):
+        """Indices [début, fin) de chaque événement dans un calendrier trié"""
+        values = pd.DatetimeIndex(dates).as_unit('ns').asi8
+        # Un événement sans fin court jusqu'à la fin des données
+        ends = np.where(self.ends.isna(), np.iinfo(np.int64).max, self.ends.asi8)
+        return np.searchsorted(values, self.starts.asi8, 'left'), np.searchsorted(values, ends, 'right')
+
+    def masks(self, dates):
+        """Matrice booléenne (événements × dates), compilée une fois par calendrier"""
+        dates = pd.DatetimeIndex(dates)
+        if self._compiled is None or not self._compiled[0].equals(dates):
+            lo, hi = self.bounds(dates)
+            rows = np.arange(len(dates))
+            self._compiled = (dates, (rows >= lo[:, None]) & (rows < hi[:, None]))
+        return self._compiled[1]
+
+    def impacts(self, symbols, categories):
+        """Multiplicateurs (événements × symboles) par symbole, catégorie ou '*'"""
+        factors = np.ones((len(self.events), len(symbols)))
+        for i, event in enumerate(self.events):
+            impact = event.get('impact') or {}
+            factors[i] = [impact.get(s, impact.get(c, impact.get('*', 1.0))) for s, c in zip(symbols, categories)]
+        return factors
+
+    def levels(self, dates, symbols, categories):
+        """Matrice (dates × symboles) des multiplicateurs de niveau cumulés des événements actifs"""
+        masks = self.masks(dates).astype(float)
+        return np.exp(masks.T @ np.log(self.impacts(symbols, categories)))
+
+
+class EventStudy:
+    """Rendements, volatilités et drawdowns autour de chaque événement, tous symboles en une passe"""
+
+    def __init__(self, prices, catalog, window=EVENT_WINDOW):
+        self.catalog = catalog
+        self.window = window
+        self.symbols = list(prices.columns)
+        self.dates = pd.DatetimeIndex(prices.index)
+        self.log_prices = np.log(prices.astype(float).to_numpy())
+        self.returns = np.vstack([np.full((1, len(self.symbols)), np.nan), np.diff(self.log_prices, axis=0)])
+
+    def _windows(self, values, offsets, starts):
+        """Valeurs aux dates début + décalage (événements × décalages × symboles), NaN hors historique"""
+        rows = starts[:, None] + offsets[None, :]
+        valid = (rows >= 0) & (rows < len(self.dates))
+        taken = values[np.clip(rows, 0, len(self.dates) - 1)]
+        taken[~valid] = np.nan
+        return taken
+
+    def run(self):
+        """Tableau long (événement × symbole) des mesures de STUDY_FIELDS"""
+        lo, hi = self.catalog.bounds(self.dates)
+        inside = lo < len(self.dates)
+        w = self.window
+        pre = self._windows(self.returns, np.arange(-w, 0), lo)
+        post = self._windows(self.returns, np.arange(0, w), lo)
+        pre_mean, pre_std = _nan_moments(pre, axis=1)
+        post_mean, post_std = _nan_moments(post, axis=1)
+
+        # Drawdown sur la fenêtre suivante, depuis la clôture de la veille de l'événement
+        path = self._windows(self.log_prices, np.arange(-1, w), lo)
+        drawdown = np.fmin.reduce(path - np.fmax.accumulate(path, axis=1), axis=1)
+
+        last = np.clip(hi - 1, 0, len(self.dates) - 1)
+        first = np.clip(lo - 1, 0, len(self.dates) - 1)
+        event_return = self.log_prices[last] - self.log_prices[first]
+
+        scale = np.sqrt(ANNUALIZATION) * 100
+        with np.errstate(invalid='ignore', divide='ignore'):
+            measures = {
+                'rendement_avant': pre_mean * 100,
+                'rendement_apres': post_mean * 100,
+                'vol_avant': pre_std * scale,
+                'vol_apres': post_std * scale,
+                'variation_vol': (post_std / pre_std - 1) * 100,
+                'drawdown_max': (np.exp(drawdown) - 1) * 100,
+                'rendement_evenement': (np.exp(event_return) - 1) * 100,
+            }
+        for values in measures.values():
+            values[~inside] = np.nan
+
+        n, k = len(self.catalog), len(self.symbols)
+        return pd.DataFrame({
+            'evenement': np.repeat(self.catalog.labels, k),
+            'debut': np.repeat(self.catalog.starts, k),
+            'symbole': np.tile(self.symbols, n),
+            **{field: values.reshape(n * k) for field, values in measures.items()},
+        })
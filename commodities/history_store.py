@@ -0,0 +1,117 @@
+# commodities/history_store.py
+"""Historique sur disque en colonnes .npy mappées en mémoire (un fichier par symbole et par champ)"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('ouverture', 'haut', 'bas', 'prix', 'volume', 'volatilite_jour')
+METADATA_FILE = 'metadata.json'
+
+
+class HistoryStore:
+    """Lecture partagée en lecture seule : les tranches de dates sont des vues sans copie"""
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, METADATA_FILE), encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self._arrays = {}
+
+    @classmethod
+    def write(cls, root, historical_data, fields=FIELDS):
+        """Écrit un historique au format long, de façon atomique, puis l'ouvre"""
+        parent = os.path.dirname(os.path.abspath(root))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix='.history-')
+
+        metadata = {'fields': list(fields), 'symbols': {}}
+        for symbole, data in historical_data.groupby('symbole', sort=False, observed=True):
+            data = data.sort_values('date', kind='stable')
+            directory = os.path.join(tmp, symbole)
+            os.makedirs(directory)
+            np.save(os.path.join(directory, 'date.npy'), data['date'].to_numpy(dtype='datetime64[ns]'))
+            for field in fields:
+                np.save(os.path.join(directory, f'{field}.npy'), data[field].to_numpy())
+            metadata['symbols'][symbole] = {
+                'nom': str(data['nom'].iloc[0]),
+                'categorie': str(data['categorie'].iloc[0]),
+                'lignes': len(data)
+            }
+        with open(os.path.join(tmp, METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        if os.path.exists(root):
+            old = root + '.old'
+            os.replace(root, old)
+            os.replace(tmp, root)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, root)
+        return cls(root)
+
+    @property
+    def symbols(self):
+        return list(self.metadata['symbols'])
+
+    @property
+    def fields(self):
+        return list(self.metadata['fields'])
+
+    @property
+    def version(self):
+        """Les fichiers écrits ne changent pas : un répertoire réécrit est rouvert par un nouveau stockage"""
+        return 0
+
+    def array(self, symbole, field):
+        """Colonne complète mappée en mémoire (ouverte une fois par processus)"""
+        key = (symbole, field)
+        if key not in self._arrays:
+            path = os.path.join(self.root, symbole, f'{field}.npy')
+            self._arrays[key] = np.load(path, mmap_mode='r')
+        return self._arrays[key]
+
+    def bounds(self, symbole, start=None, end=None):
+        """Indices [début, fin) couvrant l'intervalle de dates demandé"""
+        dates = self.array(symbole, 'date')
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns'), 'left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns'), 'right'))
+        return lo, hi
+
+    def slice(self, symbole, field, start=None, end=None):
+        """Vue sans copie d'un champ sur un intervalle de dates"""
+        lo, hi = self.bounds(symbole, start, end)
+        return self.array(symbole, field)[lo:hi]
+
+    def series(self, symbole, field='prix', start=None, end=None):
+        """Série pandas indexée par date (copie limitée à la tranche demandée)"""
+        lo, hi = self.bounds(symbole, start, end)
+        return pd.Series(self.array(symbole, field)[lo:hi], index=pd.DatetimeIndex(self.array(symbole, 'date')[lo:hi]),
+                         name=symbole)
+
+    def matrix(self, field='prix', symbols=None, start=None, end=None):
+        """Matrice (dates × symboles) d'un champ : seules les colonnes et tranches demandées sont lues"""
+        symbols = sorted(self.symbols) if symbols is None else list(symbols)
+        if not symbols:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='date'), columns=pd.Index([], name='symbole'))
+        matrix = pd.concat([self.series(symbole, field, start, end) for symbole in symbols], axis=1).sort_index()
+        matrix.index.name = 'date'
+        matrix.columns.name = 'symbole'
+        return matrix
+
+    def frame(self, symbols=None, start=None, end=None):
+        """Historique au format long du dashboard, limité aux symboles et dates demandés"""
+        frames = []
+        for symbole in symbols if symbols is not None else self.symbols:
+            lo, hi = self.bounds(symbole, start, end)
+            info = self.metadata['symbols'][symbole]
+            data = {'date': self.array(symbole, 'date')[lo:hi], 'symbole': symbole,
+                    'nom': info['nom'], 'categorie': info['categorie']}
+            data.update({field: self.array(symbole, field)[lo:hi] for field in self.metadata['fields']})
+            frames.append(pd.DataFrame(data))
+        if not frames:
+            return pd.DataFrame(columns=['date', 'symbole', 'nom', 'categorie', *self.metadata['fields']])
+        return pd.concat(frames, ignore_index=True).sort_values(['date'], kind='stable', ignore_index=True)
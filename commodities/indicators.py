@@ -0,0 +1,50 @@
+# commodities/indicators.py
+"""Indicateurs techniques et mesures de risque, indépendants de l'interface"""
+import numpy as np
+import pandas as pd
+
+# Barres journalières calendaires (l'historique inclut les week-ends) : base commune d'annualisation
+ANNUALIZATION = 365
+
+
+def calculate_rsi(prices, window=14):
+    """Calcule le RSI"""
+    delta = prices.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def calculate_bollinger_bands(prices, window=20, num_std=2):
+    """Calcule les bandes de Bollinger"""
+    rolling_mean = prices.rolling(window=window).mean()
+    rolling_std = prices.rolling(window=window).std()
+    upper_band = rolling_mean + (rolling_std * num_std)
+    lower_band = rolling_mean - (rolling_std * num_std)
+    return upper_band, lower_band
+
+
+def technical_indicators(prices):
+    """Prix, moyennes mobiles, RSI et bandes de Bollinger d'une série"""
+    prices = prices.astype(float)
+    data = pd.DataFrame({'prix': prices})
+    data['MA20'] = prices.rolling(window=20).mean()
+    data['MA50'] = prices.rolling(window=50).mean()
+    data['RSI'] = calculate_rsi(prices)
+    data['Bollinger_High'], data['Bollinger_Low'] = calculate_bollinger_bands(prices)
+    return data
+
+
+def risk_metrics(prices, confidence=0.95):
+    """Volatilité, VaR historique, drawdown maximal et performance par symbole (dates × symboles)"""
+    prices = prices.astype(float)
+    returns = prices.pct_change().iloc[1:]
+    drawdown = prices / prices.cummax() - 1
+    return pd.DataFrame({
+        'Volatilité annualisée (%)': returns.std() * np.sqrt(ANNUALIZATION) * 100,
+        f'VaR {confidence:.0%} journalière (%)': -returns.quantile(1 - confidence) * 100,
+        'Drawdown max (%)': drawdown.min() * 100,
+        'Performance (%)': (prices.iloc[-1] / prices.iloc[0] - 1) * 100,
+    }).rename_axis('symbole')
@@ -0,0 +1,101 @@
+# commodities/indices.py
+"""Indices de paniers pondérés (catégories et paniers personnalisés), mis à jour de façon incrémentale"""
+import numpy as np
+import pandas as pd
+
+BASE_LEVEL = 100.0
+
+
+def category_baskets(commodities):
+    """Un panier équipondéré par catégorie"""
+    baskets = {}
+    for symbole, info in commodities.items():
+        baskets.setdefault(f"Indice {info['categorie']}", {})[symbole] = 1.0
+    return baskets
+
+
+def parse_weights(text):
+    """Lit des pondérations saisies sous la forme 'GOLD:2, SILVER:1'"""
+    weights = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        symbole, _, weight = item.partition(':')
+        weights[symbole.strip().upper()] = float(weight) if weight.strip() else 1.0
+    return weights
+
+
+class BasketIndexEngine:
+    """Historique par un produit matrice-vecteur, puis mise à jour par poids × variation de prix"""
+
+    def __init__(self, prices, baskets, base_level=BASE_LEVEL):
+        self.prices = prices.astype(float).ffill().bfill()
+        self.symbols = list(self.prices.columns)
+        self.positions = {symbole: j for j, symbole in enumerate(self.symbols)}
+        self.base_level = base_level
+        self.names = []
+        self.weights = {}
+        self.quantities = np.zeros((len(self.symbols), 0))
+        self.history = pd.DataFrame(index=self.prices.index)
+        self.last_prices = self.prices.iloc[-1].to_numpy().copy()
+        self.levels = np.zeros(0)
+        for name, weights in baskets.items():
+            self.define(name, weights)
+
+    def define(self, name, weights, label=None):
+        """Ajoute ou remplace un panier : quantités fixées pour valoir `base_level` à la première date"""
+        label = name if label is None else label
+        requested = dict(weights)
+        weights = {s: w for s, w in weights.items() if s in self.positions and w}
+        if not weights:
+            raise ValueError(f"Panier {label} sans symbole connu")
+        total = sum(weights.values())
+        if abs(total) < 1e-12:
+            raise ValueError(f"Panier {label} : la somme des pondérations est nulle")
+        first = self.prices.iloc[0]
+        column = np.zeros(len(self.symbols))
+        for symbole, weight in weights.items():
+            column[self.positions[symbole]] = self.base_level * weight / total / first[symbole]
+
+        self.weights[name] = requested
+        if name in self.names:
+            i = self.names.index(name)
+            self.quantities[:, i] = column
+        else:
+            self.names.append(name)
+            self.quantities = np.column_stack([self.quantities, column])
+            i = len(self.names) - 1
+
+        # Historique du nouveau panier seulement, niveau courant aux derniers prix connus
+        self.history[name] = self.prices.to_numpy() @ column
+        self.levels = np.resize(self.levels, len(self.names))
+        self.levels[i] = self.last_prices @ column
+
+    def remove(self, name):
+        """Retire un panier (historique, quantités et niveau courant)"""
+        i = self.names.index(name)
+        del self.names[i]
+        del self.weights[name]
+        self.quantities = np.delete(self.quantities, i, axis=1)
+        self.levels = np.delete(self.levels, i)
+        self.history = self.history.drop(columns=name)
+
+    def update(self, prices):
+        """Applique un tick {symbole: prix} en O(symboles modifiés × paniers)"""
+        for symbole, prix in prices.items():
+            j = self.positions.get(symbole)
+            if j is None:
+                continue
+            delta = float(prix) - self.last_prices[j]
+            if delta:
+                self.levels += self.quantities[j] * delta
+                self.last_prices[j] = float(prix)
+        return self.latest()
+
+    def latest(self):
+        """Niveaux courants des indices"""
+        return pd.Series(self.levels.copy(), index=self.names)
+
+    def previous_close(self):
+        """Niveaux à la clôture précédente : la dernière date de l'historique, la séance en cours n'y figurant pas"""
+        return self.history.iloc[-1]
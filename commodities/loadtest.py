@@ -0,0 +1,205 @@
+# commodities/loadtest.py
+"""Test de charge hors ligne : N sessions simulées du dashboard, latences des réexécutions, CPU et mémoire
+
+    python -m commodities.loadtest --sessions 1 2 4 8 16 --duration 60 --output charge
+"""
+import argparse
+import os
+import resource
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Dashboard.py')
+# Actions utilisateur et leur fréquence relative ; le rafraîchissement automatique suit son propre rythme
+ACTIONS = {'onglet': 0.4, 'selection': 0.4, 'filtre': 0.2}
+THINK_TIME = 5.0
+REFRESH_INTERVAL = 10.0
+RUN_TIMEOUT = 300
+PERCENTILES = (50, 95, 99)
+
+
+def rss_bytes():
+    """Mémoire résidente courante du processus (Linux)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def main_tabs(app):
+    """Libellés des onglets principaux (premier groupe d'onglets de la page)"""
+    for node in app.main.children.values():
+        if getattr(node, 'type', None) == 'tab_container':
+            return [tab.label for tab in node.children.values()]
+    return []
+
+
+class SimulatedSession:
+    """Une session du dashboard pilotée par AppTest : actions aléatoires entre des temps de réflexion"""
+
+    def __init__(self, number, runner_lock, seed=0, think_time=THINK_TIME, refresh=REFRESH_INTERVAL):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.lock = runner_lock
+        self.rng = np.random.default_rng([seed, number])
+        self.think_time = think_time
+        self.refresh = refresh
+        self.app = AppTest.from_file(DASHBOARD, default_timeout=RUN_TIMEOUT)
+        self.tabs = []
+        self.records = []
+
+    def _apply(self, action):
+        app = self.app
+        if action == 'onglet' and self.tabs:
+            app.session_state['onglet'] = self.tabs[self.rng.integers(len(self.tabs))]
+        elif action == 'selection':
+            # AppTest ne voit que les libellés : les listes à format_func (valeur ≠ libellé) sont ignorées
+            widgets = [widget for widget in app.selectbox if str(widget.value) in widget.options]
+            if widgets:
+                widget = widgets[int(self.rng.integers(len(widgets)))]
+                widget.select_index(int(self.rng.integers(len(widget.options))))
+        elif action == 'filtre' and len(app.sidebar.multiselect):
+            widget = app.sidebar.multiselect[0]
+            keep = self.rng.random(len(widget.options)) < 0.7
+            keep[self.rng.integers(len(keep))] = True
+            widget.set_value([option for option, kept in zip(widget.options, keep) if kept])
+
+    def run(self, action):
+        """Applique une action puis réexécute le script ; la latence inclut l'attente du moteur de scripts"""
+        requested = time.perf_counter()
+        with self.lock:
+            started = time.perf_counter()
+            try:
+                self._apply(action)
+                self.app.run()
+                errors = len(self.app.exception)
+            except Exception:
+                # Une réexécution qui échoue compte comme erreur sans arrêter la session
+                errors = 1
+            finished = time.perf_counter()
+            if not self.tabs:
+                self.tabs = main_tabs(self.app)
+        self.records.append({'session': self.number, 'action': action, 'latence': finished - requested,
+                             'execution': finished - started, 'erreurs': errors})
+
+    def loop(self, stop):
+        """Alterne rafraîchissements périodiques et actions utilisateur jusqu'à l'arrêt"""
+        now = time.perf_counter()
+        next_refresh = now + self.refresh
+        next_action = now + self.rng.exponential(self.think_time)
+        while True:
+            due = min(next_refresh, next_action)
+            if stop.wait(max(due - time.perf_counter(), 0)):
+                return
+            if next_refresh <= next_action:
+                self.run('rafraichissement')
+                next_refresh += self.refresh
+            else:
+                actions = list(ACTIONS)
+                self.run(actions[self.rng.choice(len(actions), p=list(ACTIONS.values()))])
+                next_action = time.perf_counter() + self.rng.exponential(self.think_time)
+
+
+def run_level(count, duration, runner_lock, seed=0, think_time=THINK_TIME, refresh=REFRESH_INTERVAL):
+    """Mesure un palier de `count` sessions simultanées pendant `duration` secondes"""
+    sessions = [SimulatedSession(i, runner_lock, seed, think_time, refresh) for i in range(count)]
+    for session in sessions:
+        session.run('ouverture')
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=session.loop, args=(stop,), daemon=True) for session in sessions]
+    cpu, wall, rss = os.times(), time.perf_counter(), rss_bytes()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    cpu_end, elapsed = os.times(), time.perf_counter() - wall
+
+    records = pd.DataFrame([r for s in sessions for r in s.records])
+    reruns = records[records['action'] != 'ouverture']
+    latencies = reruns['latence'].to_numpy() * 1000
+    row = {'sessions': count, 'reexecutions': len(reruns),
+           'debit_par_s': len(reruns) / elapsed,
+           'ouverture_ms': records.loc[records['action'] == 'ouverture', 'latence'].mean() * 1000,
+           'execution_ms': reruns['execution'].mean() * 1000 if len(reruns) else np.nan}
+    for p in PERCENTILES:
+        row[f'p{p}_ms'] = np.percentile(latencies, p) if len(latencies) else np.nan
+    row.update({
+        'cpu_pct': ((cpu_end.user - cpu.user) + (cpu_end.system - cpu.system)) / elapsed * 100,
+        'rss_mo': rss_bytes() / 1e6,
+        'rss_delta_mo': (rss_bytes() - rss) / 1e6,
+        'rss_max_mo': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        'erreurs': int(records['erreurs'].sum()),
+    })
+    return row, records
+
+
+def plot_report(results, path):
+    """Courbes de montée en charge : percentiles de latence, CPU et mémoire par nombre de sessions"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 4.5))
+    for p in PERCENTILES:
+        ax1.plot(results['sessions'], results[f'p{p}_ms'], marker='o', label=f'p{p}')
+    ax1.set_title('Latence des réexécutions (ms)')
+    ax1.set_xlabel('Sessions')
+    ax1.legend()
+    ax2.plot(results['sessions'], results['cpu_pct'], marker='o', color='purple')
+    ax2.set_title('CPU du processus (%)')
+    ax2.set_xlabel('Sessions')
+    ax3.plot(results['sessions'], results['rss_mo'], marker='o', color='green')
+    ax3.set_title('Mémoire résidente (Mo)')
+    ax3.set_xlabel('Sessions')
+    for ax in (ax1, ax2, ax3):
+        ax.grid(alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=110)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du dashboard par sessions simulées")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--duration', type=float, default=60.0, help="Durée de chaque palier (s)")
+    parser.add_argument('--think-time', type=float, default=THINK_TIME,
+                        help="Temps moyen entre deux actions d'une session (s)")
+    parser.add_argument('--refresh', type=float, default=REFRESH_INTERVAL,
+                        help="Intervalle du rafraîchissement automatique (s)")
+    parser.add_argument('--output', default='charge')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Le rafraîchissement est rythmé par le banc de test, pas par le script
+    os.environ['COMMODITIES_REFRESH'] = '0'
+    os.makedirs(args.output, exist_ok=True)
+
+    # AppTest s'appuie sur un runtime unique par processus : les scripts s'exécutent l'un après l'autre,
+    # comme des sessions Streamlit dont le code Python se dispute le GIL ; l'attente entre dans la latence
+    runner_lock = threading.Lock()
+    rows, records = [], []
+    for count in args.sessions:
+        row, detail = run_level(count, args.duration, runner_lock, args.seed, args.think_time, args.refresh)
+        rows.append(row)
+        records.append(detail.assign(palier=count))
+        print(f"{count:>4} sessions : p50 {row['p50_ms']:.0f} ms, p95 {row['p95_ms']:.0f} ms, "
+              f"p99 {row['p99_ms']:.0f} ms, CPU {row['cpu_pct']:.0f}%, RSS {row['rss_mo']:.0f} Mo, "
+              f"{row['erreurs']} erreur(s)")
+
+    results = pd.DataFrame(rows)
+    results.to_csv(os.path.join(args.output, 'montee_en_charge.csv'), index=False)
+    pd.concat(records, ignore_index=True).to_csv(os.path.join(args.output, 'reexecutions.csv'), index=False)
+    plot_report(results, os.path.join(args.output, 'montee_en_charge.png'))
+    print(f"Rapport écrit dans {args.output}/")
+
+
+if __name__ == '__main__':
+    main()
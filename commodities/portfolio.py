@@ -0,0 +1,225 @@
+# commodities/portfolio.py
+"""Portefeuille de positions sur tableaux : valorisation par produit scalaire, PnL par catégorie et VaR
+
+    python -m commodities.portfolio --positions 5000 --ticks 100000
+"""
+import argparse
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Taille des contrats futures de référence, en unités de cotation (barils, onces, livres, boisseaux)
+CONTRACT_MULTIPLIERS = {
+    'BRENT': 1000,
+    'WTI': 1000,
+    'GOLD': 100,
+    'SILVER': 5000,
+    'COPPER': 25000,
+    'WHEAT': 5000,
+    'CORN': 5000,
+    'SOYBEANS': 5000,
+    'COFFEE': 37500,
+}
+DEFAULT_CONFIDENCE = 0.99
+INITIAL_CAPACITY = 1024
+
+
+def z_score(confidence):
+    """Quantile de la loi normale pour un niveau de confiance"""
+    return NormalDist().inv_cdf(confidence)
+
+
+class Portfolio:
+    """Positions en tableaux contigus, agrégées par symbole : valoriser le livre coûte un produit scalaire"""
+
+    def __init__(self, commodities, multipliers=None, capacity=INITIAL_CAPACITY):
+        self.symbols = list(commodities)
+        self.positions = {symbole: j for j, symbole in enumerate(self.symbols)}
+        self.multipliers = multipliers or {}
+        self.categories = sorted({info['categorie'] for info in commodities.values()})
+        self.category_index = np.array([self.categories.index(commodities[s]['categorie']) for s in self.symbols])
+
+        # Une ligne par position (tampon à capacité doublée)
+        self._symbol = np.zeros(capacity, dtype=np.int32)
+        self._quantity = np.zeros(capacity)
+        self._multiplier = np.zeros(capacity)
+        self._entry = np.zeros(capacity)
+        self.length = 0
+
+        # Agrégats par symbole : unités détenues et coût d'entrée
+        self.exposure = np.zeros(len(self.symbols))
+        self.cost = np.zeros(len(self.symbols))
+        self.last_prices = np.full(len(self.symbols), np.nan)
+        self.value = 0.0
+
+    def __len__(self):
+        return self.length
+
+    def _grow(self, needed):
+        capacity = len(self._symbol)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == len(self._symbol):
+            return
+        for name in ('_symbol', '_quantity', '_multiplier', '_entry'):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:self.length] = old[:self.length]
+            setattr(self, name, grown)
+
+    def add_many(self, symbols, quantities, entry_prices, multipliers=None):
+        """Ajoute un lot de positions ; le multiplicateur par défaut est la taille de contrat du symbole"""
+        unknown = sorted(set(symbols) - set(self.positions))
+        if unknown:
+            raise ValueError(f"Symboles inconnus: {', '.join(unknown)}")
+        index = np.array([self.positions[s] for s in symbols], dtype=np.int32)
+        quantities = np.asarray(quantities, dtype=float)
+        entry_prices = np.asarray(entry_prices, dtype=float)
+        if multipliers is None:
+            multipliers = [self.multipliers.get(s, 1.0) for s in symbols]
+        multipliers = np.asarray(multipliers, dtype=float)
+
+        start, stop = self.length, self.length + len(index)
+        self._grow(stop)
+        self._symbol[start:stop] = index
+        self._quantity[start:stop] = quantities
+        self._multiplier[start:stop] = multipliers
+        self._entry[start:stop] = entry_prices
+        self.length = stop
+
+        units = quantities * multipliers
+        self.exposure += np.bincount(index, weights=units, minlength=len(self.symbols))
+        self.cost += np.bincount(index, weights=units * entry_prices, minlength=len(self.symbols))
+        return self
+
+    def add(self, symbole, quantity, entry_price, multiplier=None):
+        """Ajoute une position (quantité négative : vente)"""
+        return self.add_many([symbole], [quantity], [entry_price], None if multiplier is None else [multiplier])
+
+    def mark(self, prices):
+        """Valorise tout le livre sur un tableau de prix aligné sur `symbols` ; retourne le PnL"""
+        self.last_prices = prices
+        self.value = self.exposure @ prices
+        return self.value - self.cost.sum()
+
+    def update(self, prices):
+        """Applique un tick {symbole: prix} puis revalorise le livre (premiers prix : tous les symboles détenus)"""
+        last = self.last_prices.copy()
+        for symbole, prix in prices.items():
+            j = self.positions.get(symbole)
+            if j is not None:
+                last[j] = prix
+        missing = np.isnan(last) & (self.exposure != 0)
+        if missing.any():
+            symbols = ', '.join(np.array(self.symbols)[missing])
+            raise ValueError(f"Livre non valorisé, prix inconnus: {symbols} (appeler mark() d'abord)")
+        # Les symboles sans position peuvent rester sans prix : ils ne comptent pas dans la valorisation
+        pnl = self.mark(np.where(np.isnan(last), 0.0, last))
+        self.last_prices = last
+        return pnl
+
+    def pnl(self):
+        return self.value - self.cost.sum()
+
+    def dollar_exposure(self):
+        """Exposition en dollars par symbole aux derniers prix"""
+        return pd.Series(self.exposure * self.last_prices, index=self.symbols)
+
+    def pnl_by_category(self):
+        """PnL latent par catégorie"""
+        pnl = np.where(self.exposure != 0, self.exposure * self.last_prices, 0.0) - self.cost
+        return pd.Series(np.bincount(self.category_index, weights=pnl, minlength=len(self.categories)),
+                         index=self.categories, name='pnl')
+
+    def frame(self):
+        """Positions individuelles avec leur PnL latent"""
+        index = self._symbol[:self.length]
+        quantity = self._quantity[:self.length]
+        multiplier = self._multiplier[:self.length]
+        entry = self._entry[:self.length]
+        prices = self.last_prices[index]
+        return pd.DataFrame({
+            'symbole': np.array(self.symbols)[index],
+            'categorie': np.array(self.categories)[self.category_index[index]],
+            'quantite': quantity,
+            'multiplicateur': multiplier,
+            'prix_entree': entry,
+            'prix': prices,
+            'valeur': quantity * multiplier * prices,
+            'pnl': quantity * multiplier * (prices - entry),
+        })
+
+    def _risk_inputs(self, covariance):
+        exposure = self.dollar_exposure().reindex(covariance.index).fillna(0.0).to_numpy()
+        sigma = covariance.to_numpy()
+        return exposure, sigma, sigma @ exposure
+
+    def var(self, covariance, confidence=DEFAULT_CONFIDENCE, horizon=1):
+        """VaR paramétrique : z × √(eᵀΣe) × √horizon, Σ covariance des rendements journaliers"""
+        exposure, _, marginal = self._risk_inputs(covariance)
+        return z_score(confidence) * np.sqrt(max(exposure @ marginal, 0.0) * horizon)
+
+    def var_by_category(self, covariance, confidence=DEFAULT_CONFIDENCE, horizon=1):
+        """Contributions à la VaR par catégorie (VaR composantes, leur somme est la VaR totale)"""
+        exposure, _, marginal = self._risk_inputs(covariance)
+        volatility = np.sqrt(max(exposure @ marginal, 0.0))
+        if not volatility:
+            return pd.Series(0.0, index=self.categories, name='var')
+        components = z_score(confidence) * np.sqrt(horizon) * exposure * marginal / volatility
+        categories = pd.Series(self.category_index, index=self.symbols).reindex(covariance.index).to_numpy()
+        return pd.Series(np.bincount(categories, weights=components, minlength=len(self.categories)),
+                         index=self.categories, name='var')
+
+    def hedges(self, covariance, confidence=DEFAULT_CONFIDENCE, horizon=1):
+        """Couverture à variance minimale du livre par chaque instrument, et VaR résiduelle"""
+        exposure, sigma, marginal = self._risk_inputs(covariance)
+        variances = np.diag(sigma)
+        notional = marginal / variances
+        residual = np.maximum(exposure @ marginal - marginal ** 2 / variances, 0.0)
+        prices = pd.Series(self.last_prices, index=self.symbols).reindex(covariance.index).to_numpy()
+        sizes = np.array([self.multipliers.get(s, 1.0) for s in covariance.index])
+        return pd.DataFrame({
+            'notionnel_a_vendre': notional,
+            'contrats_a_vendre': notional / (prices * sizes),
+            'var_residuelle': z_score(confidence) * np.sqrt(residual * horizon),
+        }, index=covariance.index.rename('instrument')).sort_values('var_residuelle')
+
+
+def random_book(commodities, prices, size, seed=0):
+    """Livre aléatoire de `size` positions autour des prix donnés"""
+    rng = np.random.default_rng(seed)
+    symbols = np.array(list(commodities))[rng.integers(0, len(commodities), size)]
+    base = pd.Series(prices).reindex(symbols).to_numpy()
+    portfolio = Portfolio(commodities, CONTRACT_MULTIPLIERS, capacity=size)
+    portfolio.add_many(list(symbols), rng.integers(-50, 51, size), base * rng.uniform(0.9, 1.1, size))
+    return portfolio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure de la valorisation du portefeuille par tick")
+    parser.add_argument('--positions', type=int, default=5000)
+    parser.add_argument('--ticks', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    from .catalog import COMMODITIES
+
+    prices = {symbole: info['prix_base'] for symbole, info in COMMODITIES.items()}
+    started = time.perf_counter()
+    portfolio = random_book(COMMODITIES, prices, args.positions)
+    built = time.perf_counter() - started
+
+    rng = np.random.default_rng(1)
+    base = np.array([prices[s] for s in portfolio.symbols])
+    ticks = base * np.exp(np.cumsum(rng.normal(0, 1e-4, (args.ticks, len(base))), axis=0))
+    started = time.perf_counter()
+    for row in ticks:
+        portfolio.mark(row)
+    elapsed = time.perf_counter() - started
+    print(f"{len(portfolio)} positions construites en {built * 1e3:.1f} ms, "
+          f"valorisation: {elapsed / args.ticks * 1e6:.2f} µs par tick, PnL final: {portfolio.pnl():,.0f} USD")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# commodities/report.py
+"""Export de rapports hors interface (HTML, PDF, Parquet) avec rendu des figures en parallèle
+
+    python -m commodities.report --symbols BRENT GOLD WHEAT --start 2024-01-01 --output rapports
+"""
+import argparse
+import base64
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from .catalog import COMMODITIES
+from .data_sources import SimulatedMarketSource
+from .history_store import HistoryStore
+from .indicators import risk_metrics, technical_indicators
+from .schema import compact_historical, wide_matrix
+
+FORMATS = ('html', 'pdf', 'parquet')
+
+
+def load_history(history_dir=None, seed=42, commodities=COMMODITIES):
+    """Historique depuis le stockage disque s'il existe, sinon depuis le simulateur"""
+    if history_dir:
+        return compact_historical(HistoryStore(history_dir).frame())
+    return compact_historical(SimulatedMarketSource(seed=seed).historical_data(commodities))
+
+
+def _figure_png(fig, dpi):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_symbol(task):
+    """Calcule les indicateurs d'un symbole et rend sa figure technique (exécuté dans un processus)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    symbole, nom, dates, prices, start, end, dpi = task
+    # Indicateurs calculés sur tout l'historique puis tronqués : pas de période de chauffe dans le rapport
+    data = technical_indicators(pd.Series(prices, index=pd.DatetimeIndex(dates))).loc[start:end]
+
+    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, sharex=True, figsize=(11, 8),
+                                        gridspec_kw={'height_ratios': [2, 1, 1]})
+    ax1.plot(data.index, data['prix'], color='#0055A4', label='Prix')
+    ax1.plot(data.index, data['MA20'], color='orange', label='MM20')
+    ax1.plot(data.index, data['MA50'], color='red', label='MM50')
+    ax1.set_title(f"Analyse Technique - {symbole} ({nom})")
+    ax1.legend(loc='upper left')
+    ax2.plot(data.index, data['prix'], color='#0055A4')
+    ax2.fill_between(data.index, data['Bollinger_Low'], data['Bollinger_High'], color='gray', alpha=0.3)
+    ax2.set_title('Bandes de Bollinger')
+    ax3.plot(data.index, data['RSI'], color='purple')
+    ax3.axhline(70, color='red', linestyle='--')
+    ax3.axhline(30, color='green', linestyle='--')
+    ax3.set_title('RSI')
+    png = _figure_png(fig, dpi)
+    plt.close(fig)
+
+    return symbole, png, data.reset_index(names='date').assign(symbole=symbole)
+
+
+def render_overview(prices, dpi=100):
+    """Figure de synthèse : prix rebasés et performance relative"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    rebased = prices / prices.bfill().iloc[0] * 100
+    performance = (prices.iloc[-1] / prices.bfill().iloc[0] - 1) * 100
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(11, 8))
+    rebased.plot(ax=ax1, legend=len(prices.columns) <= 20)
+    ax1.set_title('Évolution des Prix (base 100)')
+    performance.sort_values().plot.bar(ax=ax2, color=np.where(performance.sort_values() >= 0, '#28a745', '#dc3545'))
+    ax2.set_title('Performance sur la période (%)')
+    png = _figure_png(fig, dpi)
+    plt.close(fig)
+    return png
+
+
+def write_html(path, title, overview_png, risk, figures):
+    """Rapport HTML statique, images intégrées"""
+    def img(png):
+        return f'<img src="data:image/png;base64,{base64.b64encode(png).decode()}" style="max-width: 100%;">'
+
+    sections = ''.join(
+        f'<h3>{escape(symbole)}</h3>{img(png)}' for symbole, png in figures.items()
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            '<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f'<title>{escape(title)}</title>'
+            '<style>body { font-family: sans-serif; margin: 2rem; } '
+            'h1, h2 { color: #0055A4; } table { border-collapse: collapse; } '
+            'td, th { padding: 0.3rem 0.8rem; border-bottom: 1px solid #ddd; text-align: right; }</style>'
+            f'</head><body><h1>🛢️ {escape(title)}</h1>'
+            f'<h2>📈 Vue d\'ensemble</h2>{img(overview_png)}'
+            f'<h2>⚠️ Risques</h2>{risk.to_html(float_format="{:.2f}".format)}'
+            f'<h2>🔬 Analyse technique</h2>{sections}'
+            '</body></html>'
+        )
+
+
+def write_pdf(path, title, overview_png, risk, figures):
+    """Rapport PDF multipage assemblé à partir des figures rendues"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    def image_page(pdf, png):
+        fig = plt.figure(figsize=(11, 8.5))
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.imshow(plt.imread(io.BytesIO(png)))
+        ax.axis('off')
+        pdf.savefig(fig)
+        plt.close(fig)
+
+    with PdfPages(path) as pdf:
+        image_page(pdf, overview_png)
+        fig, ax = plt.subplots(figsize=(11, 8.5))
+        ax.axis('off')
+        ax.set_title(f"{title} - Risques")
+        rows = risk.round(2)
+        table = ax.table(cellText=rows.values, rowLabels=rows.index, colLabels=rows.columns, loc='upper center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(8)
+        pdf.savefig(fig)
+        plt.close(fig)
+        for png in figures.values():
+            image_page(pdf, png)
+
+
+def build_report(output, symbols=None, start=None, end=None, formats=FORMATS, workers=None,
+                 history=None, dpi=100):
+    """Construit les vues du dashboard pour une liste de symboles et une période, sans Streamlit"""
+    history = load_history() if history is None else history
+    symbols = symbols or list(pd.unique(history['symbole'].astype(str)))
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    known = set(history['symbole'].astype(str))
+    unknown = [s for s in symbols if s not in known]
+    if unknown:
+        raise ValueError(f"Symboles inconnu(e)s: {', '.join(unknown)}")
+    data = history[history['symbole'].isin(symbols)]
+    full_prices = wide_matrix(data)[list(symbols)]
+    prices = full_prices.loc[start:end]
+    if prices.empty:
+        debut = f"{start:%Y-%m-%d}" if start is not None else "le début"
+        fin = f"{end:%Y-%m-%d}" if end is not None else "la fin"
+        raise ValueError(f"Aucune donnée entre {debut} et {fin} de l'historique")
+    if start is not None:
+        data = data[data['date'] >= start]
+    if end is not None:
+        data = data[data['date'] <= end]
+    noms = data.groupby('symbole', observed=True)['nom'].first()
+    noms.index = noms.index.astype(str)
+
+    os.makedirs(output, exist_ok=True)
+    title = f"Rapport Commodities {prices.index[0]:%Y-%m-%d} → {prices.index[-1]:%Y-%m-%d}"
+    tasks = [
+        (symbole, str(noms[symbole]), full_prices.index.values, full_prices[symbole].to_numpy(), start, end, dpi)
+        for symbole in prices.columns
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(render_symbol, tasks))
+    figures = {symbole: png for symbole, png, _ in results}
+    indicators = pd.concat([frame for _, _, frame in results], ignore_index=True)
+    risk = risk_metrics(prices)
+    overview_png = render_overview(prices, dpi)
+
+    paths = {}
+    if 'html' in formats:
+        paths['html'] = os.path.join(output, 'rapport.html')
+        write_html(paths['html'], title, overview_png, risk, figures)
+    if 'pdf' in formats:
+        paths['pdf'] = os.path.join(output, 'rapport.pdf')
+        write_pdf(paths['pdf'], title, overview_png, risk, figures)
+    if 'parquet' in formats:
+        extracts = {
+            'historique': data.reset_index(drop=True),
+            'indicateurs': indicators,
+            'risques': risk.reset_index(),
+        }
+        for name, frame in extracts.items():
+            paths[f'parquet:{name}'] = os.path.join(output, f'{name}.parquet')
+            frame.to_parquet(paths[f'parquet:{name}'], index=False)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export de rapports du Dashboard Commodities")
+    parser.add_argument('--symbols', nargs='*', help="Symboles (tous par défaut)")
+    parser.add_argument('--start', help="Date de début (AAAA-MM-JJ)")
+    parser.add_argument('--end', help="Date de fin (AAAA-MM-JJ)")
+    parser.add_argument('--output', default=os.path.join('rapports', datetime.now().strftime('%Y-%m-%d')))
+    parser.add_argument('--formats', nargs='*', default=list(FORMATS), choices=FORMATS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--history-dir', help="Historique mappé en mémoire (COMMODITIES_HISTORY_DIR)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    history = load_history(args.history_dir or os.environ.get('COMMODITIES_HISTORY_DIR'), args.seed)
+    try:
+        paths = build_report(args.output, args.symbols, args.start, args.end, args.formats,
+                             args.workers, history, args.dpi)
+    except ValueError as e:
+        parser.error(str(e))
+    for kind, path in paths.items():
+        print(f"{kind}: {path}")
+    print(f"Rapport généré en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# commodities/schema.py
+"""Schéma compact des données : codes catégoriels, float32 et table de métadonnées séparée"""
+import pandas as pd
+
+HISTORICAL_DTYPES = {
+    'symbole': 'category',
+    'nom': 'category',
+    'categorie': 'category',
+    'ouverture': 'float32',
+    'haut': 'float32',
+    'bas': 'float32',
+    'prix': 'float32',
+    'volume': 'float32',
+    'volatilite_jour': 'float32',
+}
+
+# Les colonnes mises à jour à chaque tick restent en float64
+CURRENT_DTYPES = {
+    'symbole': 'category',
+    'categorie': 'category',
+    'volatilite': 'float32',
+    'spread': 'float32',
+}
+
+METADATA_COLUMNS = ['nom', 'icone', 'unite', 'production_mondiale', 'reserves',
+                    'pays_producteurs', 'description']
+
+
+def metadata_table(commodities):
+    """Table des caractéristiques statiques, indexée par symbole"""
+    table = pd.DataFrame.from_dict(commodities, orient='index')
+    table.index.name = 'symbole'
+    return table[[c for c in METADATA_COLUMNS if c in table.columns]]
+
+
+def apply_dtypes(data, dtypes):
+    """Convertit les colonnes présentes selon le schéma"""
+    return data.astype({c: t for c, t in dtypes.items() if c in data.columns})
+
+
+def compact_historical(data):
+    """Historique avec identifiants catégoriels et mesures en float32"""
+    return apply_dtypes(data, HISTORICAL_DTYPES)
+
+
+def compact_current(data):
+    """Données courantes sans métadonnées statiques, identifiants catégoriels"""
+    data = data.drop(columns=[c for c in METADATA_COLUMNS if c in data.columns])
+    return apply_dtypes(data, CURRENT_DTYPES)
+
+
+def with_metadata(data, metadata, columns):
+    """Joint à la demande des colonnes de la table de métadonnées"""
+    extra = metadata[columns].reindex(data['symbole'].astype(str))
+    extra.index = data.index
+    return pd.concat([data, extra], axis=1)
+
+
+def frame_memory(data):
+    """Empreinte mémoire complète d'un DataFrame (octets)"""
+    return int(data.memory_usage(deep=True).sum())
+
+
+def memory_report(stats):
+    """Rapport avant/après à partir de {nom: (octets_avant, octets_après)}"""
+    report = pd.DataFrame.from_dict(stats, orient='index', columns=['avant', 'apres'])
+    report.index.name = 'table'
+    report['reduction'] = report['avant'] / report['apres']
+    return report
+
+
+def wide_matrix(data, field='prix'):
+    """Matrice (dates × symboles) d'un champ de l'historique au format long"""
+    matrix = data.pivot(index='date', columns='symbole', values=field)
+    matrix.columns = matrix.columns.astype(str)
+    matrix.columns.name = 'symbole'
+    return matrix
@@ -0,0 +1,133 @@
+# commodities/seasonality.py
+"""Saisonnalité : profils jour/mois de l'année et décomposition tendance/saison/résidu, tous symboles à la fois"""
+import numpy as np
+import pandas as pd
+
+PERIOD = 365
+DAYS_PER_MONTH = 365.25 / 12
+MONTHS = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
+
+
+def centered_mean(values, window):
+    """Moyenne mobile centrée par sommes cumulées, fenêtre tronquée aux bords (temps × symboles)"""
+    n = len(values)
+    cumsum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    half = window // 2
+    lo = np.clip(np.arange(n) - half, 0, n)
+    hi = np.clip(np.arange(n) + window - half, 0, n)
+    return (cumsum[hi] - cumsum[lo]) / (hi - lo)[:, None]
+
+
+def circular_smooth(profile, window):
+    """Lissage circulaire d'un profil annuel (la fin de décembre rejoint début janvier)"""
+    if window <= 1:
+        return profile
+    half = window // 2
+    padded = np.concatenate([profile[-half:], profile, profile[:window - half - 1]])
+    return centered_mean(padded, window)[half:half + len(profile)]
+
+
+def grouped_mean(values, groups, size):
+    """Moyenne par groupe pour toutes les colonnes en une réduction (NaN ignorés)"""
+    valid = ~np.isnan(values)
+    sums = np.zeros((size, values.shape[1]))
+    counts = np.zeros((size, values.shape[1]))
+    np.add.at(sums, groups, np.where(valid, values, 0.0))
+    np.add.at(counts, groups, valid)
+    with np.errstate(invalid='ignore'):
+        return sums / counts
+
+
+class SeasonalityEngine:
+    """Sommes de rendements par jour et par mois de l'année, mises à jour en O(nouveaux jours)"""
+
+    def __init__(self, prices, period=PERIOD, smooth=15):
+        self.period = period
+        self.smooth = smooth
+        self.symbols = list(prices.columns)
+        k = len(self.symbols)
+        self.doy_sums = np.zeros((366, k))
+        self.doy_counts = np.zeros((366, k))
+        self.month_sums = np.zeros((12, k))
+        self.month_counts = np.zeros((12, k))
+        self.log_prices = np.empty((0, k))
+        self.dates = pd.DatetimeIndex([])
+        self._decomposition = None
+        self.append(prices)
+
+    def append(self, prices):
+        """Ajoute de nouvelles dates : seuls leurs rendements entrent dans les sommes"""
+        prices = prices[self.symbols]
+        if len(self.dates):
+            prices = prices[prices.index > self.dates[-1]]
+        if prices.empty:
+            return self
+        log_prices = np.log(prices.to_numpy(dtype=float))
+        previous = self.log_prices[-1:] if len(self.log_prices) else np.full((1, len(self.symbols)), np.nan)
+        returns = np.diff(np.vstack([previous, log_prices]), axis=0)
+        valid = ~np.isnan(returns)
+        returns = np.where(valid, returns, 0.0)
+
+        dates = pd.DatetimeIndex(prices.index)
+        doy = dates.dayofyear.to_numpy() - 1
+        month = dates.month.to_numpy() - 1
+        np.add.at(self.doy_sums, doy, returns)
+        np.add.at(self.doy_counts, doy, valid)
+        np.add.at(self.month_sums, month, returns)
+        np.add.at(self.month_counts, month, valid)
+
+        self.log_prices = np.vstack([self.log_prices, log_prices])
+        self.dates = self.dates.append(dates)
+        self._decomposition = None
+        return self
+
+    def day_of_year_profile(self, smooth=None):
+        """Rendement moyen (%) par jour de l'année, lissé circulairement"""
+        with np.errstate(invalid='ignore'):
+            profile = np.nan_to_num(self.doy_sums / self.doy_counts)
+        profile = circular_smooth(profile, self.smooth if smooth is None else smooth)
+        return pd.DataFrame(profile * 100, index=pd.RangeIndex(1, 367, name='jour'), columns=self.symbols)
+
+    def month_profile(self):
+        """Rendement mensuel moyen (%), déduit du rendement journalier moyen de chaque mois"""
+        with np.errstate(invalid='ignore'):
+            profile = self.month_sums / self.month_counts * DAYS_PER_MONTH
+        return pd.DataFrame(profile * 100, index=pd.Index(MONTHS, name='mois'), columns=self.symbols)
+
+    def decompose(self, iterations=2):
+        """Décomposition additive du log-prix (type STL) : tendance, saison, résidu, mémoïsée jusqu'au prochain ajout"""
+        if self._decomposition is None:
+            log_prices = pd.DataFrame(self.log_prices).ffill().bfill().to_numpy()
+            doy = self.dates.dayofyear.to_numpy() - 1
+            seasonal = np.zeros_like(log_prices)
+            for _ in range(iterations):
+                # Tendance sur la série désaisonnalisée, puis saison sur la série sans tendance
+                trend = centered_mean(log_prices - seasonal, self.period)
+                profile = np.nan_to_num(grouped_mean(log_prices - trend, doy, 366))
+                profile = circular_smooth(profile, self.smooth)
+                profile -= profile[:self.period].mean(axis=0)
+                seasonal = profile[doy]
+            self._decomposition = {
+                'tendance': trend,
+                'saison': seasonal,
+                'residu': log_prices - trend - seasonal,
+            }
+        return self._decomposition
+
+    def components(self, symbole):
+        """Composantes d'un symbole en pourcentage du log-prix (dates × composantes)"""
+        j = self.symbols.index(symbole)
+        parts = self.decompose()
+        return pd.DataFrame(
+            {'Tendance': np.exp(parts['tendance'][:, j]),
+             'Saison (%)': parts['saison'][:, j] * 100,
+             'Résidu (%)': parts['residu'][:, j] * 100},
+            index=self.dates.rename('date')
+        )
+
+    def strength(self):
+        """Force saisonnière par symbole : 1 - Var(résidu) / Var(saison + résidu)"""
+        parts = self.decompose()
+        detrended = parts['saison'] + parts['residu']
+        force = 1 - parts['residu'].var(axis=0) / detrended.var(axis=0)
+        return pd.Series(np.clip(force, 0, 1), index=self.symbols, name='force_saisonniere')
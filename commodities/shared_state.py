@@ -0,0 +1,506 @@
+# commodities/shared_state.py
+"""Mode multi-processus : un processus moteur publie l'état du marché en mémoire partagée,
+les processus d'interface le lisent sans copie
+
+    python -m commodities.shared_state serve --port 8766
+    COMMODITIES_SHARED=127.0.0.1:8766 streamlit run Dashboard.py --server.port 8501
+    COMMODITIES_SHARED=127.0.0.1:8766 streamlit run Dashboard.py --server.port 8502
+    python -m commodities.shared_state bench --readers 8 --duration 5
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener, wait
+
+import numpy as np
+import pandas as pd
+
+from .data_sources import DataSource, SimulatedMarketSource
+from .history_store import FIELDS as HISTORY_FIELDS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+AUTHKEY = b'commodities'
+LIVE_FIELDS = ('prix', 'change_pct', 'volume_jour', 'ouverture', 'haut', 'bas')
+HEADER = 2  # [version, version de l'historique]
+MANIFEST_REQUEST = ('manifest', None)
+
+logger = logging.getLogger(__name__)
+# Segments créés par ce processus (moteur) : un lecteur du même processus les laisse au suivi du moteur
+_created = set()
+
+
+class _Lease:
+    """Poignée sur un segment : base numpy des tableaux construits dessus, libérée avec le dernier d'entre eux"""
+
+    def __init__(self, segment, shape, dtype, offset):
+        self.segment = segment
+        self.__array_interface__ = {
+            'shape': tuple(shape),
+            'typestr': np.dtype(dtype).str,
+            'data': (segment.address + offset, True),
+            'version': 3,
+        }
+
+    def __del__(self):
+        self.segment.release()
+
+
+class _Segment:
+    """Segment attaché par un lecteur, fermé quand la dernière poignée (vue ou matrice d'un moteur) est libérée
+
+    numpy ne retient pas le tampon exporté : fermer un segment encore référencé démapperait la mémoire sous
+    les tableaux.
+    """
+
+    def __init__(self, name):
+        self.shm = shared_memory.SharedMemory(name=name)
+        # Le lecteur ne possède pas le segment : il ne doit pas le détruire à sa sortie
+        if os.name == 'posix' and self.shm.name not in _created:
+            resource_tracker.unregister('/' + self.shm.name, 'shared_memory')
+        self.address = np.frombuffer(self.shm.buf, dtype=np.uint8).ctypes.data
+        self.handles = 0
+        self._lock = threading.Lock()
+
+    def array(self, shape, dtype, offset=0):
+        """Tableau en lecture seule sur le segment, détenteur de sa propre poignée"""
+        with self._lock:
+            self.handles += 1
+        return np.asarray(_Lease(self, shape, dtype, offset))
+
+    def release(self):
+        with self._lock:
+            self.handles -= 1
+            if self.handles == 0:
+                self.shm.close()
+
+
+class SharedMarketState:
+    """Côté moteur : segments partagés, compteur de version (seqlock) et canal de notification"""
+
+    def __init__(self, engine, host=DEFAULT_HOST, port=DEFAULT_PORT, authkey=AUTHKEY):
+        self.engine = engine
+        # Ordre des colonnes de l'historique du moteur : les lecteurs en font des matrices sans réordonner
+        self.symbols = sorted(engine.commodities)
+        self._segments = {}
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        # Remplacement d'un segment et envoi du manifeste à un lecteur ne s'entrelacent pas
+        self._publish_lock = threading.RLock()
+        self._closed = threading.Event()
+
+        k = len(self.symbols)
+        live = self._create('live', 8 * HEADER + 8 * len(LIVE_FIELDS) * k)
+        self.header = np.ndarray((HEADER,), dtype=np.int64, buffer=live.buf)
+        self.live = np.ndarray((len(LIVE_FIELDS), k), dtype=np.float64, buffer=live.buf, offset=8 * HEADER)
+        self.header[:] = 0
+        self.publish_history()
+        self.publish()
+
+        self.listener = Listener((host, port), authkey=authkey)
+        self._accept_thread = threading.Thread(target=self._accept, name='shared-state-accept', daemon=True)
+        self._accept_thread.start()
+        self._request_thread = threading.Thread(target=self._serve_requests, name='shared-state-requests',
+                                                daemon=True)
+        self._request_thread.start()
+
+    def _create(self, key, size):
+        old = self._segments.pop(key, None)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        _created.add(shm.name)
+        self._segments[key] = shm
+        if old is not None:
+            old.close()
+            old.unlink()
+            _created.discard(old.name)
+        return shm
+
+    def manifest(self):
+        """Description des segments transmise à chaque lecteur"""
+        return {
+            'live': self._segments['live'].name,
+            'history': self._segments['history'].name,
+            'symbols': self.symbols,
+            'noms': [self.engine.commodities[s]['nom'] for s in self.symbols],
+            'categories': [self.engine.commodities[s]['categorie'] for s in self.symbols],
+            'fields': list(self.history_fields),
+            'dates': self.n_dates,
+            'history_version': int(self.header[1]),
+        }
+
+    def publish_history(self):
+        """Copie l'historique (champs × dates × symboles, float32) dans un nouveau segment"""
+        available = self.engine.history_fields()
+        fields = [f for f in HISTORY_FIELDS if f in available]
+        matrices = [self.engine.history_matrix(field).reindex(columns=self.symbols) for field in fields]
+        n_dates = len(matrices[0])
+        with self._publish_lock:
+            shm = self._create('history', 8 * n_dates + 4 * len(matrices) * n_dates * len(self.symbols))
+            dates = np.ndarray((n_dates,), dtype=np.int64, buffer=shm.buf)
+            dates[:] = matrices[0].index.values.astype('datetime64[ns]').view(np.int64)
+            values = np.ndarray((len(matrices), n_dates, len(self.symbols)), dtype=np.float32,
+                                buffer=shm.buf, offset=8 * n_dates)
+            for i, matrix in enumerate(matrices):
+                values[i] = matrix.to_numpy(dtype=np.float32)
+            self.history_fields, self.n_dates = fields, n_dates
+            self.header[1] = self.engine.history_version
+            self._notify(('manifest', self.manifest()))
+
+    def publish(self):
+        """Écrit l'état courant sous seqlock (version impaire pendant l'écriture) puis notifie"""
+        with self.engine.lock:
+            current = self.engine.current_data.assign(symbole=self.engine.current_data['symbole'].astype(str))
+            current = current.set_index('symbole').reindex(self.symbols)
+            bar = self.engine.session_bar.reindex(self.symbols)
+            rows = [current['prix'], current['change_pct'], current['volume_jour'],
+                    bar['ouverture'], bar['haut'], bar['bas']]
+            self.header[0] += 1
+            for i, row in enumerate(rows):
+                self.live[i] = row.to_numpy(dtype=np.float64)
+            self.header[0] += 1
+        self._notify(('version', int(self.header[0])))
+        return int(self.header[0])
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return
+            with self._publish_lock:
+                try:
+                    conn.send(('manifest', self.manifest()))
+                except (OSError, EOFError):
+                    conn.close()
+                    continue
+                with self._clients_lock:
+                    self._clients.append(conn)
+
+    def _serve_requests(self):
+        """Renvoie le manifeste courant aux lecteurs qui le redemandent (segment disparu avant leur attache)"""
+        while not self._closed.is_set():
+            with self._clients_lock:
+                clients = list(self._clients)
+            if not clients:
+                self._closed.wait(0.1)
+                continue
+            for conn in wait(clients, timeout=0.1):
+                try:
+                    request = conn.recv()
+                except (OSError, EOFError):
+                    with self._clients_lock:
+                        if conn in self._clients:
+                            self._clients.remove(conn)
+                    conn.close()
+                    continue
+                if request == MANIFEST_REQUEST:
+                    with self._publish_lock:
+                        self._notify(('manifest', self.manifest()), [conn])
+
+    def _notify(self, message, clients=None):
+        with self._clients_lock:
+            for conn in list(self._clients if clients is None else clients):
+                try:
+                    conn.send(message)
+                except (OSError, EOFError):
+                    conn.close()
+                    if conn in self._clients:
+                        self._clients.remove(conn)
+
+    def step(self):
+        """Un cycle du moteur : ticks, historique si sa version a changé, publication"""
+        self.engine.update_live_data()
+        if self.engine.history_version != self.header[1]:
+            self.publish_history()
+        return self.publish()
+
+    def run(self, interval=1.0, stop=None):
+        stop = stop or threading.Event()
+        while not stop.wait(interval):
+            self.step()
+
+    def close(self):
+        self._closed.set()
+        self.listener.close()
+        self._request_thread.join()
+        with self._clients_lock:
+            for conn in self._clients:
+                conn.close()
+            self._clients = []
+        for shm in self._segments.values():
+            shm.close()
+            shm.unlink()
+            _created.discard(shm.name)
+        self._segments = {}
+
+
+class SharedMarketView:
+    """Côté interface : vues en lecture seule sur les segments du moteur, notifiées à chaque version"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, authkey=AUTHKEY):
+        self.conn = Client((host, port), authkey=authkey)
+        self.retries = 0
+        self.remaps = 0
+        self._state = None
+        self._changed = threading.Condition()
+        while self._state is None:
+            _, manifest = self.conn.recv()
+            self._receive(manifest)
+        self._thread = threading.Thread(target=self._listen, name='shared-state-view', daemon=True)
+        self._thread.start()
+
+    def _map(self, manifest):
+        k = len(manifest['symbols'])
+        live, history = _Segment(manifest['live']), _Segment(manifest['history'])
+        n = manifest['dates']
+        # Chaque tableau détient sa poignée : les anciens segments se ferment quand l'état et les matrices
+        # des moteurs qui les utilisent sont libérés
+        self._state = (manifest,
+                       live.array((HEADER,), np.int64),
+                       live.array((len(LIVE_FIELDS), k), np.float64, 8 * HEADER),
+                       history.array((n,), 'datetime64[ns]'),
+                       history.array((len(manifest['fields']), n, k), np.float32, 8 * n))
+
+    def _receive(self, manifest):
+        """Attache les segments d'un manifeste ; s'ils ont déjà été remplacés, redemande le manifeste courant"""
+        try:
+            self._map(manifest)
+        except FileNotFoundError as e:
+            logger.warning("Segment partagé introuvable (%s), nouveau manifeste demandé", e)
+            self.remaps += 1
+            self.conn.send(MANIFEST_REQUEST)
+
+    def _listen(self):
+        while True:
+            try:
+                kind, payload = self.conn.recv()
+            except (EOFError, OSError, TypeError):
+                # TypeError : connexion fermée par close() pendant la lecture
+                return
+            if kind == 'manifest':
+                try:
+                    self._receive(payload)
+                except OSError:
+                    return
+            with self._changed:
+                self._changed.notify_all()
+
+    @property
+    def manifest(self):
+        return self._state[0]
+
+    @property
+    def version(self):
+        return int(self._state[1][0])
+
+    def read(self):
+        """Copie cohérente des champs courants (champs × symboles) et sa version"""
+        _, header, live, _, _ = self._state
+        while True:
+            before = int(header[0])
+            if before % 2 == 0:
+                values = live.copy()
+                if int(header[0]) == before:
+                    return values, before
+            self.retries += 1
+
+    def wait(self, version, timeout=None):
+        """Attend une version plus récente que `version` (notification du moteur)"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version > version, timeout)
+
+    def history(self):
+        """Dates et tableau (champs × dates × symboles) mappés en lecture seule, sans copie"""
+        _, _, _, dates, history = self._state
+        return dates, history
+
+    def close(self):
+        self.conn.close()
+        self._state = None
+
+
+class SharedHistory:
+    """Historique publié, avec l'interface de HistoryStore : les matrices sont des vues sur le segment partagé"""
+
+    def __init__(self, view):
+        self.view = view
+
+    @property
+    def symbols(self):
+        return list(self.view.manifest['symbols'])
+
+    @property
+    def fields(self):
+        return list(self.view.manifest['fields'])
+
+    @property
+    def version(self):
+        """Version de l'historique du moteur : change à chaque republication"""
+        return self.view.manifest['history_version']
+
+    def matrix(self, field='prix', symbols=None, start=None, end=None):
+        """Matrice (dates × symboles) d'un champ, sans copie pour l'ensemble des symboles"""
+        dates, history = self.view.history()
+        matrix = pd.DataFrame(history[self.fields.index(field)], copy=False,
+                              index=pd.DatetimeIndex(dates, name='date'),
+                              columns=pd.Index(self.symbols, name='symbole'))
+        if symbols is not None:
+            matrix = matrix[list(symbols)]
+        return matrix.loc[start:end]
+
+    def frame(self, symbols=None, start=None, end=None):
+        """Historique au format long (copie limitée aux symboles et dates demandés)"""
+        manifest = self.view.manifest
+        dates, history = self.view.history()
+        columns = [j for j, s in enumerate(manifest['symbols']) if symbols is None or s in symbols]
+        mask = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            mask &= dates >= np.datetime64(pd.Timestamp(start), 'ns')
+        if end is not None:
+            mask &= dates <= np.datetime64(pd.Timestamp(end), 'ns')
+        rows = np.flatnonzero(mask)
+        n, k = len(rows), len(columns)
+        frame = {
+            'date': np.repeat(dates[rows], k),
+            'symbole': np.tile([manifest['symbols'][j] for j in columns], n),
+            'nom': np.tile([manifest['noms'][j] for j in columns], n),
+            'categorie': np.tile([manifest['categories'][j] for j in columns], n),
+        }
+        for i, field in enumerate(manifest['fields']):
+            frame[field] = history[i][np.ix_(rows, columns)].ravel()
+        return pd.DataFrame(frame)
+
+
+class SharedMemorySource(DataSource):
+    """Source de données d'un processus d'interface, alimentée par le processus moteur"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, history_source=None, seed=42):
+        super().__init__(seed=seed)
+        self.history_source = history_source or SimulatedMarketSource(seed=seed)
+        self.view = SharedMarketView(host, port)
+        self._last_version = None
+
+    def current_tick(self):
+        return self.history_source.current_tick()
+
+    def historical_data(self, commodities, start='2020-01-01', end=None):
+        """Historique publié par le moteur, au format long"""
+        return SharedHistory(self.view).frame(list(commodities), start=start, end=end)
+
+    def fx_history(self, devises, start='2020-01-01', end=None):
+        """Historique des devises fourni par la source de repli"""
+        return self.history_source.fx_history(devises, start=start, end=end)
+
+    def futures_curve(self, symbole, info, spot, months):
+        """Courbe à terme fournie par la source de repli"""
+        return self.history_source.futures_curve(symbole, info, spot, months)
+
+    def poll(self, current_data):
+        """Champs courants publiés (prix, variation, volume, barre OHLC), si la version a changé"""
+        values, version = self.view.read()
+        if version == self._last_version:
+            return None
+        self._last_version = version
+        quotes = pd.DataFrame(values.T, columns=list(LIVE_FIELDS))
+        quotes.insert(0, 'symbole', self.view.manifest['symbols'])
+        return quotes
+
+
+def shared_engine(host=DEFAULT_HOST, port=DEFAULT_PORT, progress=None):
+    """Moteur d'un processus d'interface : historique lu dans le segment partagé, état publié déjà appliqué"""
+    from .engine import MarketEngine
+
+    source = SharedMemorySource(host, port)
+    engine = MarketEngine(source, SharedHistory(source.view), progress=progress)
+    engine.update_live_data()
+    return engine
+
+
+def read_loop(host=DEFAULT_HOST, port=DEFAULT_PORT, duration=5.0):
+    """Lecteur de test : lit l'état en continu et compte lectures, versions vues et relectures"""
+    view = SharedMarketView(host, port)
+    reads, versions, last = 0, 0, None
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        _, version = view.read()
+        reads += 1
+        if version != last:
+            versions, last = versions + 1, version
+    view.close()
+    return {'reads': reads, 'versions': versions, 'retries': view.retries}
+
+
+def run_benchmark(readers=4, duration=5.0, interval=0.01, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Un moteur publie toutes les `interval` secondes, `readers` interpréteurs distincts lisent en continu"""
+    from .engine import MarketEngine
+
+    state = SharedMarketState(MarketEngine(), host, port)
+    stop = threading.Event()
+    writer = threading.Thread(target=state.run, args=(interval, stop), daemon=True)
+    writer.start()
+    command = [sys.executable, '-m', 'commodities.shared_state', 'read',
+               '--host', host, '--port', str(port), '--duration', str(duration)]
+    processes = [subprocess.Popen(command, stdout=subprocess.PIPE, text=True) for _ in range(readers)]
+    stats = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+    stop.set()
+    writer.join()
+    published = int(state.header[0]) // 2
+    state.close()
+    return {
+        'reads_per_sec': sum(s['reads'] for s in stats) / duration,
+        'versions_seen': min(s['versions'] for s in stats),
+        'published': published,
+        'retries': sum(s['retries'] for s in stats),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="État du marché partagé entre processus")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="Processus moteur : publie l'état en mémoire partagée")
+    serve.add_argument('--host', default=DEFAULT_HOST)
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--interval', type=float, default=1.0)
+
+    bench = sub.add_parser('bench', help="Mesure le débit de lecture de plusieurs processus")
+    bench.add_argument('--readers', type=int, default=4)
+    bench.add_argument('--duration', type=float, default=5.0)
+    bench.add_argument('--interval', type=float, default=0.01)
+    bench.add_argument('--host', default=DEFAULT_HOST)
+    bench.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    read = sub.add_parser('read', help="Lecteur de test (utilisé par bench)")
+    read.add_argument('--host', default=DEFAULT_HOST)
+    read.add_argument('--port', type=int, default=DEFAULT_PORT)
+    read.add_argument('--duration', type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        from .engine import MarketEngine
+
+        state = SharedMarketState(MarketEngine(), args.host, args.port)
+        print(f"État partagé publié sur {args.host}:{args.port} (segments {state.manifest()['live']}, "
+              f"{state.manifest()['history']})")
+        try:
+            state.run(args.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            state.close()
+    elif args.command == 'read':
+        print(json.dumps(read_loop(args.host, args.port, args.duration)))
+    else:
+        result = run_benchmark(args.readers, args.duration, args.interval, args.host, args.port)
+        print(f"Lectures: {result['reads_per_sec']:,.0f}/s | Versions publiées: {result['published']:,} | "
+              f"Vues par lecteur: {result['versions_seen']:,} | Relectures (seqlock): {result['retries']:,}")
+
+
+if __name__ == '__main__':
+    main()
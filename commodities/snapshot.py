@@ -0,0 +1,146 @@
+# commodities/snapshot.py
+"""Instantanés atomiques du moteur sur disque et redémarrage à chaud
+
+    python -m commodities.snapshot --output instantane
+    COMMODITIES_SNAPSHOT_DIR=instantane streamlit run Dashboard.py
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from .history_store import HistoryStore
+
+HISTORY_DIR = 'history'
+# État vivant et analyses sérialisés (pickle) : un instantané ne se relit que depuis un répertoire de confiance
+STATE_FILE = 'state.pkl'
+DEFAULT_INTERVAL = 60.0
+
+
+def has_snapshot(root):
+    """Vrai si un instantané complet (historique et état) existe"""
+    return os.path.exists(os.path.join(root, STATE_FILE)) and os.path.isdir(os.path.join(root, HISTORY_DIR))
+
+
+def write_snapshot(engine, root, write_history=True):
+    """Écrit l'état courant et les analyses (et l'historique si demandé), chaque partie remplacée de façon atomique"""
+    os.makedirs(root, exist_ok=True)
+    write_history = write_history or not os.path.isdir(os.path.join(root, HISTORY_DIR))
+    with engine.lock:
+        state = engine.analytics_state()
+        state['tick'] = engine.source.checkpoint()
+        state['created'] = time.time()
+        # Sérialisé sous le verrou : les ticks modifient le détecteur d'anomalies en place
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        version = engine.history_version
+        historical = engine.historical_data if write_history else None
+
+    # L'historique (volumineux) est écrit avant l'état qui y fait référence
+    if historical is not None:
+        store = HistoryStore.write(os.path.join(root, HISTORY_DIR), historical)
+        # Le répertoire réécrit remplace celui que le moteur a peut-être mappé
+        engine.adopt_history_store(store, version)
+
+    fd, tmp = tempfile.mkstemp(dir=root, prefix='.state-', suffix='.pkl')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp, os.path.join(root, STATE_FILE))
+    return version
+
+
+def read_state(root):
+    with open(os.path.join(root, STATE_FILE), 'rb') as f:
+        return pickle.load(f)
+
+
+def read_current(root):
+    """Données courantes de l'instantané (sans construire de moteur)"""
+    return read_state(root)['current_data']
+
+
+def load_snapshot(root, source=None):
+    """Moteur à chaud : historique mappé en mémoire, état et analyses restaurés, seuls les ticks postérieurs sont rejoués"""
+    from .engine import MarketEngine
+
+    state = read_state(root)
+    engine = MarketEngine(source, HistoryStore(os.path.join(root, HISTORY_DIR)), state=state)
+    engine.source.resume(state['tick'])
+    engine.update_live_data()
+    return engine
+
+
+class Snapshotter:
+    """Écrit un instantané à intervalle régulier depuis un thread de fond"""
+
+    def __init__(self, engine, root, interval=DEFAULT_INTERVAL, history_version=None):
+        self.engine = engine
+        self.root = root
+        self.interval = interval
+        # Version de l'historique déjà présente sur disque (None : à écrire au premier instantané)
+        self.history_version = history_version
+        self.count = 0
+        self.last_duration = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='snapshotter', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête le thread après un dernier instantané"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.snapshot()
+
+    def snapshot(self):
+        started = time.perf_counter()
+        self.history_version = write_snapshot(
+            self.engine, self.root, write_history=self.history_version != self.engine.history_version
+        )
+        self.count += 1
+        self.last_duration = time.perf_counter() - started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
+
+
+def warm_up(engine):
+    """Analyses servies dès l'ouverture du dashboard (calculées, ou déjà restaurées d'un instantané)"""
+    engine.update_live_data()
+    engine.live_volatility()
+    engine.seasonality()
+    engine.covariance()
+    engine.event_study()
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instantané du moteur et mesure du redémarrage à chaud")
+    parser.add_argument('--output', default='instantane')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from .data_sources import SimulatedMarketSource
+    from .engine import MarketEngine
+
+    started = time.perf_counter()
+    engine = warm_up(MarketEngine(SimulatedMarketSource(seed=args.seed)))
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    write_snapshot(engine, args.output)
+    written = time.perf_counter() - started
+
+    started = time.perf_counter()
+    warm_up(load_snapshot(args.output, SimulatedMarketSource(seed=args.seed)))
+    warm = time.perf_counter() - started
+    print(f"Démarrage à froid: {cold:.3f}s, instantané: {written:.3f}s, démarrage à chaud: {warm:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
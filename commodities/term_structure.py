@@ -0,0 +1,261 @@
+# commodities/term_structure.py
+"""Courbes à terme par contrat sur disque : une matrice (dates × rangs de contrat) mappée en mémoire par symbole
+
+    python -m commodities.term_structure --output courbes --replicas 500
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CURVE_MONTHS = 24
+EXPIRY_DAY = 20
+ROLL_DAYS = 5
+MAX_OPEN = 256
+METADATA_FILE = 'metadata.json'
+
+
+def monthly_expiries(start, end, months=CURVE_MONTHS):
+    """Échéances mensuelles (le 20 du mois) couvrant [start, end + months mois]"""
+    first = pd.Timestamp(start).to_period('M')
+    last = (pd.Timestamp(end) + pd.DateOffset(months=months)).to_period('M')
+    return pd.period_range(first, last, freq='M').to_timestamp() + pd.Timedelta(days=EXPIRY_DAY - 1)
+
+
+def time_to_expiry(dates, expiries, months=CURVE_MONTHS):
+    """Durée jusqu'à l'échéance en années (dates × échéances), NaN si le contrat n'est pas coté"""
+    days = (expiries.values[None, :] - pd.DatetimeIndex(dates).values[:, None]) / np.timedelta64(1, 'D')
+    listed = (days > 0) & (days <= months * 365.25 / 12)
+    return np.where(listed, days / 365, np.nan)
+
+
+class TermStructureStore:
+    """Prix indexés par (symbole, échéance, date) ; chaque symbole n'est ouvert qu'à la première lecture"""
+
+    def __init__(self, root, max_open=MAX_OPEN):
+        self.root = root
+        with open(os.path.join(root, METADATA_FILE), encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self.max_open = max_open
+        self._open = OrderedDict()
+
+    @classmethod
+    def write(cls, root, curves):
+        """Écrit des courbes (symbole, dates, échéances, prix dates × échéances) une par une, de façon atomique"""
+        parent = os.path.dirname(os.path.abspath(root))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix='.curves-')
+
+        metadata = {'symbols': {}}
+        for symbole, dates, expiries, prices in curves:
+            dates = pd.DatetimeIndex(dates).values.astype('datetime64[ns]')
+            expiries = pd.DatetimeIndex(expiries).values.astype('datetime64[ns]')
+            prices = np.asarray(prices, dtype=float)
+            # Seuls les contrats cotés sont stockés : colonne k = k-ième contrat non échu à la date
+            first = np.searchsorted(expiries, dates, 'right')
+            ranks = int(np.max((~np.isnan(prices)).sum(axis=1), initial=1))
+            columns = first[:, None] + np.arange(ranks)[None, :]
+            inside = columns < len(expiries)
+            stored = np.take_along_axis(prices, np.minimum(columns, len(expiries) - 1), axis=1)
+            stored[~inside] = np.nan
+
+            directory = os.path.join(tmp, symbole)
+            os.makedirs(directory)
+            np.save(os.path.join(directory, 'date.npy'), dates)
+            np.save(os.path.join(directory, 'echeance.npy'), expiries)
+            np.save(os.path.join(directory, 'premier.npy'), first.astype(np.int32))
+            np.save(os.path.join(directory, 'prix.npy'), stored.astype(np.float32))
+            metadata['symbols'][symbole] = {'dates': len(dates), 'contrats': len(expiries), 'rangs': ranks}
+        with open(os.path.join(tmp, METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        if os.path.exists(root):
+            old = root + '.old'
+            os.replace(root, old)
+            os.replace(tmp, root)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, root)
+        return cls(root)
+
+    @property
+    def symbols(self):
+        return list(self.metadata['symbols'])
+
+    def close(self):
+        """Libère les fichiers mappés, avant le remplacement ou la suppression du répertoire"""
+        self._open.clear()
+
+    def _arrays(self, symbole):
+        """Dates, échéances, premier contrat coté et prix d'un symbole, mappés en mémoire (LRU de MAX_OPEN)"""
+        if symbole in self._open:
+            self._open.move_to_end(symbole)
+            return self._open[symbole]
+        if symbole not in self.metadata['symbols']:
+            raise KeyError(f"Pas de courbe pour {symbole}")
+        directory = os.path.join(self.root, symbole)
+        arrays = tuple(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                       for name in ('date', 'echeance', 'premier', 'prix'))
+        self._open[symbole] = arrays
+        if len(self._open) > self.max_open:
+            self._open.popitem(last=False)
+        return arrays
+
+    def dates(self, symbole):
+        return pd.DatetimeIndex(self._arrays(symbole)[0])
+
+    def expiries(self, symbole):
+        return pd.DatetimeIndex(self._arrays(symbole)[1])
+
+    def _row(self, symbole, date=None):
+        dates = self._arrays(symbole)[0]
+        if date is None:
+            return len(dates) - 1
+        return max(int(np.searchsorted(dates, np.datetime64(pd.Timestamp(date), 'ns'), 'right')) - 1, 0)
+
+    def _take(self, symbole, rows, columns):
+        """Prix aux couples (date, contrat) donnés en indices absolus, NaN si le contrat n'est pas coté"""
+        _, _, first, prices = self._arrays(symbole)
+        ranks = columns - first[rows]
+        valid = (ranks >= 0) & (ranks < prices.shape[1])
+        values = np.full(len(rows), np.nan)
+        values[valid] = prices[rows[valid], ranks[valid]]
+        return values
+
+    def curve(self, symbole, date=None):
+        """Courbe à une date (dernière par défaut) : une ligne contiguë, prix des contrats cotés par échéance"""
+        _, expiries, first, prices = self._arrays(symbole)
+        row = self._row(symbole, date)
+        values = np.asarray(prices[row], dtype=float)
+        columns = first[row] + np.arange(len(values))
+        listed = ~np.isnan(values) & (columns < len(expiries))
+        return pd.Series(values[listed], index=pd.DatetimeIndex(expiries[columns[listed]], name='echeance'),
+                         name=symbole)
+
+    def contract(self, symbole, expiry, start=None, end=None):
+        """Série d'un contrat sur une tranche de dates"""
+        dates, expiries, _, _ = self._arrays(symbole)
+        j = int(np.searchsorted(expiries, np.datetime64(pd.Timestamp(expiry), 'ns')))
+        lo = 0 if start is None else self._row(symbole, start)
+        hi = len(dates) if end is None else self._row(symbole, end) + 1
+        rows = np.arange(lo, hi)
+        series = pd.Series(self._take(symbole, rows, np.full(len(rows), j)), index=pd.DatetimeIndex(dates[lo:hi]))
+        return series.dropna().rename(str(pd.Timestamp(expiries[j]).date()))
+
+    def nearby_columns(self, symbole, roll_days=0):
+        """Contrat détenu à chaque date : le premier dont l'échéance est à plus de `roll_days` jours"""
+        dates, expiries, _, _ = self._arrays(symbole)
+        return np.searchsorted(expiries - np.timedelta64(roll_days, 'D'), dates, 'right')
+
+    def nearby(self, symbole, n=1, roll_days=0):
+        """Série du n-ième contrat le plus proche, roulé `roll_days` jours avant l'échéance"""
+        dates = self._arrays(symbole)[0]
+        columns = self.nearby_columns(symbole, roll_days) + n - 1
+        return pd.Series(self._take(symbole, np.arange(len(dates)), columns),
+                         index=pd.DatetimeIndex(dates), name=f'{symbole} M{n}')
+
+    def calendar_spread(self, symbole, near=1, far=2, roll_days=0):
+        """Spread calendaire entre deux rangs de contrats (proche - lointain)"""
+        spread = self.nearby(symbole, near, roll_days) - self.nearby(symbole, far, roll_days)
+        return spread.rename(f'{symbole} M{near}-M{far}')
+
+    def continuous(self, symbole, n=1, roll_days=ROLL_DAYS, method='ratio'):
+        """Série continue ajustée : chaque roulement corrige tout l'historique antérieur de l'écart entre contrats"""
+        dates = self._arrays(symbole)[0]
+        rows = np.arange(len(dates))
+        held = self.nearby_columns(symbole, roll_days) + n - 1
+        previous = np.concatenate([held[:1], held[:-1]])
+        raw = self._take(symbole, rows, held)
+        rolled = np.concatenate([[False], held[1:] != held[:-1]])
+        before = self._take(symbole, rows, previous)
+
+        # L'ajustement d'une date cumule les écarts des roulements qui la suivent
+        if method == 'ratio':
+            gaps = np.where(rolled, raw / before, 1.0)
+            factor = np.cumprod(gaps[::-1])[::-1]
+            adjusted = raw * np.concatenate([factor[1:], [1.0]])
+        else:
+            gaps = np.where(rolled, raw - before, 0.0)
+            offset = np.cumsum(gaps[::-1])[::-1]
+            adjusted = raw + np.concatenate([offset[1:], [0.0]])
+        return pd.DataFrame({'brut': raw, 'ajuste': adjusted, 'roulement': rolled},
+                            index=pd.DatetimeIndex(dates, name='date'))
+
+    def summary(self, date=None, symbols=None):
+        """Forme de la courbe par symbole : pente à 12 mois, rendement de roulement et contango/backwardation"""
+        rows = []
+        for symbole in symbols if symbols is not None else self.symbols:
+            curve = self.curve(symbole, date)
+            if len(curve) < 2:
+                continue
+            years = (curve.index - curve.index[0]).days.to_numpy() / 365
+            far = min(int(np.searchsorted(years, 1.0)), len(curve) - 1)
+            roll_yield = np.log(curve.iloc[0] / curve.iloc[1]) / years[1]
+            rows.append({
+                'symbole': symbole,
+                'M1': curve.iloc[0],
+                'M2': curve.iloc[1],
+                'M12': curve.iloc[far],
+                'pente_12m_pct': (curve.iloc[far] / curve.iloc[0] - 1) * 100,
+                'rendement_roulement_pct': roll_yield * 100,
+                'structure': 'Backwardation' if curve.iloc[far] < curve.iloc[0] else 'Contango',
+            })
+        return pd.DataFrame(rows).set_index('symbole') if rows else pd.DataFrame()
+
+
+def source_curves(source, prices, commodities, months=CURVE_MONTHS):
+    """Courbes d'une source, symbole par symbole, à partir de la matrice des prix au comptant"""
+    for symbole in prices.columns:
+        spot = prices[symbole].astype(float).ffill().bfill()
+        expiries, curve = source.futures_curve(symbole, commodities[symbole], spot, months)
+        yield symbole, spot.index, expiries, curve
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Écriture et lecture des courbes à terme")
+    parser.add_argument('--output', default='courbes')
+    parser.add_argument('--replicas', type=int, default=1,
+                        help="Copies de chaque symbole, pour mesurer le passage à l'échelle")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from .engine import MarketEngine
+    from .data_sources import SimulatedMarketSource
+
+    engine = MarketEngine(SimulatedMarketSource(seed=args.seed))
+    prices = engine.price_matrix()
+
+    def curves():
+        for i in range(args.replicas):
+            for symbole, dates, expiries, curve in source_curves(engine.source, prices, engine.commodities):
+                yield (symbole if args.replicas == 1 else f'{symbole}_{i}'), dates, expiries, curve
+
+    started = time.perf_counter()
+    store = TermStructureStore.write(args.output, curves())
+    written = time.perf_counter() - started
+    series = sum(info['contrats'] for info in store.metadata['symbols'].values())
+
+    rng = np.random.default_rng(0)
+    symbols = store.symbols
+    picked = [symbols[i] for i in rng.integers(0, len(symbols), 1000)]
+    started = time.perf_counter()
+    for symbole in picked:
+        store.curve(symbole)
+    snapshot = (time.perf_counter() - started) / len(picked)
+    started = time.perf_counter()
+    for symbole in picked[:200]:
+        store.calendar_spread(symbole)
+        store.continuous(symbole)
+    spreads = (time.perf_counter() - started) / 200
+    print(f"{len(symbols)} symboles, {series} séries de contrats écrites en {written:.1f}s ; "
+          f"courbe: {snapshot * 1e3:.2f} ms, spread + série continue: {spreads * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+# commodities/tick_feed.py
+"""Flux de ticks local (TCP, JSON par ligne) : client, serveur de rejeu et banc de charge
+
+    python -m commodities.tick_feed record --count 100000 --output ticks.jsonl
+    python -m commodities.tick_feed serve --file ticks.jsonl --speed 10
+    python -m commodities.tick_feed bench --duration 10 --fps 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .catalog import COMMODITIES
+from .data_sources import DataSource, SimulatedMarketSource
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+WRITE_HIGH_WATER = 1 << 20
+READ_CHUNK = 1 << 16
+TICK_COLUMNS = ('ts', 'symbole', 'prix', 'volume_jour')
+
+
+def record_simulated_ticks(path, count, source=None, commodities=COMMODITIES):
+    """Enregistre `count` ticks simulés (un par symbole) dans un fichier JSONL"""
+    source = source or SimulatedMarketSource()
+    symbols = list(commodities)
+    volatilite = np.array([commodities[s]['volatilite'] for s in symbols])
+    categories = [commodities[s]['categorie'] for s in symbols]
+
+    log_returns, volume_changes = source.ticks(0, count, volatilite, categories)
+    prix = np.array([commodities[s]['prix_base'] for s in symbols]) * np.exp(np.cumsum(log_returns, axis=0))
+    volume = 1_000_000 * np.exp(np.cumsum(volume_changes, axis=0))
+    ts = np.arange(count) / source.tick_rate
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            for j, symbole in enumerate(symbols):
+                f.write(f'{{"ts": {ts[i]:.6f}, "symbole": "{symbole}", '
+                        f'"prix": {prix[i, j]:.6f}, "volume_jour": {volume[i, j]:.0f}}}\n')
+    return count * len(symbols)
+
+
+def load_ticks(path):
+    """Charge un fichier de ticks (JSONL ou CSV) trié par horodatage"""
+    if os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=list(TICK_COLUMNS))
+    if str(path).endswith('.csv'):
+        ticks = pd.read_csv(path)
+    else:
+        ticks = pd.read_json(path, lines=True)
+    return ticks.sort_values('ts', kind='stable').reset_index(drop=True)
+
+
+class ReplayServer:
+    """Rejoue un fichier de ticks à un multiple du temps réel pour chaque client"""
+
+    def __init__(self, path, speed=1.0, host=DEFAULT_HOST, port=DEFAULT_PORT, loop_forever=False):
+        ticks = load_ticks(path)
+        self.timestamps = ticks['ts'].to_numpy(dtype=float)
+        self.lines = [
+            (json.dumps(record, ensure_ascii=False) + '\n').encode()
+            for record in ticks[list(TICK_COLUMNS)].to_dict('records')
+        ]
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.loop_forever = loop_forever
+        self.sent = 0
+
+    async def _stream(self, writer):
+        if not self.lines:
+            # Fichier vide : rien à rejouer, la connexion est simplement fermée
+            return
+        loop = asyncio.get_running_loop()
+        span = self.timestamps[-1] - self.timestamps[0]
+        start, offset = loop.time(), 0.0
+        while True:
+            for ts, line in zip(self.timestamps - self.timestamps[0], self.lines):
+                if self.speed > 0:
+                    delay = (ts + offset) / self.speed - (loop.time() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                writer.write(line)
+                self.sent += 1
+                # Contre-pression : on attend le client lent plutôt que de bufferiser sans limite
+                if writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                    await writer.drain()
+            if not self.loop_forever:
+                break
+            offset += span
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            await self._stream(writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """Démarre le serveur et sert jusqu'à interruption"""
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+class TickFeedClient:
+    """Client asyncio qui ne conserve que le dernier tick par symbole entre deux rendus"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, reconnect_delay=1.0):
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self.ingested = 0
+        self.rendered = 0
+        self.malformed = 0
+        self._latest = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._task = None
+        self._stopped = threading.Event()
+
+    def _ingest(self, lines):
+        ticks, malformed = [], 0
+        for line in lines:
+            if not line:
+                continue
+            # Une ligne illisible est comptée et ignorée : elle n'interrompt pas la réception
+            try:
+                tick = json.loads(line)
+                tick['symbole']
+            except (ValueError, TypeError, KeyError):
+                malformed += 1
+                continue
+            ticks.append(tick)
+        with self._lock:
+            for tick in ticks:
+                self._latest[tick['symbole']] = tick
+                self._counts[tick['symbole']] = self._counts.get(tick['symbole'], 0) + 1
+            self.ingested += len(ticks)
+            self.malformed += malformed
+
+    async def run(self):
+        """Boucle de réception avec reconnexion automatique, jusqu'à stop()"""
+        self._loop, self._task = asyncio.get_running_loop(), asyncio.current_task()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                except OSError:
+                    await asyncio.sleep(self.reconnect_delay)
+                    continue
+                pending = b''
+                try:
+                    while not self._stopped.is_set():
+                        chunk = await reader.read(READ_CHUNK)
+                        if not chunk:
+                            break
+                        *lines, pending = (pending + chunk).split(b'\n')
+                        self._ingest(lines)
+                except ConnectionError:
+                    pass
+                finally:
+                    writer.close()
+                await asyncio.sleep(self.reconnect_delay)
+        except asyncio.CancelledError:
+            pass
+
+    def start(self):
+        """Lance la réception dans un thread dédié"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Arrête la réception, y compris une lecture ou une reconnexion en attente"""
+        self._stopped.set()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Boucle déjà terminée
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self):
+        """Retourne et vide les derniers ticks par symbole (une trame de rendu), avec le nombre de ticks fusionnés"""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            counts, self._counts = self._counts, {}
+            self.rendered += len(latest)
+        return {symbole: {**tick, 'ticks': counts[symbole]} for symbole, tick in latest.items()}
+
+    def stats(self):
+        """Compteurs de débit : ticks reçus, rendus et fusionnés"""
+        with self._lock:
+            pending = len(self._latest)
+            return {
+                'ingested': self.ingested,
+                'rendered': self.rendered,
+                'coalesced': self.ingested - self.rendered - pending,
+                'malformed': self.malformed
+            }
+
+
+class TickFeedSource(DataSource):
+    """Source de données alimentée par le flux de ticks local"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, history_source=None, seed=42):
+        super().__init__(seed=seed)
+        self.history_source = history_source or SimulatedMarketSource(seed=seed)
+        self.client = TickFeedClient(host, port).start()
+
+    def current_tick(self):
+        return self.history_source.current_tick()
+
+    def historical_data(self, commodities, start='2020-01-01', end=None):
+        """Historique fourni par la source de repli"""
+        return self.history_source.historical_data(commodities, start=start, end=end)
+
+    def fx_history(self, devises, start='2020-01-01', end=None):
+        """Historique des devises fourni par la source de repli"""
+        return self.history_source.fx_history(devises, start=start, end=end)
+
+    def futures_curve(self, symbole, info, spot, months):
+        """Courbe à terme fournie par la source de repli"""
+        return self.history_source.futures_curve(symbole, info, spot, months)
+
+    def poll(self, current_data):
+        """Derniers ticks reçus depuis le rendu précédent"""
+        latest = self.client.drain()
+        if not latest:
+            return None
+        return pd.DataFrame(list(latest.values()))[['symbole', 'prix', 'volume_jour', 'ticks']]
+
+
+def run_benchmark(host=DEFAULT_HOST, port=DEFAULT_PORT, duration=10.0, fps=10.0):
+    """Mesure le débit reçu et rendu à une fréquence de trames donnée"""
+    client = TickFeedClient(host, port).start()
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        time.sleep(1 / fps)
+        client.drain()
+    elapsed = time.perf_counter() - start
+    client.stop()
+    stats = client.stats()
+    return {
+        **stats,
+        'ingested_per_sec': stats['ingested'] / elapsed,
+        'rendered_per_sec': stats['rendered'] / elapsed
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flux de ticks local du Dashboard Commodities")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help="Enregistre des ticks simulés")
+    record.add_argument('--output', default='ticks.jsonl')
+    record.add_argument('--count', type=int, default=100_000)
+    record.add_argument('--seed', type=int, default=42)
+    record.add_argument('--tick-rate', type=float, default=10.0)
+
+    serve = sub.add_parser('serve', help="Rejoue un fichier de ticks")
+    serve.add_argument('--file', default='ticks.jsonl')
+    serve.add_argument('--speed', type=float, default=1.0, help="Multiple du temps réel (0 = maximum)")
+    serve.add_argument('--host', default=DEFAULT_HOST)
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--loop', action='store_true', help="Rejoue le fichier en boucle")
+
+    bench = sub.add_parser('bench', help="Mesure le débit reçu et rendu")
+    bench.add_argument('--host', default=DEFAULT_HOST)
+    bench.add_argument('--port', type=int, default=DEFAULT_PORT)
+    bench.add_argument('--duration', type=float, default=10.0)
+    bench.add_argument('--fps', type=float, default=10.0)
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        source = SimulatedMarketSource(seed=args.seed, tick_rate=args.tick_rate)
+        written = record_simulated_ticks(args.output, args.count, source)
+        print(f"{written:,} ticks écrits dans {args.output}")
+    elif args.command == 'serve':
+        server = ReplayServer(args.file, args.speed, args.host, args.port, args.loop)
+        print(f"Rejeu de {len(server.lines):,} ticks sur {args.host}:{args.port} (x{args.speed})")
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+    else:
+        result = run_benchmark(args.host, args.port, args.duration, args.fps)
+        print(f"Reçus: {result['ingested_per_sec']:,.0f} ticks/s | "
+              f"Rendus: {result['rendered_per_sec']:,.0f} ticks/s | "
+              f"Fusionnés: {result['coalesced']:,} | Illisibles: {result['malformed']:,}")
+
+
+if __name__ == '__main__':
+    main()
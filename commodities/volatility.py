@@ -0,0 +1,129 @@
+# commodities/volatility.py
+"""Volatilité réalisée sur barres OHLC : close-to-close, EWMA (RiskMetrics), Parkinson et Garman–Klass"""
+import numpy as np
+import pandas as pd
+
+from .indicators import ANNUALIZATION
+
+HORIZONS = (10, 21, 63)
+EWMA_LAMBDA = 0.94
+ESTIMATORS = {
+    'close_to_close': 'Close-to-close',
+    'ewma': 'EWMA (RiskMetrics)',
+    'parkinson': 'Parkinson',
+    'garman_klass': 'Garman–Klass',
+}
+OHLC_FIELDS = ('ouverture', 'haut', 'bas', 'prix')
+PARKINSON = 1 / (4 * np.log(2))
+GARMAN_KLASS = 2 * np.log(2) - 1
+
+
+def column(estimator, horizon=None):
+    """Nom de colonne d'une estimation : 'ewma' ou 'parkinson_21'"""
+    return estimator if estimator == 'ewma' else f'{estimator}_{horizon}'
+
+
+def bar_terms(open_, high, low, close, previous_close):
+    """Termes par barre des estimateurs : r, r², Parkinson et Garman–Klass (barres × symboles)"""
+    r = np.log(close / previous_close)
+    hl = np.log(high / low) ** 2
+    co = np.log(close / open_) ** 2
+    return np.stack([r, r ** 2, PARKINSON * hl, 0.5 * hl - GARMAN_KLASS * co])
+
+
+def rolling_sum(values, window):
+    """Sommes glissantes par sommes cumulées sur l'axe du temps (NaN avant la première fenêtre complète)"""
+    cumsum = np.cumsum(np.nan_to_num(values), axis=-2)
+    result = np.full(values.shape, np.nan)
+    result[..., window - 1:, :] = cumsum[..., window - 1:, :]
+    result[..., window:, :] -= cumsum[..., :-window, :]
+    return result
+
+
+class VolatilityEngine:
+    """Noyaux glissants sur la matrice (temps × symboles), puis mise à jour en O(symboles) par barre"""
+
+    def __init__(self, ohlc, horizons=HORIZONS, lam=EWMA_LAMBDA):
+        self.horizons = tuple(horizons)
+        self.lam = lam
+        close = ohlc['prix'].astype(float)
+        self.symbols = list(close.columns)
+        self.dates = pd.DatetimeIndex(close.index)
+        arrays = [ohlc[field][self.symbols].to_numpy(dtype=float) for field in OHLC_FIELDS]
+        previous = np.vstack([arrays[3][:1], arrays[3][:-1]])
+        terms = bar_terms(*arrays, previous)
+        terms[:2, 0] = np.nan
+        # Tampon à capacité doublée : ajouter une barre ne recopie pas l'historique
+        self._terms = terms
+        self.length = terms.shape[1]
+        self.last_close = arrays[3][-1].copy()
+
+        # État incrémental : sommes de la fenêtre courante par horizon et variance EWMA
+        self.sums = {h: np.nansum(self.terms[:, -h:], axis=1) for h in self.horizons}
+        self.ewma_var = self._ewma(self.terms[1])[-1].copy()
+
+    @property
+    def terms(self):
+        return self._terms[:, :self.length]
+
+    def _ewma(self, r2):
+        return pd.DataFrame(r2).ewm(alpha=1 - self.lam, adjust=False, ignore_na=True).mean().to_numpy()
+
+    def history(self, estimator, horizon=HORIZONS[1]):
+        """Série annualisée (%) d'un estimateur sur tout l'historique (dates × symboles)"""
+        if estimator == 'ewma':
+            variance = self._ewma(self.terms[1])
+        elif estimator == 'close_to_close':
+            sums = rolling_sum(self.terms[:2], horizon)
+            variance = (sums[1] - sums[0] ** 2 / horizon) / (horizon - 1)
+        else:
+            term = 2 if estimator == 'parkinson' else 3
+            variance = rolling_sum(self.terms[term], horizon) / horizon
+        return pd.DataFrame(np.sqrt(np.maximum(variance, 0) * ANNUALIZATION) * 100,
+                            index=self.dates, columns=self.symbols)
+
+    def _estimates(self, sums, ewma_var):
+        rows = {'ewma': ewma_var}
+        for h in self.horizons:
+            r, r2, parkinson, garman_klass = sums[h]
+            rows[column('close_to_close', h)] = (r2 - r ** 2 / h) / (h - 1)
+            rows[column('parkinson', h)] = parkinson / h
+            rows[column('garman_klass', h)] = garman_klass / h
+        return pd.DataFrame({key: np.sqrt(np.maximum(v, 0) * ANNUALIZATION) * 100 for key, v in rows.items()},
+                            index=pd.Index(self.symbols, name='symbole'))
+
+    def _step(self, bar):
+        """Sommes et variance EWMA après une barre, sans modifier l'état"""
+        arrays = [np.asarray(bar[field], dtype=float) for field in OHLC_FIELDS]
+        new = bar_terms(*arrays, self.last_close)
+        sums = {}
+        for h in self.horizons:
+            dropped = self.terms[:, -h] if self.terms.shape[1] >= h else 0.0
+            sums[h] = self.sums[h] + new - np.nan_to_num(dropped)
+        ewma_var = self.lam * self.ewma_var + (1 - self.lam) * new[1]
+        return new, sums, ewma_var
+
+    def latest(self, bar=None):
+        """Estimations annualisées (%) par symbole et horizon ; `bar` ajoute une barre en cours sans la valider"""
+        if bar is None:
+            return self._estimates(self.sums, self.ewma_var)
+        _, sums, ewma_var = self._step(bar)
+        return self._estimates(sums, ewma_var)
+
+    def update(self, date, bar):
+        """Valide une nouvelle barre {champ OHLC: valeurs par symbole}"""
+        new, self.sums, self.ewma_var = self._step(bar)
+        if self.length == self._terms.shape[1]:
+            grown = np.empty((4, 2 * self.length, len(self.symbols)))
+            grown[:, :self.length] = self._terms
+            self._terms = grown
+        self._terms[:, self.length] = new
+        self.length += 1
+        self.dates = self.dates.append(pd.DatetimeIndex([date]))
+        self.last_close = np.asarray(bar['prix'], dtype=float).copy()
+        return self.latest()
+
+    def daily(self, estimator='ewma', horizon=None, bar=None):
+        """Volatilité journalière (%) d'un estimateur, pour comparer aux variations du jour"""
+        latest = self.latest(bar)[column(estimator, horizon)]
+        return latest / np.sqrt(ANNUALIZATION)
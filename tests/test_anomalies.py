@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from commodities.anomalies import AnomalyDetector, KINDS, MIN_TICKS, read_log
+
+SYMBOLS = ['GOLD', 'WTI', 'CORN']
+KIND = {kind: i for i, kind in enumerate(KINDS)}
+
+
+def paths(n, sigma=1e-3, seed=0):
+    """Prix et volumes en marche aléatoire géométrique, un tick par ligne"""
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, sigma, (n, len(SYMBOLS))), axis=0))
+    volumes = 1e6 * np.exp(np.cumsum(rng.normal(0, sigma, (n, len(SYMBOLS))), axis=0))
+    return prices, volumes
+
+
+def warmed_up(n=200, **kwargs):
+    detector = AnomalyDetector(SYMBOLS, **kwargs)
+    prices, volumes = paths(n)
+    for price, volume in zip(prices, volumes):
+        detector.update(price, volume)
+    return detector, prices[-1], volumes[-1]
+
+
+def test_spike_is_flagged_on_its_symbol_only():
+    detector, price, volume = warmed_up()
+    spike = price.copy()
+    spike[1] *= np.exp(20e-3)
+    flags = detector.update(spike, volume)
+    assert flags[KIND['zscore']].tolist() == [False, True, False]
+    assert detector.scores[KIND['zscore'], 1] > 10
+    # Un saut de 20σ franchit aussi le seuil du CUSUM
+    events = detector.recent()
+    assert events['symbole'].tolist() == ['WTI', 'WTI']
+    assert events['type'].tolist() == ['zscore', 'cusum']
+
+
+def test_no_alarm_before_the_window_is_filled():
+    detector = AnomalyDetector(SYMBOLS)
+    prices, volumes = paths(MIN_TICKS + 1)
+    prices[-1] *= 1.5
+    for price, volume in zip(prices, volumes):
+        assert not detector.update(price, volume).any()
+
+
+def test_cusum_detects_a_persistent_drift():
+    detector, price, volume = warmed_up()
+    rng = np.random.default_rng(1)
+    drift = np.array([0.0, 2e-3, 0.0])
+    for step in range(1, 50):
+        price = price * np.exp(drift + rng.normal(0, 1e-3, len(SYMBOLS)))
+        flags = detector.update(price, volume)
+        # Une dérive de 2σ par tick reste sous le seuil du z-score mais s'accumule dans le CUSUM
+        if flags[KIND['cusum']].any():
+            break
+    assert flags[KIND['cusum']].tolist() == [False, True, False]
+    assert step <= 10
+    assert detector.cusum_high[1] == 0.0
+
+
+def test_unquoted_symbols_keep_their_state():
+    detector, price, volume = warmed_up()
+    state = (detector.count.copy(), detector.sum.copy(), detector.last.copy(), detector.cusum_high.copy())
+    moved = price * np.array([1.001, 1.0, 1.0])
+    detector.update(moved, volume, quoted=[True, False, False])
+    assert detector.count.tolist() == [state[0][0] + 1, state[0][1], state[0][2]]
+    np.testing.assert_array_equal(detector.sum[:, 1:], state[1][:, 1:])
+    np.testing.assert_array_equal(detector.last[:, 1:], state[2][:, 1:])
+    assert not np.array_equal(detector.last[:, 0], state[2][:, 0])
+
+
+def test_coalesced_ticks_are_scaled_to_one_tick():
+    detector, price, volume = warmed_up()
+    # 25 ticks fusionnés : un écart de 5σ_tick n'a rien d'extrême (1σ à l'échelle de 25 ticks)
+    moved = price * np.exp(5e-3)
+    assert not detector.update(moved, volume, ticks=25)[KIND['zscore']].any()
+    assert abs(detector.scores[KIND['zscore']]).max() < 2
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_gaps_and_coalesced_ticks_do_not_raise_false_alarms(seed):
+    rng = np.random.default_rng(seed)
+    prices, volumes = paths(20_000, seed=seed)
+    detector = AnomalyDetector(SYMBOLS)
+    last = np.zeros(len(SYMBOLS), dtype=int)
+    t = 0
+    while t < len(prices) - 1:
+        t = min(t + int(rng.integers(1, 30)), len(prices) - 1)
+        quoted = rng.random(len(SYMBOLS)) < 0.7
+        detector.update(prices[t], volumes[t], ticks=np.maximum(t - last, 1), quoted=quoted)
+        last[quoted] = t
+    events = detector.recent()
+    observations = detector.count.sum()
+    assert (events['type'] == 'zscore').sum() <= max(3, 1e-3 * observations)
+    assert (events['type'] == 'volume').sum() <= max(3, 1e-3 * observations)
+
+
+def test_log_is_written_only_when_opened(tmp_path):
+    detector, price, volume = warmed_up()
+    spike = price * np.array([1.0, 1.05, 1.0])
+    detector.update(spike, volume)
+    assert not list(tmp_path.iterdir())
+
+    path = tmp_path / 'anomalies.csv'
+    detector.open_log(path)
+    detector.update(spike * np.array([1.0, 1.05, 1.0]), volume)
+    detector.close()
+    log = read_log(path)
+    assert set(log['symbole']) == {'WTI'} and 'zscore' in set(log['type'])
+    assert len(log) == detector.total_events - 2
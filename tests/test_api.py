@@ -0,0 +1,100 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from commodities.api import ResponseCache, create_server
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = create_server(MarketEngine(SimulatedMarketSource(seed=3)), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.read()
+
+
+@pytest.mark.parametrize('query', [
+    'indicators?names=bogus',
+    'history?fields=bogus',
+    'aggregate?how=foo',
+    'aggregate?freq=XX',
+    'aggregate?by=pays',
+    'history?symbols=GOLD&start=hier',
+    'history?symbols=NOPE',
+    'inconnue',
+])
+def test_invalid_queries_are_rejected_before_streaming(base_url, query):
+    status, body = get(f'{base_url}/{query}')
+    assert status == 400
+    assert 'erreur' in json.loads(body)
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    return get(request)
+
+
+@pytest.mark.parametrize('body', [b'[]', b'{"queries": [1]}', b'{"queries": {"type": "risk"}}', b'{"queries": [',
+                                  b'{"queries": [{"type": "risk", "symbols": ["NOPE"]}]}'])
+def test_malformed_batches_get_a_400(base_url, body):
+    status, response = post(f'{base_url}/query', body)
+    assert status == 400
+    assert 'erreur' in json.loads(response)
+
+
+def test_batch_runs_every_query(base_url):
+    body = json.dumps({'queries': [{'type': 'risk', 'symbols': ['GOLD']},
+                                   {'type': 'history', 'symbols': ['GOLD'], 'start': '2024-01-01',
+                                    'end': '2024-01-03'}]}).encode()
+    status, response = post(f'{base_url}/query', body)
+    risk, history = json.loads(response)['resultats']
+    assert status == 200 and len(risk) == 1 and len(history) == 3
+
+
+def test_indicator_cache_keeps_one_entry_per_symbol():
+    engine = MarketEngine(SimulatedMarketSource(seed=3))
+    engine.indicators(['GOLD', 'SILVER'])
+    engine.commit_session_bar()
+    engine.indicators(['GOLD'])
+    assert set(engine._indicator_cache) == {'GOLD', 'SILVER'}
+    assert engine._indicator_cache['GOLD'][0] == engine.history_version
+
+
+def test_json_stream_is_a_complete_array(base_url):
+    status, body = get(f'{base_url}/history?symbols=GOLD,SILVER&start=2024-01-01&end=2024-01-10')
+    records = json.loads(body)
+    assert status == 200 and len(records) == 20
+    status, body = get(f'{base_url}/history?symbols=GOLD&start=2030-01-01')
+    assert status == 200 and json.loads(body) == []
+
+
+def test_cache_is_bounded_and_thread_safe():
+    cache = ResponseCache(max_bytes=1000, max_entry=100)
+
+    def fill(offset):
+        for i in range(500):
+            cache.put((offset, i), b'x' * 50)
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=fill, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.size <= 1000
+    assert cache.size == sum(len(body) for body in cache._entries.values())
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.currency import CurrencyConverter
+
+
+@pytest.fixture
+def prices():
+    index = pd.date_range('2024-01-01', periods=6, freq='D', name='date')
+    return pd.DataFrame({'GOLD': [2000.0, 2010, 2005, 2020, 2030, 2025],
+                         'BRENT': [80.0, 81, 79, 82, 83, 84]}, index=index)
+
+
+@pytest.fixture
+def converter(prices):
+    # Pas de cotation le 3 ni le 4 janvier : le dernier cours connu s'applique
+    dates = prices.index[[0, 1, 4, 5]]
+    fx = pd.DataFrame({'EUR/USD': [1.10, 1.12, 1.08, 1.09], 'USD/JPY': [140.0, 141, 145, 146]}, index=dates)
+    return CurrencyConverter(fx, max_cached=2)
+
+
+def test_usd_is_the_identity(converter, prices):
+    np.testing.assert_array_equal(converter.factors('USD', prices.index), np.ones(len(prices)))
+    pd.testing.assert_frame_equal(converter.convert(prices, 'USD'), prices)
+    latest = pd.Series({'GOLD': 2025.0})
+    assert converter.convert_latest(latest, 'USD') is latest
+
+
+@pytest.mark.parametrize('currency, rates', [
+    ('EUR', 1 / np.array([1.10, 1.12, 1.12, 1.12, 1.08, 1.09])),
+    ('JPY', np.array([140.0, 141, 141, 141, 145, 146])),
+])
+def test_conversion_broadcasts_over_dates_and_symbols(converter, prices, currency, rates):
+    converted = converter.convert(prices, currency)
+    for symbole in prices.columns:
+        for i, day in enumerate(prices.index):
+            assert converted.loc[day, symbole] == pytest.approx(prices.loc[day, symbole] * rates[i])
+    assert converter.convert_latest(pd.Series({'GOLD': 100.0}), currency)['GOLD'] == pytest.approx(100 * rates[-1])
+
+
+def test_cache_is_keyed_by_history_version(converter, prices):
+    first = converter.convert(prices, 'EUR', version=1)
+    assert converter.convert(prices, 'EUR', version=1) is first
+
+    updated = prices * 2
+    second = converter.convert(updated, 'EUR', version=2)
+    assert second is not first
+    pd.testing.assert_frame_equal(second, first * 2)
+    # Sans version, rien n'est mis en cache
+    assert converter.convert(prices, 'EUR') is not converter.convert(prices, 'EUR')
+
+
+def test_least_recently_used_entry_is_evicted(converter, prices):
+    eur = converter.convert(prices, 'EUR', version=1)
+    converter.convert(prices, 'JPY', version=1)
+    assert converter.convert(prices, 'EUR', version=1) is eur
+    converter.convert(prices, 'USD', version=1)
+    assert list(converter._cache) == [('EUR', 1), ('USD', 1)]
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+from commodities.indices import BasketIndexEngine
+
+Dashboard = pytest.importorskip('Dashboard')
+
+
+@pytest.fixture
+def prices():
+    index = pd.date_range('2024-01-01', periods=5, freq='D')
+    return pd.DataFrame({'GOLD': [10.0, 11, 12, 13, 14], 'SILVER': [5.0, 5, 6, 6, 7]}, index=index)
+
+
+def test_baskets_of_ended_sessions_are_evicted(prices):
+    categories = {'Indice Métaux': {'GOLD': 1.0, 'SILVER': 1.0}}
+    engine = BasketIndexEngine(prices, categories)
+    engine.define('active/Panier', {'GOLD': 1})
+    engine.define('ended/Panier', {'SILVER': 1})
+    Dashboard.CommodityDashboard.evict_session_baskets(engine, categories, lambda session: session == 'active')
+    assert engine.names == ['Indice Métaux', 'active/Panier']
+
+
+def test_unchanged_cards_are_served_from_the_session_cache():
+    engine = MarketEngine(SimulatedMarketSource(seed=8))
+    render = Dashboard.CommodityDashboard.render_commodity_cards
+    current = engine.current_data
+    cache = {}
+    html, changed = render(current, engine.metadata, cache)
+    symbols = list(current['symbole'].astype(str))
+    assert sorted(changed) == sorted(symbols) and set(cache) == set(symbols)
+    cards = {symbole: entry[2] for symbole, entry in cache.items()}
+
+    again, changed = render(current.copy(), engine.metadata, cache)
+    assert changed == [] and again == html
+    assert all(cache[symbole][2] is cards[symbole] for symbole in symbols)
+
+    # Nouveau prix pour le premier symbole, nouvelle variation seule pour le deuxième
+    moved = current.copy()
+    moved.loc[0, 'prix'] = 12345.678
+    moved.loc[1, 'change_pct'] = moved.loc[1, 'change_pct'] + 1
+    updated, changed = render(moved, engine.metadata, cache)
+    assert changed == symbols[:2]
+    assert '12345.68' in cache[symbols[0]][2] and cache[symbols[1]][2] != cards[symbols[1]]
+    assert all(cache[symbole][2] is cards[symbole] for symbole in symbols[2:])
+    assert updated.count('commodity-card ') == len(symbols)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.catalog import COMMODITIES
+from commodities.data_sources import (SimulatedMarketSource, correlation_matrix, regime_levels,
+                                      seasonal_factors)
+
+START, END = '2020-01-01', '2024-12-31'
+
+
+def wide(data, field='prix'):
+    return data.pivot(index='date', columns='symbole', values=field)[list(COMMODITIES)]
+
+
+def pure_gbm(seed=7):
+    """Simulateur sans régimes, saisonnalité ni stress : rendements log gaussiens purs"""
+    return SimulatedMarketSource(seed=seed, regimes=[], seasonal_amplitude={}, stress_probability=0.0)
+
+
+def test_history_is_reproducible_per_seed():
+    first = SimulatedMarketSource(seed=1).historical_data(COMMODITIES, START, END)
+    again = SimulatedMarketSource(seed=1).historical_data(COMMODITIES, START, END)
+    other = SimulatedMarketSource(seed=2).historical_data(COMMODITIES, START, END)
+    pd.testing.assert_frame_equal(first, again)
+    assert not np.allclose(first['prix'], other['prix'])
+
+
+def test_longer_history_extends_shorter_one():
+    source = SimulatedMarketSource(seed=3)
+    short = wide(source.historical_data(COMMODITIES, START, '2022-12-31'))
+    long = wide(source.historical_data(COMMODITIES, START, END))
+    pd.testing.assert_frame_equal(short, long.loc[short.index])
+
+
+def test_gbm_matches_profile_volatility_and_correlation():
+    source = pure_gbm()
+    prices = wide(source.historical_data(COMMODITIES, START, END))
+    returns = np.log(prices).diff().iloc[1:]
+    sigma = source.daily_sigma([COMMODITIES[s]['volatilite'] for s in prices.columns])
+    np.testing.assert_allclose(returns.std().to_numpy(), sigma, rtol=0.06)
+
+    correlation = returns.corr().to_numpy()
+    categories = [COMMODITIES[s]['categorie'] for s in prices.columns]
+    expected = correlation_matrix(categories)
+    off_diagonal = ~np.eye(len(categories), dtype=bool)
+    assert np.abs(correlation - expected)[off_diagonal].max() < 0.1
+
+
+def test_ohlc_bars_bracket_open_and_close():
+    data = SimulatedMarketSource(seed=4).historical_data(COMMODITIES, START, END)
+    assert (data['haut'] >= data[['ouverture', 'prix']].max(axis=1)).all()
+    assert (data['bas'] <= data[['ouverture', 'prix']].min(axis=1)).all()
+    assert (data['bas'] > 0).all()
+
+
+def test_regime_levels_apply_by_symbol_category_and_wildcard():
+    dates = pd.date_range('2021-01-01', '2021-01-10')
+    regimes = [
+        {'label': 'a', 'debut': '2021-01-03', 'fin': '2021-01-05', 'impact': {'GOLD': 2.0, 'Énergie': 0.5}},
+        {'label': 'b', 'debut': '2021-01-05', 'fin': None, 'impact': {'*': 1.1}},
+    ]
+    levels = regime_levels(dates, ['GOLD', 'BRENT', 'CORN'], ['Métaux Précieux', 'Énergie', 'Agriculture'], regimes)
+    np.testing.assert_allclose(levels[0], [1.0, 1.0, 1.0])
+    np.testing.assert_allclose(levels[2], [2.0, 0.5, 1.0])
+    np.testing.assert_allclose(levels[4], [2.2, 0.55, 1.1])
+    np.testing.assert_allclose(levels[9], [1.1, 1.1, 1.1])
+
+
+def test_seasonal_factors_follow_amplitude():
+    dates = pd.date_range('2021-01-01', '2021-12-31')
+    factors = seasonal_factors(dates, ['WHEAT', 'GOLD'], ['Agriculture', 'Métaux Précieux'],
+                               {'Agriculture': 0.03, '*': 0.0})
+    assert factors[:, 0].max() == pytest.approx(1.03, abs=1e-4)
+    assert factors[:, 0].min() == pytest.approx(0.97, abs=1e-4)
+    np.testing.assert_array_equal(factors[:, 1], 1.0)
+
+
+def test_ticks_are_stable_across_block_boundaries():
+    source = SimulatedMarketSource(seed=5)
+    volatilite = [COMMODITIES[s]['volatilite'] for s in COMMODITIES]
+    categories = [COMMODITIES[s]['categorie'] for s in COMMODITIES]
+    returns, volumes = source.ticks(0, 3000, volatilite, categories)
+    part, part_volumes = source.ticks(1000, 1500, volatilite, categories)
+    np.testing.assert_array_equal(part, returns[1000:2500])
+    np.testing.assert_array_equal(part_volumes, volumes[1000:2500])
+
+
+def test_poll_replays_each_elapsed_tick_once():
+    clock = iter([100.0, 100.0, 105.0]).__next__
+    source = SimulatedMarketSource(seed=6, clock=clock)
+    current = pd.DataFrame({
+        'symbole': list(COMMODITIES),
+        'prix': [COMMODITIES[s]['prix_base'] for s in COMMODITIES],
+        'volume_jour': 1e6,
+        'volatilite': [COMMODITIES[s]['volatilite'] for s in COMMODITIES],
+        'categorie': [COMMODITIES[s]['categorie'] for s in COMMODITIES],
+    })
+    assert source.poll(current) is not None
+    assert source.poll(current) is None
+    quotes = source.poll(current)
+    returns, _ = source.ticks(101, 5, current['volatilite'].values, current['categorie'].values)
+    np.testing.assert_allclose(quotes['prix'], current['prix'] * np.exp(returns.sum(axis=0)))
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.derived import DerivedEngine, units_per_tonne
+
+COMMODITIES = {
+    'GOLD': {'unite': 'USD/once'},
+    'SILVER': {'unite': 'USD/once'},
+    'CORN': {'unite': 'USD/boisseau'},
+}
+
+
+@pytest.fixture
+def base():
+    index = pd.date_range('2024-01-01', periods=4, freq='D', name='date')
+    return pd.DataFrame({'GOLD': [2000.0, 2010, 2020, 2040], 'SILVER': [25.0, 25.5, 24.0, 26.0],
+                         'CORN': [4.0, 4.2, 4.1, 4.4]}, index=index)
+
+
+def engine_with(base, **definitions):
+    return DerivedEngine(base, COMMODITIES, {name: (expression, '') for name, expression in definitions.items()})
+
+
+def test_arithmetic_operators(base):
+    engine = engine_with(base, expr='-(GOLD - SILVER) * 2 / CORN + 1')
+    expected = -(base['GOLD'] - base['SILVER']) * 2 / base['CORN'] + 1
+    np.testing.assert_allclose(engine.evaluate('expr'), expected)
+
+
+def test_functions_rebase_log_and_tonne(base):
+    engine = engine_with(base, r='rebase(SILVER)', l='log(GOLD)', t='tonne(CORN)', nested='rebase(r)')
+    np.testing.assert_allclose(engine.evaluate('r'), base['SILVER'] / 25.0 * 100)
+    np.testing.assert_allclose(engine.evaluate('l'), np.log(base['GOLD']))
+    np.testing.assert_allclose(engine.evaluate('t'), base['CORN'] * units_per_tonne('CORN', COMMODITIES['CORN']))
+    np.testing.assert_allclose(engine.evaluate('nested'), engine.evaluate('r'))
+
+
+@pytest.mark.parametrize('expression', [
+    'GOLD ** 2',
+    'GOLD % 7',
+    'GOLD // SILVER',
+    'GOLD > SILVER',
+    'GOLD.values',
+    'GOLD[0]',
+    "__import__('os')",
+    'open(GOLD)',
+    'exp(GOLD)',
+    'rebase(GOLD, 1)',
+    'tonne(GOLD / SILVER)',
+    'lambda: GOLD',
+    "'GOLD'",
+])
+def test_disallowed_nodes_are_rejected(base, expression):
+    engine = engine_with(base, bad=expression)
+    with pytest.raises(ValueError, match='Expression non supportée'):
+        engine.evaluate('bad')
+
+
+def test_unknown_series_and_cycles_are_rejected(base):
+    engine = engine_with(base, bad='GOLD / PLATINUM', a='b + 1', b='a + 1')
+    with pytest.raises(KeyError, match='PLATINUM'):
+        engine.evaluate('bad')
+    with pytest.raises(ValueError, match='circulaire'):
+        engine.evaluate('a')
+
+
+def test_evaluation_is_memoized_per_dependency_version(base):
+    engine = engine_with(base, ratio='GOLD / SILVER', corn='tonne(CORN)', chained='rebase(ratio)')
+    # La première ligne de séance touche tous les symboles : elle est créée avant la mesure
+    engine.update_base({'GOLD': 2050.0})
+    for name in engine.definitions:
+        engine.evaluate(name)
+    assert engine.recomputed == 3
+    corn = engine.evaluate('corn')
+    assert engine.recomputed == 3
+
+    engine.update_base({'GOLD': 2060.0})
+    assert engine.affected(['GOLD']) == ['ratio', 'chained']
+    assert engine.evaluate('corn') is corn
+    assert engine.evaluate('chained').iloc[-1] == pytest.approx(2060.0 / 26.0 / (2000.0 / 25.0) * 100)
+    assert engine.recomputed == 5
+
+
+def test_live_ticks_go_to_a_session_row_after_the_last_close(base):
+    engine = engine_with(base, ratio='GOLD / SILVER')
+    engine.update_base({'GOLD': 2100.0})
+    engine.update_base({'SILVER': 27.0})
+    assert len(engine.base) == len(base) + 1
+    pd.testing.assert_frame_equal(engine.base.iloc[:-1], base, check_freq=False)
+    assert engine.base.index[-1] == base.index[-1] + pd.Timedelta(days=1)
+    assert engine.base.iloc[-1].to_dict() == {'GOLD': 2100.0, 'SILVER': 27.0, 'CORN': 4.4}
+    assert engine.evaluate('ratio').iloc[-2] == pytest.approx(2040.0 / 26.0)
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.data_sources import HISTORICAL_REGIMES, regime_levels
+from commodities.events import STUDY_FIELDS, EventCatalog, EventStudy, load_events
+
+# Table des régimes avant le catalogue d'événements, et son application ligne par ligne
+PREVIOUS_REGIMES = [
+    {'label': 'Crise COVID', 'debut': '2020-01-01', 'fin': '2020-06-30',
+     'impact': {'Énergie': 0.65}},
+    {'label': 'Reprise post-COVID', 'debut': '2021-01-01', 'fin': '2021-12-31',
+     'impact': {'*': 1.15}},
+    {'label': 'Guerre Ukraine', 'debut': '2022-02-01', 'fin': '2022-12-31',
+     'impact': {'WHEAT': 1.4, 'CORN': 1.4, 'Énergie': 1.25}},
+    {'label': 'Tensions récentes', 'debut': '2023-01-01', 'fin': None,
+     'impact': {'*': 1.05}},
+]
+SYMBOLS = ['BRENT', 'WTI', 'GOLD', 'WHEAT', 'CORN']
+CATEGORIES = ['Énergie', 'Énergie', 'Métaux Précieux', 'Agriculture', 'Agriculture']
+
+
+def previous_levels(dates, symbols, categories, regimes):
+    dates = pd.DatetimeIndex(dates)
+    levels = np.ones((len(dates), len(symbols)))
+    for regime in regimes:
+        mask = dates >= pd.Timestamp(regime['debut'])
+        if regime.get('fin') is not None:
+            mask &= dates <= pd.Timestamp(regime['fin'])
+        impact = regime['impact']
+        levels[mask] *= [impact.get(s, impact.get(c, impact.get('*', 1.0))) for s, c in zip(symbols, categories)]
+    return levels
+
+
+def test_catalog_reproduces_the_previous_regime_table():
+    assert HISTORICAL_REGIMES == PREVIOUS_REGIMES
+    dates = pd.date_range('2019-12-01', '2024-03-31', freq='D')
+    np.testing.assert_allclose(regime_levels(dates, SYMBOLS, CATEGORIES),
+                               previous_levels(dates, SYMBOLS, CATEGORIES, PREVIOUS_REGIMES), rtol=1e-12)
+
+
+def test_overlapping_events_multiply():
+    events = PREVIOUS_REGIMES + [{'label': 'Choc', 'debut': '2022-06-01', 'fin': '2023-02-15',
+                                  'impact': {'GOLD': 0.9, '*': 1.1}}]
+    dates = pd.date_range('2022-01-01', '2023-06-30', freq='D')
+    np.testing.assert_allclose(EventCatalog(events).levels(dates, SYMBOLS, CATEGORIES),
+                               previous_levels(dates, SYMBOLS, CATEGORIES, events), rtol=1e-12)
+
+
+def test_csv_catalog(tmp_path):
+    path = tmp_path / 'evenements.csv'
+    path.write_text('label,debut,fin,impact\n'
+                    'Gel,2024-01-10,2024-01-20,"{""COFFEE"": 1.3}"\n'
+                    'Embargo,2024-02-01,,"{""Énergie"": 1.2, ""*"": 1.01}"\n'
+                    'Annonce,2024-03-05,2024-03-05,\n', encoding='utf-8')
+    events = load_events(str(path))
+    assert events == [
+        {'label': 'Gel', 'debut': '2024-01-10', 'fin': '2024-01-20', 'impact': {'COFFEE': 1.3}},
+        {'label': 'Embargo', 'debut': '2024-02-01', 'fin': None, 'impact': {'Énergie': 1.2, '*': 1.01}},
+        {'label': 'Annonce', 'debut': '2024-03-05', 'fin': '2024-03-05', 'impact': {}},
+    ]
+    catalog = EventCatalog(events)
+    dates = pd.date_range('2024-01-01', '2024-03-31', freq='D')
+    lo, hi = catalog.bounds(dates)
+    assert list(lo) == [9, 31, 64] and list(hi) == [20, len(dates), 65]
+
+
+@pytest.fixture
+def prices():
+    # Pentes de log-prix connues, changées au 51e jour : +1 %/jour puis -2 %/jour pour GOLD, l'inverse pour SILVER
+    dates = pd.date_range('2024-01-01', periods=100, freq='D')
+    t = np.arange(100)
+    gold = np.where(t < 50, 0.01 * t, 0.49 - 0.02 * (t - 49))
+    silver = np.where(t < 50, -0.02 * t, -0.98 + 0.01 * (t - 49))
+    return pd.DataFrame(np.exp(np.column_stack([gold, silver])) * 100, index=dates, columns=['GOLD', 'SILVER'])
+
+
+def study(prices, events, window=5):
+    table = EventStudy(prices, EventCatalog(events), window).run()
+    return table.set_index(['evenement', 'symbole'])
+
+
+def test_window_measures_around_an_event(prices):
+    dates = prices.index
+    table = study(prices, [{'label': 'Milieu', 'debut': dates[50], 'fin': dates[59]}])
+    gold, silver = table.loc['Milieu', 'GOLD'], table.loc['Milieu', 'SILVER']
+    assert gold['rendement_avant'] == pytest.approx(1.0)
+    assert gold['rendement_apres'] == pytest.approx(-2.0)
+    assert silver['rendement_avant'] == pytest.approx(-2.0)
+    assert silver['rendement_apres'] == pytest.approx(1.0)
+    assert gold['vol_avant'] == pytest.approx(0.0, abs=1e-4)
+    # Drawdown depuis la clôture de la veille sur la fenêtre suivante, rendement du début à la fin
+    assert gold['drawdown_max'] == pytest.approx((np.exp(-0.02 * 5) - 1) * 100)
+    assert silver['drawdown_max'] == pytest.approx(0.0, abs=1e-9)
+    assert gold['rendement_evenement'] == pytest.approx((np.exp(-0.02 * 10) - 1) * 100)
+
+
+def test_windows_are_truncated_at_the_edges_of_history(prices):
+    dates = prices.index
+    table = study(prices, [
+        {'label': 'Début', 'debut': dates[2], 'fin': dates[3]},
+        {'label': 'Fin', 'debut': dates[97], 'fin': None},
+        {'label': 'Avant', 'debut': '2023-06-01', 'fin': dates[1]},
+        {'label': 'Après', 'debut': '2025-01-01', 'fin': None},
+    ])
+    # Deux rendements seulement avant le 3e jour, dont le premier n'existe pas
+    assert table.loc[('Début', 'GOLD'), 'rendement_avant'] == pytest.approx(1.0)
+    assert np.isnan(table.loc[('Début', 'GOLD'), 'vol_avant'])
+    assert table.loc[('Début', 'GOLD'), 'rendement_apres'] == pytest.approx(1.0)
+    # Trois rendements après le 98e jour, événement ouvert jusqu'à la dernière date
+    assert table.loc[('Fin', 'SILVER'), 'rendement_apres'] == pytest.approx(1.0)
+    assert table.loc[('Fin', 'SILVER'), 'rendement_evenement'] == pytest.approx((np.exp(0.01 * 3) - 1) * 100)
+    # Commencé avant l'historique : aucune fenêtre antérieure
+    assert np.isnan(table.loc[('Avant', 'GOLD'), 'rendement_avant'])
+    assert table.loc[('Avant', 'GOLD'), 'rendement_evenement'] == pytest.approx((np.exp(0.01) - 1) * 100)
+    # Postérieur à l'historique : mesures absentes
+    assert table.loc['Après', list(STUDY_FIELDS)].isna().all().all()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+from commodities.history_store import HistoryStore
+from commodities.schema import wide_matrix
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return MarketEngine(SimulatedMarketSource(seed=11))
+
+
+@pytest.fixture(scope='module')
+def store(engine, tmp_path_factory):
+    return HistoryStore.write(str(tmp_path_factory.mktemp('store') / 'history'), engine.historical_data)
+
+
+def test_round_trip_preserves_the_long_frame(engine, store):
+    expected = engine.historical_data.sort_values(['date', 'symbole'], kind='stable', ignore_index=True)
+    restored = store.frame().astype(expected.dtypes.to_dict())
+    restored = restored.sort_values(['date', 'symbole'], kind='stable', ignore_index=True)
+    pd.testing.assert_frame_equal(restored[expected.columns], expected)
+
+
+def test_slices_are_views_on_the_mapping(store):
+    column = store.slice('GOLD', 'prix', start='2022-01-01', end='2022-01-31')
+    assert len(column) == 31
+    assert isinstance(column.base, np.memmap) or isinstance(column, np.memmap)
+    assert not column.flags.writeable
+
+
+def test_matrix_matches_pivoted_history(engine, store):
+    for field in ('prix', 'haut'):
+        pd.testing.assert_frame_equal(store.matrix(field), wide_matrix(engine.historical_data, field),
+                                      check_index_type=False)
+    part = store.matrix('prix', ['WHEAT', 'GOLD'], start='2023-03-01', end='2023-03-10')
+    assert list(part.columns) == ['WHEAT', 'GOLD']
+    assert len(part) == 10
+
+
+def test_rewrite_replaces_the_store_atomically(engine, store, tmp_path):
+    root = str(tmp_path / 'history')
+    HistoryStore.write(root, engine.historical_data[engine.historical_data['symbole'] == 'GOLD'])
+    rewritten = HistoryStore.write(root, engine.historical_data)
+    assert sorted(rewritten.symbols) == sorted(store.symbols)
+    assert not (tmp_path / 'history.old').exists()
+
+
+def test_engine_reads_history_lazily_from_the_store(engine, store):
+    lazy = MarketEngine(SimulatedMarketSource(seed=11), history_store=store)
+    assert lazy._historical_data is None
+    pd.testing.assert_frame_equal(lazy.price_matrix(), engine.price_matrix(), check_index_type=False)
+    for field, matrix in engine.ohlc_matrices().items():
+        pd.testing.assert_frame_equal(lazy.ohlc_matrices()[field], matrix, check_index_type=False)
+    pd.testing.assert_frame_equal(lazy.current_data, engine.current_data)
+    history = lazy.history(['GOLD'], start='2024-01-01', end='2024-01-31')
+    assert history['symbole'].astype(str).eq('GOLD').all() and len(history) == 31
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.indices import BASE_LEVEL, BasketIndexEngine, category_baskets, parse_weights
+
+
+@pytest.fixture
+def prices():
+    dates = pd.date_range('2024-01-01', periods=5)
+    return pd.DataFrame({
+        'GOLD': [2000.0, 2020.0, 1990.0, 2050.0, 2100.0],
+        'SILVER': [25.0, 25.5, 24.0, 26.0, 27.0],
+        'COPPER': [4.0, 4.1, 4.2, 4.0, 3.9],
+    }, index=dates)
+
+
+def test_baskets_are_rebased_to_the_base_level(prices):
+    engine = BasketIndexEngine(prices, {'Métaux': {'GOLD': 2, 'SILVER': 1}})
+    rebased = prices / prices.iloc[0]
+    expected = BASE_LEVEL * (2 * rebased['GOLD'] + rebased['SILVER']) / 3
+    np.testing.assert_allclose(engine.history['Métaux'], expected)
+    assert engine.history['Métaux'].iloc[0] == pytest.approx(BASE_LEVEL)
+
+
+def test_incremental_update_matches_a_full_recomputation(prices):
+    engine = BasketIndexEngine(prices, {'A': {'GOLD': 1, 'COPPER': 3}, 'B': {'SILVER': -1, 'GOLD': 2}})
+    ticks = [{'GOLD': 2110.0}, {'COPPER': 3.8, 'SILVER': 27.4}, {'UNKNOWN': 1.0, 'GOLD': 2095.0}]
+    last = prices.iloc[-1].copy()
+    for tick in ticks:
+        levels = engine.update(tick)
+        last.update(pd.Series({s: p for s, p in tick.items() if s in last.index}))
+    recomputed = BasketIndexEngine(pd.concat([prices, last.to_frame().T]), {'A': {'GOLD': 1, 'COPPER': 3},
+                                                                            'B': {'SILVER': -1, 'GOLD': 2}})
+    np.testing.assert_allclose(levels.to_numpy(), recomputed.history.iloc[-1].to_numpy())
+
+
+def test_redefining_a_basket_replaces_its_weights(prices):
+    engine = BasketIndexEngine(prices, {'P': {'GOLD': 1}})
+    engine.define('P', {'SILVER': 1})
+    assert engine.names == ['P']
+    np.testing.assert_allclose(engine.history['P'], BASE_LEVEL * prices['SILVER'] / prices['SILVER'].iloc[0])
+
+
+def test_invalid_baskets_are_rejected(prices):
+    engine = BasketIndexEngine(prices, {})
+    with pytest.raises(ValueError):
+        engine.define('Vide', {'UNKNOWN': 1})
+    with pytest.raises(ValueError):
+        engine.define('Nul', {'GOLD': 1, 'SILVER': -1})
+    assert engine.names == []
+
+
+def test_previous_close_is_the_last_historical_level(prices):
+    engine = BasketIndexEngine(prices, {'P': {'GOLD': 1}})
+    engine.update({'GOLD': 2200.0})
+    assert engine.previous_close()['P'] == pytest.approx(BASE_LEVEL * 2100 / 2000)
+    assert engine.latest()['P'] == pytest.approx(BASE_LEVEL * 2200 / 2000)
+
+
+def test_category_baskets_and_weight_parsing():
+    commodities = {'GOLD': {'categorie': 'Métaux'}, 'SILVER': {'categorie': 'Métaux'}, 'CORN': {'categorie': 'Agri'}}
+    assert category_baskets(commodities) == {'Indice Métaux': {'GOLD': 1.0, 'SILVER': 1.0},
+                                             'Indice Agri': {'CORN': 1.0}}
+    assert parse_weights('gold:2, SILVER , copper:-0.5,') == {'GOLD': 2.0, 'SILVER': 1.0, 'COPPER': -0.5}
+    with pytest.raises(ValueError):
+        parse_weights('GOLD:abc')
+
+
+def test_session_baskets_with_the_same_name_are_independent(prices):
+    engine = BasketIndexEngine(prices, {})
+    engine.define('s1/Panier', {'GOLD': 1})
+    engine.define('s2/Panier', {'SILVER': 1})
+    engine.define('s1/Panier', {'COPPER': 1})
+    assert engine.weights['s1/Panier'] == {'COPPER': 1}
+    np.testing.assert_allclose(engine.history['s1/Panier'], BASE_LEVEL * prices['COPPER'] / prices['COPPER'].iloc[0])
+    np.testing.assert_allclose(engine.history['s2/Panier'], BASE_LEVEL * prices['SILVER'] / prices['SILVER'].iloc[0])
+
+
+def test_removed_basket_leaves_the_others_untouched(prices):
+    engine = BasketIndexEngine(prices, {'A': {'GOLD': 1}, 'B': {'SILVER': 1}, 'C': {'COPPER': 1}})
+    engine.remove('B')
+    assert engine.names == ['A', 'C'] and list(engine.history.columns) == ['A', 'C']
+    assert 'B' not in engine.weights
+    levels = engine.update({'COPPER': prices['COPPER'].iloc[-1] * 1.1})
+    np.testing.assert_allclose(levels['C'], engine.history['C'].iloc[-1] * 1.1)
+    np.testing.assert_allclose(levels['A'], engine.history['A'].iloc[-1])
+
+
+def test_errors_name_the_basket_label(prices):
+    engine = BasketIndexEngine(prices, {})
+    with pytest.raises(ValueError, match=r"^Panier Mon panier : la somme"):
+        engine.define('1855a881ac77/Mon panier', {'GOLD': 1, 'SILVER': -1}, label='Mon panier')
@@ -0,0 +1,24 @@
+import threading
+
+import numpy as np
+import pytest
+
+from commodities.loadtest import PERCENTILES, run_level
+
+pytest.importorskip('streamlit.testing.v1')
+
+
+def test_single_session_level(monkeypatch):
+    monkeypatch.setenv('COMMODITIES_REFRESH', '0')
+    row, records = run_level(1, 1.0, threading.Lock(), seed=1, think_time=0.1, refresh=0.2)
+
+    assert {'sessions', 'reexecutions', 'debit_par_s', 'ouverture_ms', 'execution_ms', 'cpu_pct', 'rss_mo',
+            'rss_delta_mo', 'rss_max_mo', 'erreurs'} <= set(row)
+    assert row['sessions'] == 1 and row['erreurs'] == 0
+    assert records['action'].iloc[0] == 'ouverture'
+    assert row['reexecutions'] == len(records) - 1 > 0
+    percentiles = [row[f'p{p}_ms'] for p in PERCENTILES]
+    assert np.isfinite(percentiles).all() and percentiles == sorted(percentiles)
+    reruns = records.loc[records['action'] != 'ouverture', 'latence'] * 1000
+    assert percentiles[0] == pytest.approx(np.percentile(reruns, 50))
+    assert row['ouverture_ms'] > 0 and row['rss_mo'] > 0
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.catalog import COMMODITIES
+from commodities.portfolio import CONTRACT_MULTIPLIERS, Portfolio, random_book, z_score
+
+
+@pytest.fixture
+def covariance():
+    rng = np.random.default_rng(3)
+    symbols = list(COMMODITIES)
+    returns = rng.normal(0, 0.02, (300, len(symbols))) + rng.normal(0, 0.01, (300, 1))
+    return pd.DataFrame(returns, columns=symbols).cov()
+
+
+@pytest.fixture
+def prices():
+    return np.array([COMMODITIES[s]['prix_base'] for s in COMMODITIES], dtype=float)
+
+
+def test_component_var_sums_to_total_var(covariance, prices):
+    book = random_book(COMMODITIES, dict(zip(COMMODITIES, prices)), 500, seed=2)
+    book.mark(prices)
+    components = book.var_by_category(covariance)
+    assert list(components.index) == book.categories
+    assert components.sum() == pytest.approx(book.var(covariance))
+    assert book.var_by_category(covariance, horizon=10).sum() == pytest.approx(book.var(covariance, horizon=10))
+
+
+def test_var_matches_the_parametric_formula(covariance, prices):
+    book = Portfolio(COMMODITIES, CONTRACT_MULTIPLIERS)
+    book.add('GOLD', 3, 1900.0).add('BRENT', -2, 80.0)
+    book.mark(prices)
+    exposure = book.dollar_exposure().reindex(covariance.index).to_numpy()
+    expected = z_score(0.99) * np.sqrt(exposure @ covariance.to_numpy() @ exposure)
+    assert book.var(covariance) == pytest.approx(expected)
+
+
+def test_flat_book_has_no_var(covariance, prices):
+    book = Portfolio(COMMODITIES, CONTRACT_MULTIPLIERS).add('GOLD', 2, 1900.0).add('GOLD', -2, 1950.0)
+    book.mark(prices)
+    assert book.var(covariance) == 0.0
+    assert (book.var_by_category(covariance) == 0.0).all()
+    assert book.pnl() == pytest.approx(2 * CONTRACT_MULTIPLIERS['GOLD'] * (1950.0 - 1900.0))
+
+
+def test_marking_matches_the_position_frame(prices):
+    book = random_book(COMMODITIES, dict(zip(COMMODITIES, prices)), 200, seed=5)
+    pnl = book.mark(prices * 1.01)
+    frame = book.frame()
+    assert pnl == pytest.approx(frame['pnl'].sum())
+    assert book.pnl_by_category().sum() == pytest.approx(pnl)
+
+
+def test_update_before_mark_needs_every_held_price():
+    book = Portfolio(COMMODITIES, CONTRACT_MULTIPLIERS)
+    book.add('GOLD', 2, 1900.0).add('BRENT', -1, 80.0)
+    with pytest.raises(ValueError, match='BRENT'):
+        book.update({'GOLD': 1950.0})
+    # Un premier tick complet sur les symboles détenus suffit à valoriser le livre
+    pnl = book.update({'GOLD': 1950.0, 'BRENT': 82.0})
+    expected = 2 * CONTRACT_MULTIPLIERS['GOLD'] * 50.0 - CONTRACT_MULTIPLIERS['BRENT'] * 2.0
+    assert pnl == pytest.approx(expected)
+    assert book.update({'SILVER': 30.0}) == pytest.approx(expected)
+    assert book.pnl_by_category().sum() == pytest.approx(expected)
+    # Un symbole sans position ni cotation reste sans prix
+    assert np.isnan(book.last_prices[book.positions['CORN']])
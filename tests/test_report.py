@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.indicators import ANNUALIZATION, risk_metrics, technical_indicators
+from commodities.data_sources import SimulatedMarketSource
+from commodities.report import build_report, render_symbol
+from commodities.volatility import VolatilityEngine
+
+
+def test_report_indicators_have_no_warm_up_inside_the_period():
+    dates = pd.date_range('2023-01-01', '2024-06-30')
+    prices = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(dates))))
+    start, end = pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-31')
+    symbole, png, data = render_symbol(('GOLD', 'Or', dates.values, prices, start, end, 50))
+    full = technical_indicators(pd.Series(prices, index=dates)).loc[start:end]
+    assert png.startswith(b'\x89PNG')
+    assert data['date'].min() == start and data['date'].max() == end
+    assert not data[['MA20', 'MA50', 'RSI', 'Bollinger_High']].isna().any().any()
+    np.testing.assert_allclose(data['MA50'], full['MA50'])
+
+
+def test_risk_and_volatility_share_the_annualization():
+    dates = pd.date_range('2023-01-01', periods=400)
+    close = pd.DataFrame({'GOLD': 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 400)))},
+                         index=dates)
+    risk = risk_metrics(close)['Volatilité annualisée (%)']['GOLD']
+    ohlc = {field: close for field in ('ouverture', 'haut', 'bas', 'prix')}
+    close_to_close = VolatilityEngine(ohlc, horizons=(399,)).latest()['close_to_close_399']['GOLD']
+    assert risk == pytest.approx(close.pct_change().std().iloc[0] * np.sqrt(ANNUALIZATION) * 100)
+    assert abs(risk / close_to_close - 1) < 0.01
+
+
+@pytest.fixture(scope='module')
+def history():
+    commodities = {'GOLD': {'nom': 'Or', 'categorie': 'Métaux', 'prix_base': 1950.0, 'volatilite': 1.2}}
+    return SimulatedMarketSource(seed=2).historical_data(commodities, start='2024-01-01', end='2024-03-31')
+
+
+@pytest.mark.parametrize('symbols, start, end, message', [
+    (['GOLD'], '2030-01-01', None, 'Aucune donnée'),
+    (['GOLD'], '2024-03-01', '2024-02-01', 'Aucune donnée'),
+    (['NOPE'], None, None, 'Symboles inconnu'),
+])
+def test_empty_selection_raises_a_clear_error(tmp_path, history, symbols, start, end, message):
+    with pytest.raises(ValueError, match=message):
+        build_report(tmp_path, symbols, start, end, formats=('html',), history=history)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+from commodities.seasonality import SeasonalityEngine
+
+
+def test_appending_days_matches_a_full_rebuild():
+    prices = MarketEngine(SimulatedMarketSource(seed=5)).price_matrix()
+    engine = SeasonalityEngine(prices.iloc[:-30])
+    engine.append(prices.iloc[:-10]).append(prices)
+    full = SeasonalityEngine(prices)
+    np.testing.assert_allclose(engine.doy_sums, full.doy_sums)
+    pd.testing.assert_frame_equal(engine.month_profile(), full.month_profile())
+    pd.testing.assert_series_equal(engine.strength(), full.strength())
+
+
+def test_committed_session_bar_extends_history_and_seasonality():
+    engine = MarketEngine(SimulatedMarketSource(seed=5))
+    seasonality = engine.seasonality()
+    volatility = engine.volatility()
+    dates = engine.price_matrix().index
+    engine.update_live_data()
+    engine.commit_session_bar()
+
+    assert engine.history_version == 1
+    prices = engine.price_matrix()
+    assert prices.index[-1] == dates[-1] + pd.Timedelta(days=1)
+    np.testing.assert_allclose(prices.iloc[-1], engine.session_bar['prix'].reindex(prices.columns), rtol=1e-6)
+    assert engine.history(['GOLD'])['date'].iloc[-1] == prices.index[-1]
+    # Les moteurs existants sont prolongés, pas reconstruits
+    assert engine.seasonality() is seasonality and seasonality.dates[-1] == prices.index[-1]
+    assert engine.volatility() is volatility
+    pd.testing.assert_frame_equal(seasonality.month_profile(), SeasonalityEngine(prices).month_profile())
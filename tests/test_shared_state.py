@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+import pytest
+
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+from commodities.shared_state import SharedMarketState, SharedMarketView, shared_engine
+
+
+@pytest.fixture
+def published():
+    state = SharedMarketState(MarketEngine(SimulatedMarketSource(seed=4)), port=0)
+    yield state
+    state.close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline
+        time.sleep(0.01)
+
+
+def test_worker_engine_reads_history_without_copy(published):
+    worker = shared_engine(port=published.listener.address[1])
+    prices = worker.price_matrix()
+    _, history = worker.history_store.view.history()
+    assert np.shares_memory(prices.to_numpy(), history)
+    expected = published.engine.price_matrix()
+    np.testing.assert_allclose(prices[expected.columns].to_numpy(), expected.to_numpy())
+    worker.source.view.close()
+
+
+def test_worker_applies_published_live_fields(published):
+    worker = shared_engine(port=published.listener.address[1])
+    published.step()
+    wait_for(lambda: worker.source.view.version == int(published.header[0]))
+    worker.update_live_data()
+
+    server = published.engine
+    current = server.current_data.set_index(server.current_data['symbole'].astype(str))
+    live = worker.current_data.set_index(worker.current_data['symbole'].astype(str))
+    np.testing.assert_allclose(live['prix'], current['prix'].reindex(live.index))
+    np.testing.assert_allclose(live['change_pct'], current['change_pct'].reindex(live.index))
+    np.testing.assert_allclose(worker.session_bar.reindex(server.session_bar.index), server.session_bar)
+    worker.source.view.close()
+
+
+def test_worker_reloads_a_republished_history(published):
+    worker = shared_engine(port=published.listener.address[1])
+    version = worker.history_version
+    published.engine.commit_session_bar()
+    published.step()
+    wait_for(lambda: worker.history_store.version == published.engine.history_version)
+    worker.update_live_data()
+
+    assert worker.history_version > version
+    assert worker.price_matrix().index[-1] == published.engine.price_matrix().index[-1]
+    worker.source.view.close()
+
+
+def segment_of(array):
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return array.segment
+
+
+def test_retired_segment_stays_mapped_until_the_last_matrix_is_released(published):
+    worker = shared_engine(port=published.listener.address[1])
+    prices = worker.price_matrix()
+    segment = segment_of(prices.to_numpy())
+    published.engine.commit_session_bar()
+    published.step()
+    wait_for(lambda: worker.history_store.version == published.engine.history_version)
+    worker.update_live_data()
+
+    assert segment_of(worker.price_matrix().to_numpy()) is not segment
+    assert segment.shm.buf is not None
+    assert np.isfinite(prices.to_numpy()).all()
+    del prices
+    assert segment.handles == 0
+    assert segment.shm.buf is None
+    worker.source.view.close()
+
+
+def test_view_requests_the_manifest_again_when_a_segment_is_gone(published):
+    view = SharedMarketView(port=published.listener.address[1])
+    stale = dict(view.manifest, history='psm_missing')
+    view._receive(stale)
+    wait_for(lambda: view.remaps == 1 and view.manifest['history'] == published.manifest()['history'])
+    dates, history = view.history()
+    assert len(dates) == published.n_dates
+    view.close()
+
+
+def test_worker_term_structure_uses_the_fallback_curve(published):
+    worker = shared_engine(port=published.listener.address[1])
+    curve = worker.term_structure().curve('BRENT')
+    # La courbe par défaut de DataSource est plate au comptant
+    assert len(curve) > 1 and curve.nunique() > 1
+    worker.source.view.close()
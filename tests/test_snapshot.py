@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+from commodities.snapshot import has_snapshot, load_snapshot, warm_up, write_snapshot
+
+
+def test_warm_start_restores_state_and_analytics(tmp_path, monkeypatch):
+    engine = warm_up(MarketEngine(SimulatedMarketSource(seed=3)))
+    for _ in range(5):
+        engine.update_live_data()
+    write_snapshot(engine, tmp_path)
+    assert has_snapshot(tmp_path)
+
+    # Les analyses de la même version d'historique sont relues, jamais recalculées
+    monkeypatch.setattr(MarketEngine, 'ohlc_matrices', lambda self: (_ for _ in ()).throw(AssertionError))
+    restored = load_snapshot(tmp_path, SimulatedMarketSource(seed=3))
+    assert restored.history_version == engine.history_version
+    pd.testing.assert_frame_equal(restored.covariance(), engine.covariance())
+    pd.testing.assert_frame_equal(restored.seasonality().month_profile(), engine.seasonality().month_profile())
+    np.testing.assert_allclose(restored.volatility().ewma_var, engine.volatility().ewma_var)
+    assert (restored.anomalies.count >= engine.anomalies.count).all()
+    assert list(restored.market_data['devises']) == list(engine.market_data['devises'])
+
+
+def test_snapshot_resumes_after_the_last_applied_tick(tmp_path):
+    engine = MarketEngine(SimulatedMarketSource(seed=3))
+    engine.update_live_data()
+    write_snapshot(engine, tmp_path)
+    restored = load_snapshot(tmp_path, SimulatedMarketSource(seed=3))
+
+    engine.update_live_data()
+    pd.testing.assert_series_equal(restored.current_data['prix'], engine.current_data['prix'])
+
+
+def test_committed_bars_are_part_of_the_snapshot_history(tmp_path):
+    engine = MarketEngine(SimulatedMarketSource(seed=3))
+    engine.update_live_data()
+    engine.commit_session_bar()
+    write_snapshot(engine, tmp_path)
+    assert engine.history_store is not None and engine._history_tail is None
+
+    restored = load_snapshot(tmp_path, SimulatedMarketSource(seed=3))
+    assert restored.history_version == engine.history_version
+    pd.testing.assert_frame_equal(restored.price_matrix(), engine.price_matrix(), check_index_type=False)
@@ -0,0 +1,68 @@
+import glob
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.data_sources import SimulatedMarketSource
+from commodities.engine import MarketEngine
+from commodities.term_structure import ROLL_DAYS, TermStructureStore, monthly_expiries, time_to_expiry
+
+DATES = pd.date_range('2024-01-01', '2024-06-30')
+TREND = np.linspace(0.0, 0.3, len(DATES))
+
+
+def write(root, level):
+    """Courbe synthétique : le contrat j vaut level(j, t) tant qu'il est coté"""
+    expiries = monthly_expiries(DATES[0], DATES[-1], months=6)
+    listed = ~np.isnan(time_to_expiry(DATES, expiries, months=6))
+    prices = level(np.arange(len(expiries))[None, :], np.arange(len(DATES))[:, None])
+    prices = np.where(listed, prices, np.nan)
+    return TermStructureStore.write(root, [('GOLD', DATES, expiries, prices)])
+
+
+def test_ratio_adjustment_removes_roll_gaps(tmp_path):
+    store = write(tmp_path / 'courbes', lambda j, t: (100 + 10 * j) * np.exp(TREND[t]))
+    series = store.continuous('GOLD', method='ratio')
+    assert series['roulement'].sum() == 6
+    # Sans écarts aux roulements, la série ajustée suit la tendance au niveau du dernier contrat détenu
+    scaled = series['ajuste'] / np.exp(TREND)
+    np.testing.assert_allclose(scaled, scaled.iloc[-1], rtol=1e-6)
+    assert series['ajuste'].iloc[-1] == pytest.approx(series['brut'].iloc[-1])
+
+
+def test_difference_adjustment_removes_roll_gaps(tmp_path):
+    store = write(tmp_path / 'courbes', lambda j, t: 100 + 10 * j + 20 * TREND[t])
+    series = store.continuous('GOLD', method='difference')
+    shifted = series['ajuste'] - 20 * TREND
+    np.testing.assert_allclose(shifted, shifted.iloc[-1], atol=1e-4)
+    # La série brute saute de 10 à chaque roulement
+    jumps = series['brut'].diff()[series['roulement']]
+    np.testing.assert_allclose(jumps - 20 * np.diff(TREND).mean(), 10, atol=1e-3)
+
+
+def test_rolls_happen_before_expiry(tmp_path):
+    store = write(tmp_path / 'courbes', lambda j, t: 100 + 10 * j + 0 * t)
+    series = store.continuous('GOLD')
+    expiries = store.expiries('GOLD')
+    expected = (expiries - pd.Timedelta(days=ROLL_DAYS))
+    expected = expected[(expected > DATES[0]) & (expected <= DATES[-1])]
+    assert list(series.index[series['roulement']]) == list(expected)
+    assert (store.nearby('GOLD', roll_days=0).loc[expected] == store.nearby('GOLD', roll_days=ROLL_DAYS)
+            .loc[expected] - 10).all()
+
+
+def test_engine_rewrites_its_curves_in_one_directory():
+    engine = MarketEngine(SimulatedMarketSource(seed=6))
+    before = set(glob.glob(os.path.join(tempfile.gettempdir(), 'commodities-courbes-*')))
+    first = engine.term_structure()
+    first.curve('GOLD')
+    engine.commit_session_bar()
+    second = engine.term_structure()
+    assert second is not first and second.root == first.root
+    assert not first._open
+    assert second.dates('GOLD')[-1] == engine.price_matrix().index[-1]
+    after = set(glob.glob(os.path.join(tempfile.gettempdir(), 'commodities-courbes-*')))
+    assert len(after - before) == 1
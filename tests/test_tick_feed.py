@@ -0,0 +1,47 @@
+import socket
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.catalog import COMMODITIES
+from commodities.data_sources import SimulatedMarketSource
+from commodities.tick_feed import TickFeedClient, TickFeedSource
+
+
+def test_malformed_lines_are_counted_and_skipped():
+    client = TickFeedClient()
+    client._ingest([b'{"symbole": "GOLD", "prix": 1.0}', b'{"symbole": "GO', b'', b'[1, 2]', b'{"prix": 2.0}',
+                    b'{"symbole": "GOLD", "prix": 3.0}'])
+    assert client.stats()['malformed'] == 3
+    latest = client.drain()
+    assert latest['GOLD']['prix'] == 3.0 and latest['GOLD']['ticks'] == 2
+
+
+@pytest.fixture
+def silent_server():
+    # Accepte la connexion sans jamais rien envoyer : le client reste bloqué en lecture
+    server = socket.create_server(('127.0.0.1', 0))
+    yield server.getsockname()[1]
+    server.close()
+
+
+def test_stop_interrupts_a_pending_read(silent_server):
+    client = TickFeedClient(port=silent_server, reconnect_delay=60).start()
+    time.sleep(0.2)
+    start = time.perf_counter()
+    client.stop()
+    assert not client._thread.is_alive()
+    assert time.perf_counter() - start < 1.0
+
+
+def test_source_delegates_the_futures_curve(silent_server):
+    fallback = SimulatedMarketSource(seed=5)
+    source = TickFeedSource(port=silent_server, history_source=fallback)
+    spot = pd.Series(2000.0, index=pd.date_range('2024-01-01', periods=90, freq='D'))
+    expiries, curve = source.futures_curve('GOLD', COMMODITIES['GOLD'], spot, 6)
+    expected_expiries, expected_curve = fallback.futures_curve('GOLD', COMMODITIES['GOLD'], spot, 6)
+    assert list(expiries) == list(expected_expiries)
+    np.testing.assert_array_equal(curve, expected_curve)
+    source.client.stop()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commodities.indicators import ANNUALIZATION
+from commodities.volatility import EWMA_LAMBDA, OHLC_FIELDS, VolatilityEngine, column
+
+
+@pytest.fixture
+def ohlc():
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2023-01-01', periods=120)
+    symbols = ['GOLD', 'WTI']
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), 2)), axis=0))
+    open_ = close * np.exp(rng.normal(0, 0.005, close.shape))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+    frames = [pd.DataFrame(values, index=dates, columns=symbols) for values in (open_, high, low, close)]
+    return dict(zip(OHLC_FIELDS, frames))
+
+
+def annualized(variance):
+    return np.sqrt(variance * ANNUALIZATION) * 100
+
+
+def test_range_estimators_match_their_formulas(ohlc):
+    engine = VolatilityEngine(ohlc, horizons=(21,))
+    last = {field: frame.iloc[-21:] for field, frame in ohlc.items()}
+    hl = np.log(last['haut'] / last['bas']) ** 2
+    co = np.log(last['prix'] / last['ouverture']) ** 2
+    latest = engine.latest()
+
+    parkinson = annualized((hl / (4 * np.log(2))).mean())
+    garman_klass = annualized((0.5 * hl - (2 * np.log(2) - 1) * co).mean())
+    np.testing.assert_allclose(latest[column('parkinson', 21)], parkinson)
+    np.testing.assert_allclose(latest[column('garman_klass', 21)], garman_klass)
+
+    returns = np.log(ohlc['prix']).diff().iloc[-21:]
+    np.testing.assert_allclose(latest[column('close_to_close', 21)], annualized(returns.var()))
+
+
+def test_ewma_follows_the_riskmetrics_recursion(ohlc):
+    engine = VolatilityEngine(ohlc)
+    r2 = (np.log(ohlc['prix']).diff() ** 2).to_numpy()
+    variance = r2[1].copy()
+    for row in r2[2:]:
+        variance = EWMA_LAMBDA * variance + (1 - EWMA_LAMBDA) * row
+    np.testing.assert_allclose(engine.latest()['ewma'], annualized(variance))
+    np.testing.assert_allclose(engine.history('ewma').iloc[-1], annualized(variance))
+
+
+def test_history_matches_latest_for_every_estimator(ohlc):
+    engine = VolatilityEngine(ohlc)
+    latest = engine.latest()
+    for estimator in ('close_to_close', 'parkinson', 'garman_klass'):
+        for horizon in engine.horizons:
+            np.testing.assert_allclose(engine.history(estimator, horizon).iloc[-1],
+                                       latest[column(estimator, horizon)])
+
+
+def test_incremental_updates_match_a_batch_rebuild(ohlc):
+    engine = VolatilityEngine({field: frame.iloc[:-15] for field, frame in ohlc.items()})
+    for i in range(15, 0, -1):
+        engine.update(ohlc['prix'].index[-i], {field: frame.iloc[-i].to_numpy() for field, frame in ohlc.items()})
+    batch = VolatilityEngine(ohlc)
+    pd.testing.assert_frame_equal(engine.latest(), batch.latest())
+    assert engine.dates.equals(batch.dates)
+    pd.testing.assert_frame_equal(engine.history('parkinson'), batch.history('parkinson'), check_freq=False)
+
+
+def test_pending_bar_does_not_change_state(ohlc):
+    engine = VolatilityEngine({field: frame.iloc[:-1] for field, frame in ohlc.items()})
+    before = engine.latest()
+    bar = {field: frame.iloc[-1].to_numpy() for field, frame in ohlc.items()}
+    pending = engine.latest(bar)
+    pd.testing.assert_frame_equal(engine.latest(), before)
+    pd.testing.assert_frame_equal(pending, engine.update(ohlc['prix'].index[-1], bar))